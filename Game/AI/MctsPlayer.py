@@ -0,0 +1,321 @@
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from math import log, sqrt
+
+from Game.AI.RolloutKernel import (
+    RolloutKernel
+)
+
+from Game.Deduction.DetectiveNotebook import (
+    DetectiveNotebook
+)
+
+from Game.Deduction.SolutionEstimator import (
+    SolutionEstimator
+)
+
+CHECK_CLOCK_EVERY = 8
+
+
+#statistics for "end the move in this room", plus one (visits, wins) pair per suggestion
+#(character index * number of weapons + weapon index) that can be made there
+class RoomNode:
+    __slots__ = ("visits", "wins", "pair_visits", "pair_wins")
+
+    def __init__(self, num_pairs):
+        self.visits = 0.0
+        self.wins = 0.0
+        self.pair_visits = [0.0] * num_pairs
+        self.pair_wins = [0.0] * num_pairs
+
+    def merge(self, other):
+        self.visits += other.visits
+        self.wins += other.wins
+        for i, visits in enumerate(other.pair_visits):
+            if visits:
+                self.pair_visits[i] += visits
+                self.pair_wins[i] += other.pair_wins[i]
+
+    def decay(self, factor):
+        self.visits *= factor
+        self.wins *= factor
+        self.pair_visits = [v * factor for v in self.pair_visits]
+        self.pair_wins = [w * factor for w in self.pair_wins]
+
+
+def _ucb(wins, visits, log_parent, exploration):
+    if not visits:
+        return float("inf")
+    return wins / visits + exploration * sqrt(log_parent / visits)
+
+
+def run_search(kernel, tree, deals, destinations, pairs, locations, active, me, seat_of_character,
+               time_budget, max_rollouts, exploration, rng):
+    # one determinized deal per iteration, round robin: pick a room, then a suggestion in it (UCB1 both times),
+    # play that suggestion and roll the game out; tree maps room id -> RoomNode and is updated in place
+    num_weapons = len(kernel.weapon_bits)
+    num_pairs = len(kernel.character_bits) * num_weapons
+    for room in destinations:
+        if room not in tree:
+            tree[room] = RoomNode(num_pairs)
+    nodes = [tree[room] for room in destinations]
+    random_float = rng.random
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    num = len(active)
+    next_seat = (me + 1) % num
+    rollouts = 0
+    while max_rollouts is None or rollouts < max_rollouts:
+        if deadline is not None and not rollouts % CHECK_CLOCK_EVERY and time.perf_counter() >= deadline:
+            break
+        envelope, hands, known = deals[rollouts % len(deals)]
+
+        log_parent = log(sum(node.visits for node in nodes) + 1)
+        choice = max(range(len(nodes)), key=lambda i: _ucb(nodes[i].wins, nodes[i].visits, log_parent, exploration))
+        room, node = destinations[choice], nodes[choice]
+        log_parent = log(node.visits + 1)
+        pair = max(pairs, key=lambda k: _ucb(node.pair_wins[k], node.pair_visits[k], log_parent, exploration))
+
+        known = list(known)
+        seats = list(locations)
+        seats[me] = room
+        kernel.play_suggestion(hands, known, seats, me, room, pair // num_weapons, pair % num_weapons,
+                               seat_of_character, random_float)
+        triple = kernel.accusation(known[me])
+        if triple:
+            won = triple == envelope
+        else:
+            won = kernel.rollout(envelope, hands, known, seats, list(active), next_seat, seat_of_character, rng) == me
+
+        node.visits += 1
+        node.pair_visits[pair] += 1
+        if won:
+            node.wins += 1
+            node.pair_wins[pair] += 1
+        rollouts += 1
+    return rollouts
+
+
+_worker_kernel = None
+_worker_moves = None
+
+
+def _init_worker(registry, mansion_graph):
+    global _worker_kernel, _worker_moves
+    _worker_kernel = RolloutKernel(registry, mansion_graph)
+    _worker_moves = _worker_kernel.moves
+
+
+def search_pool(registry, mansion_graph, workers):
+    # worker processes with a rollout kernel for this layout; one pool can serve many players and games
+    return ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(registry, mansion_graph))
+
+
+def _search_in_worker(task):
+    deals, destinations, pairs, locations, active, me, seat_of_character, time_budget, max_rollouts, \
+        exploration, seed, moves = task
+    # moves is only sent once the player's layout has changed; a shared pool goes back to the original otherwise
+    _worker_kernel.moves = moves if moves is not None else _worker_moves
+    tree = {}
+    rollouts = run_search(_worker_kernel, tree, deals, destinations, pairs, locations, active, me,
+                          seat_of_character, time_budget, max_rollouts, exploration, random.Random(seed))
+    return tree, rollouts
+
+
+#computer player for one seat: determinizes the hidden cards from its DetectiveNotebook's posterior
+#(and, for every opponent, which card it was probably shown), then runs UCB over "room to end the move in"
+#and "suggestion to make there" with RolloutKernel playouts. Room nodes outlive the turn; when the notebook
+#has learnt something since they were filled their counts are discounted by reuse_decay instead of dropped
+class MctsPlayer:
+    def __init__(self, name, registry, players, mansion_graph, time_budget=1.0, max_rollouts=None,
+                 determinizations=32, exploration=0.7, reuse_decay=0.5, accuse_threshold=0.5,
+                 workers=0, seed=None, pool=None):
+        if time_budget is None and max_rollouts is None:
+            raise ValueError("A search needs a time budget, a rollout cap or both.")
+        self.name = name
+        self.registry = registry
+        self.players = list(players)
+        self.me = self.players.index(name)
+        self.time_budget = time_budget
+        self.max_rollouts = max_rollouts
+        self.determinizations = determinizations
+        self.exploration = exploration
+        self.reuse_decay = reuse_decay
+        self.accuse_threshold = accuse_threshold
+        self.rng = random.Random(seed)
+        self.kernel = RolloutKernel(registry, mansion_graph)
+        self.seat_of_character = self.kernel.seat_of_character(self.players)
+        self.notebook = DetectiveNotebook(registry, self.players, me=name)
+        self.estimator = SolutionEstimator(self.notebook, rng=self.rng)
+        self.hand = 0
+        # public suggestions as (suggester seat, suggestion mask, refuter seat or -1, shown bit or 0)
+        self.history = []
+        self.tree = {}
+        self._tree_version = None
+        # win rate of the best move found by the last search, what an accusation has to beat
+        self.continue_value = 1.0
+        # set by observe_layout_change, from then on every pool task carries the kernel's move table
+        self._layout_changed = False
+        self.last_rollouts = 0
+        self.last_elapsed = 0.0
+        # a pool from search_pool is shared and stays open on close(); otherwise workers > 0 starts one of our own
+        self.workers = workers
+        self._pool = pool
+        self._owns_pool = False
+        if pool is None and workers:
+            self._pool = search_pool(registry, mansion_graph, workers)
+            self._owns_pool = True
+
+    def close(self):
+        if self._pool is not None and self._owns_pool:
+            self._pool.shutdown()
+        self._pool = None
+
+    #events
+
+    def observe_own_hand(self, hand):
+        self.hand = hand if isinstance(hand, int) else self.registry.mask(hand)
+        self.notebook.observe_own_hand(self.hand)
+
+    def observe_suggestion(self, suggester, suggestion, refuter, shown_card=None):
+        # shown_card is only passed when this player saw it: as the suggester, or as the refuter who showed it
+        self.notebook.record_suggestion(suggester, suggestion, refuter, shown_card if suggester == self.name else None)
+        self.history.append((
+            self.players.index(suggester),
+            self.registry.mask(suggestion),
+            -1 if refuter is None else self.players.index(refuter),
+            0 if shown_card is None else self.registry.bits[shown_card],
+        ))
+
+    def observe_accusation(self, accuser, accusation, correct):
+        if not correct:
+            self.notebook.record_failed_accusation(accusation)
+
+    def observe_layout_change(self, change):
+        # a DynamicMoveTable listener: rollouts move on the new layout, and old room values count for less
+        for room, rows in change.changed.items():
+            self.kernel.set_moves(room, rows)
+        if change.changed:
+            self._layout_changed = True
+            for node in self.tree.values():
+                node.decay(self.reuse_decay)
+
+    #decisions
+
+    def choose_accusation(self):
+        solved = self.notebook.solved()
+        if solved is not None:
+            return solved
+        triple, p = self.estimator.most_likely()
+        if triple is not None and p >= self.accuse_threshold and p > self.continue_value and self.estimator.reliable():
+            return triple
+        return None
+
+    def choose_move(self, reachable_rooms, player_states):
+        room_ids = self.kernel.room_ids
+        destinations = [room_ids[room] for room, _ in reachable_rooms]
+        if len(destinations) == 1:
+            return reachable_rooms[0][0]
+        if not self._search(destinations, player_states):
+            # no consistent deal could be drawn: head for a room that is still a suspect
+            unknown = self.notebook.possible_envelope_mask()
+            rooms = [room for room, _ in reachable_rooms if self.registry.bits[room] & unknown]
+            return self.rng.choice(rooms) if rooms else reachable_rooms[0][0]
+        best = max(destinations, key=lambda room: self.tree[room].visits)
+        return self.kernel.rooms[best]
+
+    def choose_suggestion(self, room, player_states):
+        room_id = self.kernel.room_ids[room]
+        pairs = self._candidate_pairs()
+        node = self.tree.get(room_id)
+        if self._tree_version != self.notebook.version or node is None or not any(node.pair_visits[k] for k in pairs):
+            self._search([room_id], player_states)
+            node = self.tree.get(room_id)
+        num_weapons = len(self.registry.weapons)
+        if node is None:
+            pair = self.rng.choice(pairs)
+        else:
+            pair = max(pairs, key=lambda k: node.pair_visits[k])
+        return self.registry.characters[pair // num_weapons], self.registry.weapons[pair % num_weapons], room
+
+    #search
+
+    def _candidate_pairs(self):
+        # cards known to sit in an opponent's hand only get refuted with; suggest open cards or bluff with our own
+        useful = self.notebook.possible_envelope_mask() | self.hand
+        bits = self.registry.bits
+        characters = [i for i, c in enumerate(self.registry.characters) if bits[c] & useful]
+        weapons = [i for i, w in enumerate(self.registry.weapons) if bits[w] & useful]
+        num_weapons = len(self.registry.weapons)
+        return [c * num_weapons + w for c in characters for w in weapons] or list(range(len(self.kernel.character_bits) * num_weapons))
+
+    def _deals(self):
+        # (envelope mask, hand masks, what every seat knows) per determinization; opponents are assumed to
+        # know their hand plus one matching card from every refutation they received
+        all_mask = self.registry.all_mask
+        my_known = all_mask & ~self.notebook.possible_envelope_mask()
+        random_float = self.rng.random
+        deals = []
+        for triple, hands in self.estimator.sample_deals(self.determinizations):
+            known = list(hands)
+            known[self.me] = my_known
+            for suggester, mask, refuter, shown in self.history:
+                if suggester == self.me or refuter < 0:
+                    continue
+                if not shown:
+                    # a uniform pick among the refuter's matching cards, one pass over the bits
+                    matching = hands[refuter] & mask
+                    seen = 0
+                    while matching:
+                        low = matching & -matching
+                        seen += 1
+                        if random_float() * seen < 1:
+                            shown = low
+                        matching ^= low
+                known[suggester] |= shown
+            deals.append((self.registry.mask(triple), hands, known))
+        return deals
+
+    def _search(self, destinations, player_states):
+        started = time.perf_counter()
+        if self._tree_version != self.notebook.version:
+            for node in self.tree.values():
+                node.decay(self.reuse_decay)
+            self._tree_version = self.notebook.version
+        deals = self._deals()
+        if not deals:
+            return False
+        room_ids = self.kernel.room_ids
+        locations = [room_ids[player_states[p]["location"]] for p in self.players]
+        active = [player_states[p]["active"] for p in self.players]
+        pairs = self._candidate_pairs()
+
+        if self._pool is None:
+            rollouts = run_search(self.kernel, self.tree, deals, destinations, pairs, locations, active, self.me,
+                                  self.seat_of_character, self.time_budget, self.max_rollouts, self.exploration,
+                                  self.rng)
+        else:
+            # root parallelism: every worker grows its own tree from its share of the deals, then the counts add up
+            per_worker = None if self.max_rollouts is None else -(-self.max_rollouts // self.workers)
+            moves = self.kernel.moves if self._layout_changed else None
+            tasks = [
+                (deals[i::self.workers] or deals, destinations, pairs, locations, active, self.me,
+                 self.seat_of_character, self.time_budget, per_worker, self.exploration, self.rng.getrandbits(64),
+                 moves)
+                for i in range(self.workers)
+            ]
+            rollouts = 0
+            for tree, count in self._pool.map(_search_in_worker, tasks):
+                rollouts += count
+                for room, node in tree.items():
+                    if room in self.tree:
+                        self.tree[room].merge(node)
+                    else:
+                        self.tree[room] = node
+
+        nodes = [self.tree[room] for room in destinations]
+        best = max(nodes, key=lambda node: node.visits)
+        self.continue_value = best.wins / best.visits if best.visits else 1.0
+        self.last_rollouts = rollouts
+        self.last_elapsed = time.perf_counter() - started
+        return True
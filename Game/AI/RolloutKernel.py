@@ -0,0 +1,134 @@
+from Game.AlgorithmForSelectingPossibleMoves.MoveTable import (
+    DIE_FACES,
+    build_move_table
+)
+
+
+def _bits_of(mask):
+    bits = []
+    while mask:
+        low = mask & -mask
+        bits.append(low)
+        mask ^= low
+    return bits
+
+
+#plays the rest of a game from a fully known (determinized) position with rooms as ints and
+#hands / knowledge as CardRegistry bitmasks: no printing, no dicts, no name lookups per turn.
+#Every seat plays the same light policy: move to a room whose card it has not seen if it can,
+#suggest unseen cards, and accuse once a single unseen card is left in every category
+class RolloutKernel:
+    def __init__(self, registry, mansion_graph, max_turns=300):
+        self.registry = registry
+        self.max_turns = max_turns
+        self.rooms = list(registry.rooms)
+        self.room_ids = {room: i for i, room in enumerate(self.rooms)}
+        self.room_bits = [registry.bits[room] for room in self.rooms]
+        self.character_bits = [registry.bits[card] for card in registry.characters]
+        self.weapon_bits = [registry.bits[card] for card in registry.weapons]
+        self.categories = (registry.character_mask, registry.weapon_mask, registry.room_mask)
+        self.all_mask = registry.all_mask
+        room_ids = self.room_ids
+        table = build_move_table(mansion_graph)
+        # moves[room][roll] -> destination room ids
+        self.moves = [
+            [tuple(room_ids[r] for r, _ in row if r in room_ids) for row in table.get(room, [()] * (DIE_FACES + 1))]
+            for room in self.rooms
+        ]
+
+    def set_moves(self, room, rows):
+        # new move options of one start room, as a DynamicMoveTable LayoutChange reports them
+        if room in self.room_ids:
+            room_ids = self.room_ids
+            self.moves[room_ids[room]] = [tuple(room_ids[r] for r, _ in row if r in room_ids) for row in rows]
+
+    def seat_of_character(self, players):
+        # character index -> seat index, or -1 for characters nobody plays
+        seats = {player: seat for seat, player in enumerate(players)}
+        return [seats.get(card, -1) for card in self.registry.characters]
+
+    def accusation(self, known):
+        unknown = self.all_mask & ~known
+        triple = 0
+        for category in self.categories:
+            remaining = category & unknown
+            if not remaining or remaining & (remaining - 1):
+                return 0
+            triple |= remaining
+        return triple
+
+    def refute(self, hands, seat, suggestion, random_float):
+        # same order as process_suggestion: the first seat after the suggester holding any of the three
+        num = len(hands)
+        for offset in range(1, num):
+            responder = (seat + offset) % num
+            matching = hands[responder] & suggestion
+            if matching:
+                if matching & (matching - 1):
+                    bits = _bits_of(matching)
+                    return responder, bits[int(random_float() * len(bits))]
+                return responder, matching
+        return -1, 0
+
+    def play_suggestion(self, hands, known, locations, seat, room, character, weapon,
+                        seat_of_character, random_float):
+        # one suggestion with all its side effects on the rollout state; character / weapon are indexes
+        suspect_seat = seat_of_character[character]
+        if suspect_seat >= 0:
+            locations[suspect_seat] = room
+        suggestion = self.character_bits[character] | self.weapon_bits[weapon] | self.room_bits[room]
+        responder, shown = self.refute(hands, seat, suggestion, random_float)
+        known[seat] |= shown
+        return responder
+
+    def rollout(self, envelope, hands, known, locations, active, seat, seat_of_character, rng):
+        # known / locations / active are modified in place: pass copies. Returns the winning seat or -1
+        random_float = rng.random
+        moves = self.moves
+        room_bits = self.room_bits
+        character_bits = self.character_bits
+        weapon_bits = self.weapon_bits
+        all_mask = self.all_mask
+        accusation = self.accusation
+        num = len(hands)
+        remaining_players = sum(active)
+
+        for _ in range(self.max_turns):
+            if not remaining_players:
+                return -1
+            if not active[seat]:
+                seat = (seat + 1) % num
+                continue
+
+            triple = accusation(known[seat])
+            if triple:
+                if triple == envelope:
+                    return seat
+                active[seat] = False
+                remaining_players -= 1
+                seat = (seat + 1) % num
+                continue
+
+            unknown = all_mask & ~known[seat]
+            destinations = moves[locations[seat]][1 + int(random_float() * DIE_FACES)]
+            if destinations:
+                unseen = [room for room in destinations if room_bits[room] & unknown]
+                choices = unseen or destinations
+                locations[seat] = choices[int(random_float() * len(choices))]
+            room = locations[seat]
+
+            characters = [i for i, bit in enumerate(character_bits) if bit & unknown] or range(len(character_bits))
+            weapons = [i for i, bit in enumerate(weapon_bits) if bit & unknown] or range(len(weapon_bits))
+            self.play_suggestion(hands, known, locations, seat, room,
+                                 characters[int(random_float() * len(characters))],
+                                 weapons[int(random_float() * len(weapons))],
+                                 seat_of_character, random_float)
+
+            triple = accusation(known[seat])
+            if triple:
+                if triple == envelope:
+                    return seat
+                active[seat] = False
+                remaining_players -= 1
+            seat = (seat + 1) % num
+        return -1
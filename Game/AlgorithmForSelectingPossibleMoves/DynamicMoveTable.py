@@ -0,0 +1,139 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from Game.AlgorithmForSelectingPossibleMoves.LimitedUniformCostSearch import (
+    limited_uniform_cost_search,
+    reachable_with_roll
+)
+
+from Game.AlgorithmForSelectingPossibleMoves.MoveTable import (
+    DIE_FACES,
+    MoveTable,
+    VersionedGraph
+)
+
+
+@dataclass
+class LayoutChange:
+    version: int
+    operation: str
+    rooms: Tuple[str, str]
+    cost: Optional[int]
+    # start room -> its new rows (index = roll), only for the rooms whose move options changed
+    changed: Dict[str, List[Tuple[Tuple[str, int], ...]]] = field(default_factory=dict)
+    recomputed: int = 0
+
+
+#move table for layouts that change during play. A path that uses the edited hallway first has to reach one of
+#its two rooms without it, so a start can only see a different result if it already reached one of them with
+#room to spare for the hallway's cheaper cost (old or new) within the max roll: only those starts are searched
+#again. Listeners get a LayoutChange after every edit; editing the graph behind the table's back still works,
+#it just costs a full rebuild on the next lookup
+class DynamicMoveTable(MoveTable):
+    def __init__(self, graph, max_roll=DIE_FACES):
+        self._listeners = []
+        # edits go to the table's own copy unless the caller hands over a VersionedGraph
+        super().__init__(graph if isinstance(graph, VersionedGraph) else VersionedGraph(graph), max_roll)
+
+    def rebuild(self):
+        super().rebuild()
+        # room -> {start: cost} for every start whose max-roll result contains it
+        self._holders = {room: {} for room in self.graph}
+        for start, rows in self._table.items():
+            for room, cost in rows[self.max_roll]:
+                self._holders[room][start] = cost
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+        return listener
+
+    def unsubscribe(self, listener):
+        self._listeners.remove(listener)
+
+    #edits
+
+    def add_edge(self, a, b, cost):
+        if b in self.graph.get(a, ()):
+            raise ValueError(f"{a} and {b} are already connected.")
+        return self._apply("add", a, b, cost)
+
+    def remove_edge(self, a, b):
+        if b not in self.graph.get(a, ()):
+            raise KeyError(f"{a} and {b} are not connected.")
+        return self._apply("remove", a, b, None)
+
+    def set_cost(self, a, b, cost):
+        # cost 0 turns the hallway into a secret passage
+        if b not in self.graph.get(a, ()):
+            raise KeyError(f"{a} and {b} are not connected.")
+        return self._apply("reweight", a, b, cost)
+
+    def _apply(self, operation, a, b, cost):
+        if a == b:
+            raise ValueError("A hallway needs two different rooms.")
+        if cost is not None and cost < 0:
+            raise ValueError("Hallway costs cannot be negative.")
+        if self.is_stale():
+            self.rebuild()
+
+        # decided on the results from before the edit, see the class comment
+        graph = self.graph
+        old_cost = graph[a][b] if operation != "add" else None
+        step = min(c for c in (old_cost, cost) if c is not None)
+        spare = self.max_roll - step
+        affected = set()
+        if spare >= 0:
+            affected.update((a, b))
+            for room in (a, b):
+                affected.update(start for start, reached in self._holders.get(room, {}).items() if reached <= spare)
+        for room in (a, b):
+            if room not in graph:
+                graph[room] = {}
+                self._holders[room] = {}
+                self._table[room] = [()] * (self.max_roll + 1)
+        if operation == "remove":
+            del graph[a][b]
+            del graph[b][a]
+        else:
+            graph[a][b] = cost
+            graph[b][a] = cost
+
+        change = LayoutChange(graph.version, operation, (a, b), cost, recomputed=len(affected))
+        max_roll = self.max_roll
+        for start in affected:
+            reachable = limited_uniform_cost_search(graph, start, max_roll)
+            rows = [()] + [tuple(reachable_with_roll(reachable, roll)) for roll in range(1, max_roll + 1)]
+            old = self._table.get(start)
+            if rows == old:
+                continue
+            for room, _ in old[max_roll]:
+                del self._holders[room][start]
+            for room, reached in rows[max_roll]:
+                self._holders[room][start] = reached
+            self._table[start] = rows
+            change.changed[start] = rows
+        self.version = graph.version
+
+        for listener in list(self._listeners):
+            listener(change)
+        return change
+
+
+if __name__ == "__main__":
+    import os
+    from Game.GameSetup.GenerateMansionLayout import load_graph_from_json
+
+    layout_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mansion_layout.json")
+    table = DynamicMoveTable(load_graph_from_json(layout_file))
+    table.subscribe(lambda change: print(f"{change.operation} {change.rooms}: searched {change.recomputed} start rooms, "
+                                         f"move options changed for {sorted(change.changed)}"))
+    print("Hall, roll 3:", table.reachable("Hall", 3))
+    if "Study" in table.graph["Hall"]:
+        table.set_cost("Hall", "Study", 1)
+    else:
+        table.add_edge("Hall", "Study", 1)
+    print("Hall, roll 3 after a Hall-Study hallway of cost 1:", table.reachable("Hall", 3))
+    table.set_cost("Hall", "Study", 0)
+    print("Hall, roll 3 once it is a secret passage:", table.reachable("Hall", 3))
+    table.remove_edge("Hall", "Study")
+    print("Hall, roll 3 after closing it:", table.reachable("Hall", 3))
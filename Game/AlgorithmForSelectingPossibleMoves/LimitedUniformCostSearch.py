@@ -1,7 +1,10 @@
 import json
-from typing import Dict, List, Tuple
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Tuple
 import heapq
 
+from Game.GameSetup.MansionGraph import MansionGraph
+
 #lucs for finding what rooms can go
 def limited_uniform_cost_search(
         graph: Dict[str, Dict[str, int]],
@@ -9,6 +12,13 @@ def limited_uniform_cost_search(
         max_cost: int
 ) -> List[Tuple[str, int]]:
 
+    if isinstance(graph, MansionGraph):
+        start_id = graph.room_ids.get(start)
+        if start_id is None:
+            return []
+        names = graph.names
+        return [(names[room_id], cost) for room_id, cost in limited_uniform_cost_search_ids(graph, start_id, max_cost)]
+
     frontier = []
     heapq.heappush(frontier, (0, start, False))
 
@@ -46,6 +56,224 @@ def limited_uniform_cost_search(
     return sorted(results.items(), key=lambda x: x[1])
 
 
+#same search directly on the CSR arrays; states are packed as room_id * 2 + used_secret, and
+#room ids follow name order, so heap ties break exactly as in the dict search
+def limited_uniform_cost_search_ids(
+        graph: MansionGraph,
+        start_id: int,
+        max_cost: int
+) -> List[Tuple[int, int]]:
+
+    offsets = graph.offsets
+    targets = graph.targets
+    costs = graph.costs
+
+    frontier = [(0, start_id * 2)]
+    reached = {start_id * 2: 0}
+    results = {}
+    limit = max_cost + 1
+
+    while frontier:
+        current_cost, state = heapq.heappop(frontier)
+        node = state >> 1
+        used_secret = state & 1
+
+        if node not in results:
+            results[node] = current_cost
+
+        lo = offsets[node]
+        hi = offsets[node + 1]
+        for target, step_cost in zip(targets[lo:hi], costs[lo:hi]):
+            if step_cost == 0:
+                if used_secret:
+                    continue
+                next_state = target * 2 + 1
+            else:
+                next_state = target * 2
+
+            path_cost = current_cost + step_cost
+            if path_cost < reached.get(next_state, limit):
+                reached[next_state] = path_cost
+                heapq.heappush(frontier, (path_cost, next_state))
+
+    del results[start_id]
+
+    return sorted(results.items(), key=lambda x: x[1])
+
+
+#what a route search keeps: one predecessor per (node, used_secret) state, walked back only for the rooms asked for
+class SearchRoutes:
+    def __init__(self, start, reachable, predecessors, arrivals, names=None, room_ids=None):
+        self.start = start
+        self.reachable = reachable
+        self._predecessors = predecessors
+        self._arrivals = arrivals
+        self._names = names
+        self._room_ids = room_ids
+
+    def _decode(self, state):
+        if self._names is None:
+            return state
+        return self._names[state >> 1], bool(state & 1)
+
+    def _states_to(self, room):
+        key = room if self._room_ids is None else self._room_ids.get(room)
+        state = self._arrivals.get(key)
+        if state is None:
+            return None
+        states = []
+        while state is not None:
+            states.append(state)
+            state = self._predecessors.get(state)
+        states.reverse()
+        return [self._decode(state) for state in states]
+
+    def route(self, room):
+        # rooms from the start to room, both included; None when room is out of reach
+        states = self._states_to(room)
+        if states is None:
+            return None
+        return [node for node, used_secret in states]
+
+    def route_steps(self, room):
+        # (from, to, secret_passage) for every move along the route
+        states = self._states_to(room)
+        if states is None:
+            return None
+        return [(prev[0], node, used_secret) for prev, (node, used_secret) in zip(states, states[1:])]
+
+
+#lucs that also records the predecessor of every state it improves
+def limited_uniform_cost_search_with_routes(
+        graph: Dict[str, Dict[str, int]],
+        start: str,
+        max_cost: int
+) -> SearchRoutes:
+
+    if isinstance(graph, MansionGraph):
+        return _limited_uniform_cost_search_routes_ids(graph, start, max_cost)
+
+    frontier = [(0, start, False)]
+    reached = {(start, False): 0}
+    predecessors = {}
+    arrivals = {}
+    results = {}
+
+    while frontier:
+        current_cost, current_node, used_secret = heapq.heappop(frontier)
+        state = (current_node, used_secret)
+
+        if current_node not in results:
+            results[current_node] = current_cost
+            arrivals[current_node] = state
+
+        for neighbor, step_cost in graph.get(current_node, {}).items():
+            if step_cost == 0:
+                if used_secret:
+                    continue
+                next_used_secret = True
+            else:
+                next_used_secret = False
+
+            path_cost = current_cost + step_cost
+            if path_cost > max_cost:
+                continue
+
+            next_state = (neighbor, next_used_secret)
+            if next_state not in reached or path_cost < reached[next_state]:
+                reached[next_state] = path_cost
+                predecessors[next_state] = state
+                heapq.heappush(frontier, (path_cost, neighbor, next_used_secret))
+
+    del results[start]
+
+    return SearchRoutes(start, sorted(results.items(), key=lambda x: x[1]), predecessors, arrivals)
+
+
+def _limited_uniform_cost_search_routes_ids(graph, start, max_cost):
+    names = graph.names
+    start_id = graph.room_ids.get(start)
+    if start_id is None:
+        return SearchRoutes(start, [], {}, {}, names, graph.room_ids)
+
+    offsets = graph.offsets
+    targets = graph.targets
+    costs = graph.costs
+
+    frontier = [(0, start_id * 2)]
+    reached = {start_id * 2: 0}
+    predecessors = {}
+    arrivals = {}
+    limit = max_cost + 1
+
+    while frontier:
+        current_cost, state = heapq.heappop(frontier)
+        node = state >> 1
+        used_secret = state & 1
+
+        if node not in arrivals:
+            arrivals[node] = state
+
+        lo = offsets[node]
+        hi = offsets[node + 1]
+        for target, step_cost in zip(targets[lo:hi], costs[lo:hi]):
+            if step_cost == 0:
+                if used_secret:
+                    continue
+                next_state = target * 2 + 1
+            else:
+                next_state = target * 2
+
+            path_cost = current_cost + step_cost
+            if path_cost < reached.get(next_state, limit):
+                reached[next_state] = path_cost
+                predecessors[next_state] = state
+                heapq.heappush(frontier, (path_cost, next_state))
+
+    reachable = sorted(
+        ((names[node], reached[state]) for node, state in arrivals.items() if node != start_id),
+        key=lambda x: x[1]
+    )
+    return SearchRoutes(start, reachable, predecessors, arrivals, names, graph.room_ids)
+
+
+#one bounded search per distinct start room; rooms shared by several players are searched once
+def multi_source_limited_search(
+        graph: Dict[str, Dict[str, int]],
+        starts: Iterable[str],
+        budget: int
+) -> Dict[str, List[Tuple[str, int]]]:
+
+    reachable = {}
+    for start in starts:
+        if start not in reachable:
+            reachable[start] = limited_uniform_cost_search(graph, start, budget)
+    return reachable
+
+
+#lucs results are sorted by cost, so the rooms for a smaller roll are a prefix of the budget's result
+def reachable_with_roll(
+        reachable: List[Tuple[str, int]],
+        roll: int
+) -> List[Tuple[str, int]]:
+
+    return reachable[:bisect_right(reachable, roll, key=lambda x: x[1])]
+
+
+def reachable_for_players(
+        graph: Dict[str, Dict[str, int]],
+        player_states: Dict[str, dict],
+        budget: int = 6
+) -> Dict[str, Dict[int, List[Tuple[str, int]]]]:
+
+    by_room = multi_source_limited_search(
+        graph, (state["location"] for state in player_states.values()), budget
+    )
+    return {
+        player: {roll: reachable_with_roll(by_room[state["location"]], roll) for roll in range(1, budget + 1)}
+        for player, state in player_states.items()
+    }
+
 
 if __name__ == "__main__":
     graph_json = """
@@ -120,3 +348,14 @@ if __name__ == "__main__":
     print(f"Rooms reachable from '{start_room}' with cost ≤ {max_steps}:")
     for room, cost in reachable:
         print(f"  {room} at cost {cost}")
+
+    routes = limited_uniform_cost_search_with_routes(graph, start_room, max_steps)
+    for room, cost in routes.reachable:
+        steps = " -> ".join(f"{dest} (secret passage)" if secret else dest for _, dest, secret in routes.route_steps(room))
+        print(f"  {start_room} -> {steps}")
+
+    players = {"Miss Scarlett": {"location": "Hall"}, "Mr. Green": {"location": "Study"}}
+    for player, by_roll in reachable_for_players(graph, players).items():
+        print(f"{player} next turn:")
+        for roll, rooms in by_roll.items():
+            print(f"  roll {roll}: {', '.join(room for room, cost in rooms) or 'stay'}")
@@ -0,0 +1,148 @@
+from typing import Dict, List, Tuple
+
+from Game.AlgorithmForSelectingPossibleMoves.LimitedUniformCostSearch import (
+    limited_uniform_cost_search,
+    multi_source_limited_search,
+    reachable_with_roll
+)
+
+DIE_FACES = 6
+
+
+#every dict mutator bumps the owner's version; anything that slipped past would leave move tables stale
+class VersionedNeighbors(dict):
+    def __init__(self, owner, *args):
+        super().__init__(*args)
+        self._owner = owner
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._owner.version += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._owner.version += 1
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def pop(self, *args):
+        self._owner.version += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        item = super().popitem()
+        self._owner.version += 1
+        return item
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._owner.version += 1
+
+    def clear(self):
+        super().clear()
+        self._owner.version += 1
+
+
+#dict graph that counts its own edits, so move tables can tell they are stale in O(1); every way of
+#storing a room goes through __setitem__, so its neighbors are always tracked as well
+class VersionedGraph(dict):
+    def __init__(self, graph=()):
+        self.version = 0
+        super().__init__()
+        for room, neighbors in dict(graph).items():
+            super().__setitem__(room, VersionedNeighbors(self, neighbors))
+
+    def __setitem__(self, room, neighbors):
+        super().__setitem__(room, VersionedNeighbors(self, neighbors))
+        self.version += 1
+
+    def __delitem__(self, room):
+        super().__delitem__(room)
+        self.version += 1
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        item = super().popitem()
+        self.version += 1
+        return item
+
+    def setdefault(self, room, neighbors=None):
+        if room not in self:
+            self[room] = neighbors if neighbors is not None else {}
+        return self[room]
+
+    def update(self, *args, **kwargs):
+        for room, neighbors in dict(*args, **kwargs).items():
+            self[room] = neighbors
+
+    def clear(self):
+        super().clear()
+        self.version += 1
+
+
+def build_move_table(
+        graph: Dict[str, Dict[str, int]],
+        max_roll: int = DIE_FACES
+) -> Dict[str, List[Tuple[Tuple[str, int], ...]]]:
+    # LUCS output is ordered by (cost, room), so the answer for a smaller roll is a prefix
+    # of the answer for max_roll: one search per start room covers every roll
+    return {
+        start: [()] + [tuple(reachable_with_roll(reachable, roll)) for roll in range(1, max_roll + 1)]
+        for start, reachable in multi_source_limited_search(graph, graph, max_roll).items()
+    }
+
+
+#a plain dict cannot report its edits, so the table keeps its own VersionedGraph copy of it: edit table.graph,
+#not the dict that was passed in. Graphs that already carry a version (VersionedGraph, MansionGraph) are used as is
+class MoveTable:
+    def __init__(self, graph, max_roll=DIE_FACES):
+        self.graph = VersionedGraph(graph) if getattr(graph, "version", None) is None else graph
+        self.max_roll = max_roll
+        self.rebuild()
+
+    def rebuild(self):
+        self.version = self.graph.version
+        self._table = build_move_table(self.graph, self.max_roll)
+
+    def is_stale(self):
+        return self.graph.version != self.version
+
+    def reachable(self, start, roll):
+        if self.graph.version != self.version:
+            self.rebuild()
+        if roll < 1:
+            # no roll moves a player backwards, or nowhere
+            return []
+        if roll > self.max_roll:
+            return limited_uniform_cost_search(self.graph, start, roll)
+        rows = self._table.get(start)
+        if rows is None:
+            return []
+        return list(rows[roll])
+
+
+if __name__ == "__main__":
+    import os
+    from Game.GameSetup.GenerateMansionLayout import load_graph_from_json
+
+    layout_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mansion_layout.json")
+    table = MoveTable(load_graph_from_json(layout_file))
+    graph = table.graph
+    print("Hall, roll 3:", table.reachable("Hall", 3))
+    graph["Hall"]["Study"] = 1
+    graph["Study"]["Hall"] = 1
+    print("Hall, roll 3 after adding a Hall-Study hallway:", table.reachable("Hall", 3))
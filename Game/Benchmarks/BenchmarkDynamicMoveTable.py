@@ -0,0 +1,125 @@
+import argparse
+import os
+import random
+import time
+
+from Game.AlgorithmForSelectingPossibleMoves.DynamicMoveTable import (
+    DynamicMoveTable
+)
+
+from Game.AlgorithmForSelectingPossibleMoves.MoveTable import (
+    build_move_table
+)
+
+from Game.GameSetup.GenerateMansionLayout import (
+    load_graph_from_json
+)
+
+from Game.Benchmarks.SyntheticGraphs import (
+    generate_synthetic_graph
+)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def churn_operations(graph, count, seed=0, max_cost=10, secret_chance=0.2):
+    # hallways open, close and change cost in equal shares; a new hallway joins a room to one of its
+    # neighbours' neighbours when there is one, so the layout stays about as local as the generator's
+    rng = random.Random(seed)
+    graph = {room: dict(neighbors) for room, neighbors in graph.items()}
+    rooms = list(graph)
+    operations = []
+    while len(operations) < count:
+        kind = rng.choice(("add", "remove", "reweight"))
+        a = rng.choice(rooms)
+        cost = 0 if rng.random() < secret_chance else rng.randint(1, max_cost)
+        if kind == "add":
+            candidates = [c for b in graph[a] for c in graph[b] if c != a and c not in graph[a]]
+            if not candidates:
+                # dense corner or isolated room: any room it is not connected to yet
+                candidates = [c for c in rooms if c != a and c not in graph[a]]
+                if not candidates:
+                    continue
+            b = rng.choice(candidates)
+            graph[a][b] = graph[b][a] = cost
+        else:
+            if not graph[a]:
+                continue
+            b = rng.choice(list(graph[a]))
+            if kind == "remove":
+                del graph[a][b]
+                del graph[b][a]
+                cost = None
+            else:
+                graph[a][b] = graph[b][a] = cost
+        operations.append((kind, a, b, cost))
+    return operations
+
+
+def apply_operation(table, operation):
+    kind, a, b, cost = operation
+    if kind == "add":
+        return table.add_edge(a, b, cost)
+    if kind == "remove":
+        return table.remove_edge(a, b)
+    return table.set_cost(a, b, cost)
+
+
+def benchmark_graph(name, graph, num_operations, full_operations, seed=0):
+    operations = churn_operations(graph, num_operations, seed)
+    table = DynamicMoveTable(graph)
+
+    recomputed = 0
+    changed = 0
+    started = time.perf_counter()
+    for operation in operations:
+        change = apply_operation(table, operation)
+        recomputed += change.recomputed
+        changed += len(change.changed)
+    incremental_time = time.perf_counter() - started
+
+    # full recomputation after each edit, on a sample of the same workload
+    plain = {room: dict(neighbors) for room, neighbors in graph.items()}
+    sample = operations[:full_operations]
+    started = time.perf_counter()
+    for kind, a, b, cost in sample:
+        if kind == "remove":
+            del plain[a][b]
+            del plain[b][a]
+        else:
+            plain[a][b] = plain[b][a] = cost
+        build_move_table(plain)
+    full_time = time.perf_counter() - started
+
+    expected = build_move_table(table.graph)
+    matches = all(table.reachable(room, roll) == list(rows[roll])
+                  for room, rows in expected.items() for roll in range(1, table.max_roll + 1))
+
+    per_incremental = incremental_time / len(operations)
+    per_full = full_time / max(len(sample), 1)
+    print(f"{name}: {len(graph)} rooms, {len(operations)} edits")
+    print(f"  incremental update : {per_incremental * 1e3:10.3f} ms/edit, "
+          f"{recomputed / len(operations):.1f} starts searched, {changed / len(operations):.1f} changed")
+    print(f"  full recomputation : {per_full * 1e3:10.3f} ms/edit ({len(sample)} edits timed)")
+    print(f"  speedup            : {per_full / per_incremental:10.1f}x")
+    print(f"  final table matches a full rebuild: {matches}")
+    return matches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare incremental move-table updates with full recomputation "
+                                                 "under random hallway edits.")
+    parser.add_argument("--edits", type=int, default=1000, help="Random edits applied to each graph.")
+    parser.add_argument("--full-edits", type=int, default=20,
+                        help="How many of those edits are also timed with a full rebuild.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1000, 10000], help="Synthetic graph sizes.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the edit workload.")
+    args = parser.parse_args()
+
+    ok = benchmark_graph("shipped layout", load_graph_from_json(os.path.join(BASE_DIR, "mansion_layout.json")),
+                         args.edits, args.edits, args.seed)
+    for size in args.sizes:
+        ok &= benchmark_graph("synthetic", generate_synthetic_graph(size, seed=size), args.edits, args.full_edits,
+                              args.seed)
+    if not ok:
+        raise SystemExit(1)
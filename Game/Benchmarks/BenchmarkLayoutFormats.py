@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from Game.GameSetup.GenerateMansionLayout import (
+    generate_scalable_mansion_graph,
+    load_graph_from_json,
+    save_graph_to_json
+)
+
+from Game.GameSetup.MansionLayoutBinary import (
+    MappedMansionLayout,
+    load_graph_from_binary,
+    save_graph_to_binary
+)
+
+from Game.Benchmarks.SyntheticGraphs import (
+    synthetic_room_names
+)
+
+LOADERS = ("json", "binary", "mmap")
+
+
+def load_layout(kind, path, queries):
+    rooms = None
+    if kind == "json":
+        graph = load_graph_from_json(path)
+        rooms = list(graph)
+        lookup = lambda room: list(graph[room].items())
+    elif kind == "binary":
+        graph = load_graph_from_binary(path)
+        rooms = graph.names
+        lookup = lambda room: list(graph[room].items())
+    else:
+        graph = MappedMansionLayout(path)
+        lookup = graph.neighbors
+    loaded = time.perf_counter()
+
+    rng = random.Random(0)
+    num_rooms = len(rooms) if rooms is not None else len(graph)
+    for _ in range(queries):
+        room_id = rng.randrange(num_rooms)
+        lookup(rooms[room_id] if rooms is not None else graph.room_name(room_id))
+    return loaded, time.perf_counter()
+
+
+def current_rss_kib():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_child(kind, path, queries):
+    # one fresh interpreter per measurement, so the RSS growth belongs to this loader alone
+    baseline = current_rss_kib()
+    started = time.perf_counter()
+    loaded, finished = load_layout(kind, path, queries)
+    print(json.dumps({"load": loaded - started, "queries": finished - loaded,
+                      "rss_kib": current_rss_kib() - baseline}))
+
+
+def measure(kind, path, queries):
+    output = subprocess.run(
+        [sys.executable, "-m", "Game.Benchmarks.BenchmarkLayoutFormats", "--child", kind, path, str(queries)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load time and RSS of JSON vs binary mansion layouts.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1000, 100000, 1000000], help="Room counts.")
+    parser.add_argument("--queries", type=int, default=1000, help="Neighbour lookups after loading.")
+    parser.add_argument("--child", nargs=3, metavar=("KIND", "PATH", "QUERIES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], int(args.child[2]))
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            graph = generate_scalable_mansion_graph(synthetic_room_names(size), seed=size)
+            json_path = os.path.join(tmp, f"layout_{size}.json")
+            binary_path = os.path.join(tmp, f"layout_{size}.bin")
+            save_graph_to_json(graph, json_path)
+            save_graph_to_binary(graph, binary_path)
+            del graph
+            print(f"{size} rooms: json {os.path.getsize(json_path) / 2**20:.1f} MiB, "
+                  f"binary {os.path.getsize(binary_path) / 2**20:.1f} MiB")
+            for kind in LOADERS:
+                result = measure(kind, json_path if kind == "json" else binary_path, args.queries)
+                print(f"  {kind:6}: load {result['load'] * 1e3:9.2f} ms, {args.queries} lookups "
+                      f"{result['queries'] * 1e3:8.2f} ms, RSS +{result['rss_kib'] / 1024:8.1f} MiB")
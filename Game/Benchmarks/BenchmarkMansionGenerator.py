@@ -0,0 +1,41 @@
+import argparse
+import os
+import tempfile
+import time
+
+from Game.GameSetup.GenerateMansionLayout import (
+    generate_random_weighted_graph_with_secrets,
+    save_edges_to_file,
+    stream_random_weighted_edges
+)
+
+from Game.Benchmarks.SyntheticGraphs import (
+    synthetic_room_names
+)
+
+
+def timed(action):
+    started = time.perf_counter()
+    action()
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generation time of the compatible and scalable mansion generators.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1000, 10000, 100000, 1000000], help="Room counts.")
+    parser.add_argument("--compatible-limit", type=int, default=10000,
+                        help="Largest size the quadratic compatible mode is run for.")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        rooms = synthetic_room_names(size)
+        print(f"{size} rooms")
+        if size <= args.compatible_limit:
+            elapsed = timed(lambda: generate_random_weighted_graph_with_secrets(rooms, seed=size))
+            print(f"  compatible dict   : {elapsed:8.2f} s")
+        elapsed = timed(lambda: generate_random_weighted_graph_with_secrets(rooms, seed=size, mode="scalable"))
+        print(f"  scalable CSR      : {elapsed:8.2f} s ({elapsed / size * 1e6:.2f} us/room)")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "edges.tsv")
+            elapsed = timed(lambda: save_edges_to_file(stream_random_weighted_edges(size, seed=size), path))
+        print(f"  scalable to disk  : {elapsed:8.2f} s ({elapsed / size * 1e6:.2f} us/room)")
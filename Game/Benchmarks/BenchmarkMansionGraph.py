@@ -0,0 +1,87 @@
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from Game.AlgorithmForSelectingPossibleMoves.LimitedUniformCostSearch import (
+    limited_uniform_cost_search,
+    limited_uniform_cost_search_ids
+)
+
+from Game.GameSetup.MansionGraph import (
+    MansionGraph
+)
+
+from Game.Benchmarks.SyntheticGraphs import (
+    generate_synthetic_graph,
+    synthetic_edges,
+    synthetic_room_names
+)
+
+
+def measure_build(build):
+    # timed without tracing (tracemalloc slows allocation-heavy code several times over),
+    # then built again under tracemalloc for the memory numbers
+    gc.collect()
+    started = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    tracemalloc.start()
+    graph = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return graph, current, peak, elapsed
+
+
+def random_queries(rooms, queries, seed=0):
+    rng = random.Random(seed)
+    return [(rng.choice(rooms), rng.randint(1, 6)) for _ in range(queries)]
+
+
+def measure_traversal(graph, rooms, queries):
+    starts = random_queries(rooms, queries)
+    started = time.perf_counter()
+    for start, roll in starts:
+        limited_uniform_cost_search(graph, start, roll)
+    return (time.perf_counter() - started) / queries
+
+
+def measure_id_traversal(graph, rooms, queries):
+    starts = [(graph.room_ids[start], roll) for start, roll in random_queries(rooms, queries)]
+    started = time.perf_counter()
+    for start_id, roll in starts:
+        limited_uniform_cost_search_ids(graph, start_id, roll)
+    return (time.perf_counter() - started) / queries
+
+
+def benchmark_size(num_rooms, queries):
+    rooms = synthetic_room_names(num_rooms)
+    print(f"{num_rooms} rooms")
+
+    graph, current, peak, elapsed = measure_build(lambda: generate_synthetic_graph(num_rooms, seed=num_rooms))
+    per_query = measure_traversal(graph, rooms, queries)
+    print(f"  dict graph : {current / 2**20:9.1f} MiB retained, {peak / 2**20:9.1f} MiB peak, "
+          f"built in {elapsed:6.2f} s, LUCS {per_query * 1e6:8.1f} us/query")
+    del graph
+
+    # built straight from the edge stream, no dict-of-dicts in between; room names are counted in both
+    graph, current, peak, elapsed = measure_build(
+        lambda: MansionGraph.from_edges(rooms, synthetic_edges(num_rooms, seed=num_rooms))
+    )
+    per_query = measure_traversal(graph, rooms, queries)
+    per_id_query = measure_id_traversal(graph, rooms, queries)
+    print(f"  CSR graph  : {current / 2**20:9.1f} MiB retained, {peak / 2**20:9.1f} MiB peak, "
+          f"built in {elapsed:6.2f} s, LUCS {per_query * 1e6:8.1f} us/query, "
+          f"id LUCS {per_id_query * 1e6:8.1f} us/query ({graph.nbytes() / 2**20:.1f} MiB in adjacency arrays)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory and traversal cost of dict graphs vs MansionGraph.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1000, 100000, 1000000], help="Room counts.")
+    parser.add_argument("--queries", type=int, default=20000, help="Random LUCS queries per graph.")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        benchmark_size(size, args.queries)
@@ -0,0 +1,59 @@
+import argparse
+import os
+import random
+import time
+
+from Game.AlgorithmForSelectingPossibleMoves.LimitedUniformCostSearch import (
+    limited_uniform_cost_search
+)
+
+from Game.AlgorithmForSelectingPossibleMoves.MoveTable import (
+    MoveTable
+)
+
+from Game.GameSetup.GenerateMansionLayout import (
+    load_graph_from_json
+)
+
+from Game.Benchmarks.SyntheticGraphs import (
+    generate_synthetic_graph
+)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def benchmark_graph(name, graph, lookups, seed=0):
+    rng = random.Random(seed)
+    rooms = list(graph)
+    queries = [(rng.choice(rooms), rng.randint(1, 6)) for _ in range(lookups)]
+
+    started = time.perf_counter()
+    for start, roll in queries:
+        limited_uniform_cost_search(graph, start, roll)
+    lucs_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    table = MoveTable(graph)
+    build_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for start, roll in queries:
+        table.reachable(start, roll)
+    table_time = time.perf_counter() - started
+
+    print(f"{name}: {len(rooms)} rooms, {lookups} lookups")
+    print(f"  per-turn LUCS   : {lucs_time / lookups * 1e6:8.2f} us/lookup")
+    print(f"  table build     : {build_time * 1e3:8.2f} ms")
+    print(f"  table lookup    : {table_time / lookups * 1e6:8.2f} us/lookup")
+    print(f"  break-even after: {build_time / max(lucs_time / lookups - table_time / lookups, 1e-12):8.0f} lookups")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-turn LUCS with precomputed move-table lookups.")
+    parser.add_argument("--lookups", type=int, default=100000, help="Random (room, roll) queries per graph.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10000, 50000], help="Synthetic graph sizes.")
+    args = parser.parse_args()
+
+    benchmark_graph("shipped layout", load_graph_from_json(os.path.join(BASE_DIR, "mansion_layout.json")), args.lookups)
+    for size in args.sizes:
+        benchmark_graph("synthetic", generate_synthetic_graph(size, seed=size), args.lookups)
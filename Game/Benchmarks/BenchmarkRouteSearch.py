@@ -0,0 +1,78 @@
+import argparse
+import gc
+import time
+import tracemalloc
+
+from Game.AlgorithmForSelectingPossibleMoves.LimitedUniformCostSearch import (
+    limited_uniform_cost_search,
+    limited_uniform_cost_search_with_routes
+)
+
+from Game.GameSetup.MansionGraph import (
+    MansionGraph
+)
+
+from Game.Benchmarks.SyntheticGraphs import (
+    generate_synthetic_graph
+)
+
+from Game.Benchmarks.BenchmarkMansionGraph import (
+    random_queries
+)
+
+
+def measure_peak(search, queries):
+    # peak traced memory of a single search, averaged over the queries
+    total = 0
+    for start, budget in queries:
+        gc.collect()
+        tracemalloc.start()
+        result = search(start, budget)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+        total += peak
+    return total / len(queries)
+
+
+def measure_time(search, queries):
+    started = time.perf_counter()
+    for start, budget in queries:
+        search(start, budget)
+    return (time.perf_counter() - started) / len(queries)
+
+
+def benchmark_graph(label, graph, rooms, budget, queries):
+    starts = [(start, budget) for start, _ in random_queries(rooms, queries)]
+    plain = lambda start, cost: limited_uniform_cost_search(graph, start, cost)
+    routed = lambda start, cost: limited_uniform_cost_search_with_routes(graph, start, cost)
+
+    def every_route(start, cost):
+        # asking for every route is the worst case; callers usually want one or two
+        result = routed(start, cost)
+        return [result.route(room) for room, _ in result.reachable]
+
+    memory_queries = starts[:max(1, queries // 20)]
+    plain_peak = measure_peak(plain, memory_queries)
+    routed_peak = measure_peak(routed, memory_queries)
+    print(f"{label}, budget {budget}")
+    print(f"  LUCS          : {measure_time(plain, starts) * 1e6:9.1f} us/query, {plain_peak / 1024:9.1f} KiB peak")
+    print(f"  LUCS + routes : {measure_time(routed, starts) * 1e6:9.1f} us/query, {routed_peak / 1024:9.1f} KiB peak "
+          f"({routed_peak / plain_peak - 1:+.0%})")
+    print(f"  every route   : {measure_time(every_route, starts) * 1e6:9.1f} us/query")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and memory cost of keeping predecessors in LUCS.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1000, 100000], help="Synthetic room counts.")
+    parser.add_argument("--budgets", type=int, nargs="*", default=[6, 20], help="Search budgets.")
+    parser.add_argument("--queries", type=int, default=2000, help="Random starts per measurement.")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        graph = generate_synthetic_graph(size, seed=size)
+        rooms = list(graph)
+        csr_graph = MansionGraph.from_dict(graph)
+        for budget in args.budgets:
+            benchmark_graph(f"{size} rooms, dict graph", graph, rooms, budget, args.queries)
+            benchmark_graph(f"{size} rooms, CSR graph", csr_graph, rooms, budget, args.queries)
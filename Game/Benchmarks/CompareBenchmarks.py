@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import sys
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "hot_paths.json")
+STATS = ("min", "median", "mean", "stddev", "rounds")
+
+
+def load_results(path):
+    # pytest-benchmark --benchmark-json output, reduced to the numbers the comparison needs
+    with open(path) as f:
+        data = json.load(f)
+    return {
+        bench["fullname"].split("::", 1)[-1]: {stat: bench["stats"][stat] for stat in STATS}
+        for bench in data["benchmarks"]
+    }, data.get("machine_info", {})
+
+
+def save_baseline(results_path, baseline_path):
+    benchmarks, machine = load_results(results_path)
+    os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+    with open(baseline_path, "w") as f:
+        json.dump({
+            "machine": {
+                "python_version": machine.get("python_version"),
+                "cpu": machine.get("cpu", {}).get("brand_raw"),
+                "cpu_count": machine.get("cpu", {}).get("count"),
+            },
+            "benchmarks": dict(sorted(benchmarks.items())),
+        }, f, indent=2)
+        f.write("\n")
+    print(f"Saved {len(benchmarks)} baselines to {baseline_path}")
+
+
+def compare(results_path, baseline_path, threshold, stat):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["benchmarks"]
+    current, _ = load_results(results_path)
+
+    regressions = []
+    width = max(len(name) for name in current) if current else 0
+    for name in sorted(current):
+        now = current[name][stat]
+        before = baseline.get(name, {}).get(stat)
+        if before is None:
+            print(f"{name:<{width}}  {'':>12}  {now * 1e3:10.3f} ms  new")
+            continue
+        change = now / before - 1
+        flag = ""
+        if change > threshold / 100:
+            flag = "  SLOWER"
+            regressions.append(name)
+        print(f"{name:<{width}}  {before * 1e3:10.3f} ms  {now * 1e3:10.3f} ms  {change:+7.1%}{flag}")
+    for name in sorted(set(baseline) - set(current)):
+        print(f"{name:<{width}}  missing from {results_path}")
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than the baseline by more than {threshold}% ({stat}).")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare a pytest-benchmark JSON run against the stored baseline.")
+    parser.add_argument("results", help="File written by pytest --benchmark-json.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file.")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Slowdown in percent that counts as a regression.")
+    parser.add_argument("--stat", choices=["min", "median", "mean"], default="median", help="Statistic to compare.")
+    parser.add_argument("--save", action="store_true", help="Replace the baseline with these results instead.")
+    args = parser.parse_args()
+
+    if args.save:
+        save_baseline(args.results, args.baseline)
+    elif compare(args.results, args.baseline, args.threshold, args.stat):
+        sys.exit(1)
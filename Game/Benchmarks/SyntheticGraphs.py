@@ -0,0 +1,21 @@
+from Game.GameSetup.GenerateMansionLayout import (
+    stream_random_weighted_edges
+)
+
+
+def synthetic_edges(num_rooms, seed=0, max_edges_per_room=5, max_cost=10, secret_chance=0.2):
+    return stream_random_weighted_edges(num_rooms, seed, max_edges_per_room, max_cost, secret_chance)
+
+
+def synthetic_room_names(num_rooms):
+    return [f"Room {i}" for i in range(num_rooms)]
+
+
+#dict-of-dicts version of the scalable generator's output, for comparing against the original graph format
+def generate_synthetic_graph(num_rooms, seed=0, max_edges_per_room=5, max_cost=10, secret_chance=0.2):
+    rooms = synthetic_room_names(num_rooms)
+    graph = {room: {} for room in rooms}
+    for i, j, cost in synthetic_edges(num_rooms, seed, max_edges_per_room, max_cost, secret_chance):
+        graph[rooms[i]][rooms[j]] = cost
+        graph[rooms[j]][rooms[i]] = cost
+    return graph
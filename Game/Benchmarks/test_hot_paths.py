@@ -0,0 +1,176 @@
+import os
+import random
+
+import pytest
+
+from Game.AlgorithmForSelectingPossibleMoves.LimitedUniformCostSearch import (
+    limited_uniform_cost_search
+)
+
+from Game.GameSetup.GenerateMansionLayout import (
+    generate_random_weighted_graph_with_secrets
+)
+
+from Game.GameSetup.CardCatalog import (
+    default_catalog
+)
+
+from Game.GameSetup.GenerateSolutionAndDistributeCards import (
+    deal_card_lists,
+    deal_cards
+)
+
+from Game.GameSetup.CardRegistry import (
+    CardRegistry
+)
+
+from Game.GameSetup.MansionGraph import (
+    MansionGraph
+)
+
+from Game.Benchmarks.SyntheticGraphs import (
+    generate_synthetic_graph,
+    synthetic_room_names
+)
+
+from Game.game import (
+    process_suggestion
+)
+
+#run with: python -m pytest Game/Benchmarks --benchmark-json results.json
+#then:     python -m Game.Benchmarks.CompareBenchmarks results.json
+SETUP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "GameSetup")
+ROOM_FILE = os.path.join(SETUP_DIR, "Room.txt")
+WEAPON_FILE = os.path.join(SETUP_DIR, "Weapon.txt")
+CHARACTER_FILE = os.path.join(SETUP_DIR, "Character.txt")
+
+#(rooms, max edges per room, secret chance); 9 rooms is the real mansion, the rest are synthetic
+GRAPH_SHAPES = [
+    (9, 5, 0.25),
+    (1000, 3, 0.2),
+    (1000, 8, 0.2),
+    (1000, 5, 0.0),
+    (1000, 5, 0.5),
+    (100000, 5, 0.2),
+]
+
+GENERATOR_SHAPES = [
+    (9, 5, 0.25, "compatible"),
+    (100, 5, 0.2, "compatible"),
+    (1000, 5, 0.2, "compatible"),
+    (1000, 3, 0.2, "scalable"),
+    (1000, 8, 0.5, "scalable"),
+    (10000, 5, 0.2, "scalable"),
+]
+
+QUERIES = 200
+
+
+def shape_id(shape):
+    return "-".join(str(part) for part in shape)
+
+
+_graphs = {}
+
+
+def build_graph(shape):
+    # one build per shape for the whole session
+    if shape not in _graphs:
+        num_rooms, edges, secrets = shape
+        if num_rooms == 9:
+            _graphs[shape] = generate_random_weighted_graph_with_secrets(
+                default_catalog().rooms(ROOM_FILE), seed=123, max_edges_per_room=edges, secret_chance=secrets
+            )
+        else:
+            _graphs[shape] = generate_synthetic_graph(num_rooms, seed=num_rooms, max_edges_per_room=edges,
+                                                      secret_chance=secrets)
+    return _graphs[shape]
+
+
+def fixed_queries(graph, seed=0):
+    rng = random.Random(seed)
+    rooms = list(graph)
+    return [(rng.choice(rooms), rng.randint(1, 6)) for _ in range(QUERIES)]
+
+
+@pytest.fixture(scope="module")
+def card_lists():
+    return default_catalog().card_lists(ROOM_FILE, WEAPON_FILE, CHARACTER_FILE)
+
+
+@pytest.mark.parametrize("shape", GENERATOR_SHAPES, ids=shape_id)
+def test_generate_mansion(benchmark, shape, card_lists):
+    num_rooms, edges, secrets, mode = shape
+    rooms = card_lists[0] if num_rooms == 9 else synthetic_room_names(num_rooms)
+    graph = benchmark(generate_random_weighted_graph_with_secrets, rooms, seed=123, max_edges_per_room=edges,
+                      secret_chance=secrets, mode=mode)
+    assert len(graph) == num_rooms
+
+
+@pytest.mark.parametrize("players", [3, 6])
+def test_deal_cards_from_files(benchmark, players):
+    solution_data, hands = benchmark(deal_cards, ROOM_FILE, WEAPON_FILE, CHARACTER_FILE, None, None,
+                                     seed=123, active_players=players)
+    assert len(hands) == players
+
+
+@pytest.mark.parametrize("players", [3, 6])
+def test_deal_card_lists(benchmark, players, card_lists):
+    rng = random.Random(123)
+    solution_data, hands = benchmark(deal_card_lists, *card_lists, players, rng)
+    assert len(hands) == players
+
+
+@pytest.mark.parametrize("graph_type", ["dict", "csr"])
+@pytest.mark.parametrize("shape", GRAPH_SHAPES, ids=shape_id)
+def test_limited_uniform_cost_search(benchmark, shape, graph_type):
+    graph = build_graph(shape)
+    queries = fixed_queries(graph)
+    if graph_type == "csr":
+        graph = MansionGraph.from_dict(graph)
+
+    def run_queries():
+        for start, roll in queries:
+            limited_uniform_cost_search(graph, start, roll)
+
+    benchmark(run_queries)
+
+
+def suggestion_setup(card_lists, players, use_registry):
+    rooms, weapons, characters = card_lists
+    rng = random.Random(123)
+    solution_data, hands = deal_card_lists(rooms, weapons, characters, players, rng)
+    registry = CardRegistry(rooms, weapons, characters) if use_registry else None
+    player_states = {
+        name: {
+            "location": rooms[0],
+            "history": [],
+            "hand": registry.mask(hand) if use_registry else hand,
+            "active": True,
+            "seen_cards": 0 if use_registry else [],
+        }
+        for name, hand in hands.items()
+    }
+    weapons_locations = {w: rooms[0] for w in weapons}
+    suggestions = [(rng.choice(characters), rng.choice(weapons), rng.choice(rooms)) for _ in range(QUERIES)]
+    return list(hands), player_states, weapons_locations, suggestions, registry
+
+
+@pytest.mark.parametrize("hands", ["lists", "bitmasks"])
+@pytest.mark.parametrize("players", [3, 6])
+def test_process_suggestion(benchmark, card_lists, players, hands):
+    selected_players, player_states, weapons_locations, suggestions, registry = suggestion_setup(
+        card_lists, players, hands == "bitmasks"
+    )
+    rng = random.Random(0)
+
+    def run_suggestions():
+        for turn, suggestion in enumerate(suggestions):
+            process_suggestion(selected_players[turn % players], suggestion, player_states, selected_players,
+                               weapons_locations, verbose=False, rng=rng, registry=registry)
+        # seen cards and histories would grow without bound across rounds otherwise
+        for state in player_states.values():
+            state["seen_cards"] = 0 if registry is not None else []
+            state["history"] = []
+
+    benchmark(run_suggestions)
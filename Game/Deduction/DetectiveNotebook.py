@@ -0,0 +1,187 @@
+from itertools import product
+
+from Game.GameSetup.CardRegistry import popcount
+
+
+class ContradictionError(ValueError):
+    pass
+
+
+#card x owner knowledge for one player, kept as bitmasks per owner (every player plus the envelope).
+#each event adds facts and propagates them until nothing changes, so queries are just mask reads
+class DetectiveNotebook:
+    def __init__(self, registry, players, me=None, hand_sizes=None):
+        self.registry = registry
+        self.players = list(players)
+        self.me = me
+        self.envelope = len(self.players)
+        self.owner_index = {player: i for i, player in enumerate(self.players)}
+        num_owners = len(self.players) + 1
+        if hand_sizes is None:
+            # deal_card_lists deals round-robin in seat order
+            dealt = len(registry) - 3
+            hand_sizes = [dealt // len(self.players) + (i < dealt % len(self.players)) for i in range(len(self.players))]
+        self.sizes = list(hand_sizes) + [3]
+        self.has = [0] * num_owners
+        self.lacks = [0] * num_owners
+        self.clauses = []
+        self.excluded_triples = set()
+        self.version = 0
+        self._candidates = None
+        self._candidates_version = -1
+
+    #events
+
+    def observe_own_hand(self, hand_mask):
+        owner = self.owner_index[self.me]
+        self._set_has(owner, hand_mask)
+        self._set_lacks(owner, self.registry.all_mask & ~hand_mask)
+        self._propagate()
+
+    def record_shown(self, player, card):
+        self._set_has(self.owner_index[player], self.registry.bits[card])
+        self._propagate()
+
+    def record_suggestion(self, suggester, suggestion, refuter=None, shown_card=None):
+        suggestion_mask = self.registry.mask(suggestion)
+        start = self.owner_index[suggester]
+        num = len(self.players)
+        # everyone asked before the refuter (or everyone, if nobody refuted) holds none of the three
+        for offset in range(1, num):
+            responder = (start + offset) % num
+            if self.players[responder] == refuter:
+                break
+            self._set_lacks(responder, suggestion_mask)
+        if refuter is not None:
+            owner = self.owner_index[refuter]
+            if shown_card is not None:
+                self._set_has(owner, self.registry.bits[shown_card])
+            else:
+                self.clauses.append((owner, suggestion_mask))
+                self.version += 1
+        self._propagate()
+
+    def record_failed_accusation(self, accusation):
+        self.excluded_triples.add(tuple(accusation))
+        self.version += 1
+
+    #queries
+
+    def possible_envelope_mask(self):
+        return self.registry.all_mask & ~self.lacks[self.envelope]
+
+    def solution_candidates(self):
+        if self._candidates_version != self.version:
+            registry = self.registry
+            possible = self.possible_envelope_mask()
+            self._candidates = [
+                triple for triple in product(
+                    registry.cards_in(possible & registry.character_mask),
+                    registry.cards_in(possible & registry.weapon_mask),
+                    registry.cards_in(possible & registry.room_mask),
+                )
+                if triple not in self.excluded_triples
+            ]
+            self._candidates_version = self.version
+        return self._candidates
+
+    def solved(self):
+        candidates = self.solution_candidates()
+        return candidates[0] if len(candidates) == 1 else None
+
+    def known_owner(self, card):
+        bit = self.registry.bits[card]
+        for owner, mask in enumerate(self.has):
+            if mask & bit:
+                return None if owner == self.envelope else self.players[owner]
+        raise KeyError(card)
+
+    def is_known(self, card):
+        bit = self.registry.bits[card]
+        return any(mask & bit for mask in self.has)
+
+    def state_key(self):
+        return (tuple(self.has), tuple(self.lacks), tuple(self.clauses), frozenset(self.excluded_triples))
+
+    #propagation
+
+    def _set_has(self, owner, mask):
+        new = mask & ~self.has[owner]
+        if not new:
+            return
+        if new & self.lacks[owner]:
+            raise ContradictionError(f"{self._owner_name(owner)} cannot hold {self.registry.cards_in(new & self.lacks[owner])}.")
+        self.has[owner] |= new
+        self.version += 1
+
+    def _set_lacks(self, owner, mask):
+        new = mask & ~self.lacks[owner]
+        if not new:
+            return
+        if new & self.has[owner]:
+            raise ContradictionError(f"{self._owner_name(owner)} is known to hold {self.registry.cards_in(new & self.has[owner])}.")
+        self.lacks[owner] |= new
+        self.version += 1
+
+    def _owner_name(self, owner):
+        return "The envelope" if owner == self.envelope else self.players[owner]
+
+    def _propagate(self):
+        registry = self.registry
+        all_mask = registry.all_mask
+        num_owners = len(self.has)
+        categories = (registry.character_mask, registry.weapon_mask, registry.room_mask)
+        while True:
+            before = self.version
+
+            # a card has exactly one owner
+            for owner in range(num_owners):
+                others = 0
+                for other in range(num_owners):
+                    if other != owner:
+                        others |= self.has[other]
+                self._set_lacks(owner, others)
+            lacked_by_all_but_one = all_mask
+            for owner in range(num_owners):
+                held_elsewhere = all_mask
+                for other in range(num_owners):
+                    if other != owner:
+                        held_elsewhere &= self.lacks[other]
+                self._set_has(owner, held_elsewhere)
+                lacked_by_all_but_one &= self.lacks[owner]
+            if lacked_by_all_but_one:
+                raise ContradictionError(f"Nobody can hold {registry.cards_in(lacked_by_all_but_one)}.")
+
+            # hand sizes are known, and the envelope holds one card per category
+            for owner in range(len(self.players)):
+                self._apply_size(owner, all_mask, self.sizes[owner])
+            for category in categories:
+                self._apply_size(self.envelope, category, 1)
+
+            # "holds at least one of these" clauses
+            remaining = []
+            for owner, mask in self.clauses:
+                if mask & self.has[owner]:
+                    continue
+                mask &= ~self.lacks[owner]
+                if not mask:
+                    raise ContradictionError(f"{self._owner_name(owner)} refuted a suggestion without any of its cards.")
+                if not mask & (mask - 1):
+                    self._set_has(owner, mask)
+                    continue
+                remaining.append((owner, mask))
+            self.clauses = remaining
+
+            if self.version == before:
+                return
+
+    def _apply_size(self, owner, scope, size):
+        held = self.has[owner] & scope
+        possible = scope & ~self.lacks[owner]
+        held_count = popcount(held)
+        if held_count > size or popcount(possible) < size:
+            raise ContradictionError(f"{self._owner_name(owner)} cannot hold {size} card(s) here.")
+        if held_count == size:
+            self._set_lacks(owner, scope & ~held)
+        elif popcount(possible) == size:
+            self._set_has(owner, possible)
@@ -0,0 +1,253 @@
+import random
+from itertools import combinations
+
+import numpy as np
+
+from Game.GameSetup.CardRegistry import popcount
+
+#attempts per numpy batch of the rejection sampler
+MIN_BATCH = 256
+MAX_BATCH = 16384
+
+
+def _bits_of(mask):
+    bits = []
+    while mask:
+        low = mask & -mask
+        bits.append(low)
+        mask ^= low
+    return bits
+
+
+#posterior over envelope triples given everything a DetectiveNotebook knows. Every deal is equally
+#likely a priori, so a triple's weight is the number of ways to hand out the unknown cards that
+#agree with the notebook: counted exactly when few cards are unknown, estimated from a pool of
+#rejection samples otherwise. The observed refutations are treated as hard constraints
+class SolutionEstimator:
+    def __init__(self, notebook, samples=500, min_samples=100, exact_free_cards=6, max_draws_per_update=300,
+                 rng=None):
+        self.notebook = notebook
+        self.samples = samples
+        self.min_samples = min_samples
+        self.max_draws_per_update = max_draws_per_update
+        self.exact_free_cards = exact_free_cards
+        self.exact = True
+        self.rng = rng or random.Random()
+        self._state_key = None
+        self._probabilities = None
+        self._marginals = None
+        # exact counting, one level per seat: (that seat's constraints, {cards left: completions})
+        self._levels = []
+        # weighted samples survive events that add constraints: samples that break them are dropped
+        self._pool = []
+
+    #queries
+
+    def triple_probabilities(self):
+        key = self.notebook.state_key()
+        if key != self._state_key:
+            self._probabilities = self._compute()
+            self._marginals = None
+            self._state_key = key
+        return self._probabilities
+
+    def marginals(self):
+        probabilities = self.triple_probabilities()
+        if self._marginals is None:
+            marginals = dict.fromkeys(self.notebook.registry.cards, 0.0)
+            for triple, p in probabilities.items():
+                for card in triple:
+                    marginals[card] += p
+            self._marginals = marginals
+        return self._marginals
+
+    def most_likely(self):
+        probabilities = self.triple_probabilities()
+        if not probabilities:
+            return None, 0.0
+        triple = max(probabilities, key=probabilities.get)
+        return triple, probabilities[triple]
+
+    def reliable(self):
+        self.triple_probabilities()
+        return self.exact or len(self._pool) >= self.min_samples
+
+    def best_accusation(self, threshold=0.95):
+        triple, p = self.most_likely()
+        if triple is None or p < threshold or not self.reliable():
+            return None
+        return triple
+
+    def sample_deals(self, count, max_draws=None):
+        # uniform posterior samples of (envelope triple, hand mask per seat), e.g. for determinized search;
+        # may return fewer than count when the notebook leaves very few consistent deals
+        candidates = self.notebook.solution_candidates()
+        if not candidates:
+            return []
+        held, needs = self._hand_constraints()
+        return self._draw(candidates, held, needs, count, max_draws or count * 200)
+
+    def is_consistent(self, deal):
+        # whether a (triple, hand mask per seat) deal still agrees with the notebook
+        notebook = self.notebook
+        triple, hands = deal
+        if triple in notebook.excluded_triples:
+            return False
+        envelope = notebook.registry.mask(triple)
+        if envelope & notebook.lacks[notebook.envelope] or notebook.has[notebook.envelope] & ~envelope:
+            return False
+        for player, hand in enumerate(hands):
+            if hand & notebook.lacks[player] or notebook.has[player] & ~hand:
+                return False
+        for owner, mask in notebook.clauses:
+            if not hands[owner] & mask:
+                return False
+        return True
+
+    #shared helpers
+
+    def _hand_constraints(self):
+        notebook = self.notebook
+        num_players = len(notebook.players)
+        held = 0
+        for mask in notebook.has[:num_players]:
+            held |= mask
+        needs = tuple(notebook.sizes[p] - popcount(notebook.has[p]) for p in range(num_players))
+        return held, needs
+
+    def _compute(self):
+        notebook = self.notebook
+        candidates = notebook.solution_candidates()
+        self.exact = True
+        if len(candidates) <= 1:
+            return {triple: 1.0 for triple in candidates}
+        held, needs = self._hand_constraints()
+        if sum(needs) <= self.exact_free_cards:
+            weights = self._exact_weights(candidates, held, needs)
+        else:
+            self.exact = False
+            weights = self._sampled_weights(candidates, held, needs)
+        total = sum(weights.values())
+        if not total:
+            return {triple: 1.0 / len(candidates) for triple in candidates}
+        return {triple: w / total for triple, w in weights.items() if w}
+
+    #exact counting
+
+    def _exact_weights(self, candidates, held, needs):
+        # the seats take their cards one after the other, so completions(p, cards) - the ways to hand
+        # those cards to seats p, p+1, ... - only depends on the constraints of those seats. Every
+        # triple shares the levels, and an event about seat q keeps every level after q
+        notebook = self.notebook
+        registry = notebook.registry
+        num_players = len(notebook.players)
+        owned_clauses = [[] for _ in range(num_players)]
+        for owner, mask in notebook.clauses:
+            owned_clauses[owner].append(mask)
+        constraints = [(needs[p], notebook.lacks[p], tuple(owned_clauses[p])) for p in range(num_players)]
+        if len(self._levels) != num_players:
+            self._levels = [(None, {})] * num_players
+        stale = False
+        for p in reversed(range(num_players)):
+            if stale or self._levels[p][0] != constraints[p]:
+                stale = True
+                self._levels[p] = (constraints[p], {})
+        memos = [memo for _, memo in self._levels]
+        # cards some seat from p on may still hold; anything else left over is a dead end
+        takers = [0] * (num_players + 1)
+        for p in reversed(range(num_players)):
+            takers[p] = takers[p + 1] | ~notebook.lacks[p]
+
+        def completions(p, cards):
+            if p == num_players:
+                return 0 if cards else 1
+            memo = memos[p]
+            total = memo.get(cards)
+            if total is None:
+                need, lacks, clauses = constraints[p]
+                total = 0
+                if cards & ~takers[p]:
+                    memo[cards] = total
+                    return total
+                for hand in combinations(_bits_of(cards & ~lacks), need):
+                    hand = sum(hand)
+                    if all(hand & mask for mask in clauses):
+                        total += completions(p + 1, cards ^ hand)
+                memo[cards] = total
+            return total
+
+        unknown = registry.all_mask & ~held
+        dealt = sum(needs)
+        weights = {}
+        for triple in candidates:
+            free = unknown & ~registry.mask(triple)
+            weights[triple] = completions(0, free) if popcount(free) == dealt else 0
+        return weights
+
+    #sampling
+
+    def _sampled_weights(self, candidates, held, needs):
+        # conditioning uniform samples on a new constraint leaves uniform samples of the new
+        # posterior, so an event only costs the samples it contradicts
+        pool = [sample for sample in self._pool if self.is_consistent(sample)]
+        missing = self.samples - len(pool)
+        if missing > 0:
+            # bounded work per update; the pool keeps filling up over later updates
+            pool.extend(self._draw(candidates, held, needs, missing, self.max_draws_per_update))
+        self._pool = pool
+        weights = {}
+        for triple, _ in pool:
+            weights[triple] = weights.get(triple, 0) + 1
+        return weights
+
+    def _draw(self, candidates, held, needs, count, budget):
+        # up to count samples from at most budget attempts
+        draw = self._sampler(candidates, held, needs)
+        samples = []
+        attempts = accepted = 0
+        while budget > 0 and len(samples) < count:
+            # batches sized by the acceptance rate so far, so a rare posterior is not drawn MIN_BATCH at a time
+            missing = count - len(samples)
+            batch = min(budget, MAX_BATCH, max(MIN_BATCH, missing * (attempts + 1) // (accepted + 1)))
+            drawn = draw(batch)
+            attempts += batch
+            accepted += len(drawn)
+            budget -= batch
+            samples.extend(drawn[:missing])
+        return samples
+
+    def _sampler(self, candidates, held, needs):
+        # a uniformly random envelope candidate plus a uniform shuffle of the other unknown cards
+        # into the open hand slots is uniform over deals that agree with the known cards, so
+        # keeping only the draws that also satisfy the lacks and clauses is an exact posterior sample.
+        # draw(n) makes n such attempts at once with numpy and returns the ones that were kept
+        notebook = self.notebook
+        registry = notebook.registry
+        num_players = len(notebook.players)
+        lacks = np.array(notebook.lacks[:num_players], dtype=np.int64)
+        clauses = notebook.clauses
+        base_hands = np.array(notebook.has[:num_players], dtype=np.int64)
+        unknown_cards = np.array(_bits_of(registry.all_mask & ~held), dtype=np.int64)
+        slots = [p for p in range(num_players) for _ in range(needs[p])]
+        slot_lacks = lacks[slots]
+        envelopes = np.array([registry.mask(triple) for triple in candidates], dtype=np.int64)
+        # numpy draws from a generator seeded by the estimator's rng, so a seeded game still replays exactly
+        generator = np.random.Generator(np.random.PCG64(self.rng.getrandbits(64)))
+
+        def draw(attempts):
+            picks = generator.integers(len(envelopes), size=attempts)
+            free = (unknown_cards[None, :] & envelopes[picks][:, None]) == 0
+            kept = free.sum(axis=1) == len(slots)
+            # a random order of each attempt's free cards: the envelope's cards sort last and are cut off
+            keys = generator.random(free.shape)
+            keys[~free] = 2.0
+            cards = unknown_cards[np.argsort(keys, axis=1)[:, :len(slots)]]
+            kept &= ~(cards & slot_lacks).any(axis=1)
+            hands = np.repeat(base_hands[None, :], attempts, axis=0)
+            for i, player in enumerate(slots):
+                hands[:, player] |= cards[:, i]
+            for owner, mask in clauses:
+                kept &= (hands[:, owner] & mask) != 0
+            return [(candidates[pick], tuple(hand)) for pick, hand in zip(picks[kept].tolist(), hands[kept].tolist())]
+
+        return draw
@@ -0,0 +1,178 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+from Game.Deduction.DetectiveNotebook import (
+    DetectiveNotebook
+)
+
+from Game.Deduction.SolutionEstimator import (
+    SolutionEstimator
+)
+
+
+#ranks every (character, weapon, room) the notebook's owner could suggest by the expected drop in the
+#entropy of the envelope triple. A pool of posterior deals (SolutionEstimator.sample_deals) follows the
+#notebook; each suggestion's outcome on every deal (who refutes, in process_suggestion's seat order,
+#and which card they show, each matching card equally likely) is worked out for all candidates at once
+class SuggestionOptimizer:
+    def __init__(self, estimator, samples=500, max_draws=20000):
+        self.estimator = estimator
+        self.notebook = estimator.notebook
+        self.registry = self.notebook.registry
+        self.samples = samples
+        self.max_draws = max_draws
+        self._state_key = None
+        self._deals = []
+        self._envelopes = None
+        self._hands = None
+        self._prior_bits = 0.0
+
+    def _deal_arrays(self):
+        key = self.notebook.state_key()
+        if key != self._state_key:
+            # deals that agree with the new notebook are still uniform posterior samples, so an event only
+            # costs the deals it contradicts, and drawing their replacements is bounded by max_draws
+            deals = [deal for deal in self._deals if self.estimator.is_consistent(deal)]
+            missing = self.samples - len(deals)
+            if missing > 0:
+                deals.extend(self.estimator.sample_deals(missing, self.max_draws))
+            self._deals = deals
+            triples = {}
+            envelopes = [triples.setdefault(triple, len(triples)) for triple, _ in deals]
+            self._envelopes = np.array(envelopes, dtype=np.int32)
+            self._hands = np.array([hands for _, hands in deals], dtype=np.int64).reshape(
+                len(deals), len(self.notebook.players))
+            self._num_triples = len(triples)
+            counts = np.bincount(self._envelopes).astype(float)
+            counts = counts[counts > 0]
+            self._prior_bits = float(np.log2(len(deals)) - (counts * np.log2(counts)).sum() / len(deals)) \
+                if deals else 0.0
+            self._owners = {}
+            self._state_key = key
+        return self._envelopes, self._hands
+
+    def _owner_offsets(self, start):
+        # (deals, cards): seat offset - 1 from the suggester of each card's holder, or num - 1 when
+        # no other seat holds it (the envelope's and the suggester's own cards)
+        owners = self._owners.get(start)
+        if owners is None:
+            hands = self._hands
+            num = hands.shape[1]
+            card_bits = np.int64(1) << np.arange(len(self.registry), dtype=np.int64)
+            owners = np.full((len(hands), len(card_bits)), num - 1, dtype=np.int8)
+            for offset in range(1, num):
+                held = (hands[:, (start + offset) % num][:, None] & card_bits) != 0
+                owners[held] = offset - 1
+            owners = self._owners[start] = owners
+        return owners
+
+    def expected_gains(self, rooms, suggester=None):
+        # (gains, suggestions): expected information gain in bits per suggestion, same order as the list
+        registry = self.registry
+        index = {card: i for i, card in enumerate(registry.cards)}
+        players = self.notebook.players
+        suggestions = [(c, w, r) for r in rooms for c in registry.characters for w in registry.weapons]
+        envelopes, _ = self._deal_arrays()
+        if not len(envelopes):
+            # no deal was drawn within the budget, so there is no gain to estimate; rank() falls back to
+            # the suggestions naming the most cards that could still be in the envelope
+            return np.zeros(len(suggestions)), suggestions
+
+        num = len(players)
+        owners = self._owner_offsets(players.index(suggester if suggester is not None else self.notebook.me))
+        num_samples, num_suggestions = len(envelopes), len(suggestions)
+        holders = [owners[:, [index[suggestion[j]] for suggestion in suggestions]] for j in range(3)]
+
+        # process_suggestion asks the seats in order, so the refuter is the nearest holder of any of the three;
+        # outcome 0 is "nobody refutes", outcome 1 + 3 * refuter + j is "the refuter shows card j"
+        refuter = np.minimum(np.minimum(holders[0], holders[1]), holders[2])
+        refuted = refuter < num - 1
+        shows = [(holder == refuter) & refuted for holder in holders]
+        choices = shows[0].astype(np.int8) + shows[1] + shows[2]
+        num_outcomes = 3 * (num - 1) + 1
+        num_triples = self._num_triples
+        group_size = num_outcomes * num_triples
+
+        # one key per (suggestion, outcome, envelope triple), weighted by the chance of that outcome on the deal
+        no_refuter = (np.arange(num_suggestions, dtype=np.int32) * group_size)[None, :] + envelopes[:, None]
+        shown_base = no_refuter + (1 + 3 * refuter.astype(np.int32)) * num_triples
+        keys = [no_refuter[~refuted]] + [(shown_base + j * num_triples)[shows[j]] for j in range(3)]
+        weights = [np.ones(len(keys[0]))] + [1.0 / choices[shows[j]] for j in range(3)]
+        joint = np.bincount(np.concatenate(keys), weights=np.concatenate(weights))
+
+        # every suggestion spreads a total weight of num_samples over its outcomes, so
+        # H = log2(N) - sum(w log2 w) / N, and I(T; O) = H(T) - H(T, O) + H(O)
+        present = np.flatnonzero(joint)
+        values = joint[present]
+        suggestion_of = present // group_size
+        joint_sums = np.bincount(suggestion_of, weights=values * np.log2(values), minlength=num_suggestions)
+        outcome_weights = np.bincount(present // num_triples, weights=values)
+        outcomes = np.flatnonzero(outcome_weights)
+        values = outcome_weights[outcomes]
+        outcome_sums = np.bincount(outcomes // num_outcomes, weights=values * np.log2(values),
+                                   minlength=num_suggestions)
+        return self._prior_bits + (joint_sums - outcome_sums) / num_samples, suggestions
+
+    def rank(self, rooms, suggester=None, top=None):
+        gains, suggestions = self.expected_gains(rooms, suggester)
+        # equal gains go to the suggestion with more cards that could still be in the envelope
+        possible = self.notebook.possible_envelope_mask()
+        bits = self.registry.bits
+        open_cards = np.array([sum(1 for card in suggestion if bits[card] & possible) for suggestion in suggestions])
+        order = np.lexsort((-open_cards, -gains))
+        if top is not None:
+            order = order[:top]
+        return [(float(gains[i]), suggestions[i]) for i in order]
+
+    def best(self, rooms, suggester=None):
+        ranked = self.rank(rooms, suggester, top=1)
+        return ranked[0][1] if ranked else None
+
+
+if __name__ == "__main__":
+    from Game.GameSetup.CardRegistry import CardRegistry
+    from Game.GameSetup.GenerateSolutionAndDistributeCards import deal_card_lists
+    from Game.game import process_suggestion
+    from Game.Simulation.HeadlessSimulation import load_default_setup
+
+    parser = argparse.ArgumentParser(description="Rank the suggestions of a random position by expected information gain.")
+    parser.add_argument("--players", type=int, default=3, help="Players in the game (3-6).")
+    parser.add_argument("--turns", type=int, default=6, help="Random suggestions played before ranking.")
+    parser.add_argument("--samples", type=int, default=500, help="Posterior deals scored per position.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the deal and the random suggestions.")
+    parser.add_argument("--top", type=int, default=10, help="How many suggestions to print.")
+    args = parser.parse_args()
+
+    mansion_graph, rooms, weapons, characters = load_default_setup()
+    registry = CardRegistry(rooms, weapons, characters)
+    rng = random.Random(args.seed)
+    solution_data, hands = deal_card_lists(rooms, weapons, characters, args.players, rng)
+    players = list(hands)
+    me = players[0]
+    states = {p: {"location": rooms[0], "history": [], "hand": registry.mask(hands[p]), "active": True,
+                  "seen_cards": 0} for p in players}
+    notebook = DetectiveNotebook(registry, players, me=me)
+    notebook.observe_own_hand(states[me]["hand"])
+    for turn in range(args.turns):
+        suggester = players[turn % len(players)]
+        suggestion = (rng.choice(characters), rng.choice(weapons), rng.choice(rooms))
+        refutation = process_suggestion(suggester, suggestion, states, players, {}, verbose=False, rng=rng,
+                                        registry=registry)
+        refuter, shown_card = refutation if refutation is not None else (None, None)
+        notebook.record_suggestion(suggester, suggestion, refuter, shown_card if suggester == me else None)
+
+    optimizer = SuggestionOptimizer(SolutionEstimator(notebook, rng=rng), samples=args.samples)
+    started = time.perf_counter()
+    optimizer.expected_gains(rooms)
+    sampled = time.perf_counter() - started
+    started = time.perf_counter()
+    ranked = optimizer.rank(rooms)
+    scored = time.perf_counter() - started
+    print(f"{me}: {len(notebook.solution_candidates())} envelope candidates, "
+          f"{optimizer._prior_bits:.2f} bits of posterior entropy")
+    print(f"Drew the deals in {sampled * 1e3:.1f} ms, scored {len(ranked)} suggestions in {scored * 1e3:.1f} ms")
+    for gain, (character, weapon, room) in ranked[:args.top]:
+        print(f"  {gain:.3f} bits  {character} with the {weapon} in the {room}")
@@ -0,0 +1,363 @@
+import argparse
+import os
+import struct
+import sys
+import time
+from array import array
+
+#append-only game log: a file header, then records of
+#  uint32 body length | uint8 record type | fixed little-endian payload
+#card, room and seat fields are uint16 indexes into the tables of the game's GAME_START record
+MAGIC = b"CLEV"
+FORMAT_VERSION = 2
+FILE_HEADER = struct.Struct("<4sH")
+RECORD_HEADER = struct.Struct("<IB")
+
+GAME_START = 1
+TURN = 2
+ROLL = 3
+MOVE = 4
+SUGGESTION = 5
+REFUTATION = 6
+ACCUSATION = 7
+GAME_END = 8
+
+NONE = 0xFFFF
+
+PAYLOADS = {
+    TURN: struct.Struct("<H"),
+    ROLL: struct.Struct("<HB"),
+    MOVE: struct.Struct("<HH"),
+    SUGGESTION: struct.Struct("<HHHH"),
+    REFUTATION: struct.Struct("<HH"),
+    ACCUSATION: struct.Struct("<HHHHB"),
+    GAME_END: struct.Struct("<HI"),
+}
+
+
+def pack_strings(strings):
+    parts = [struct.pack("<H", len(strings))]
+    for text in strings:
+        encoded = text.encode("utf-8")
+        parts.append(struct.pack("<B", len(encoded)))
+        parts.append(encoded)
+    return b"".join(parts)
+
+
+def unpack_strings(data, pos):
+    (count,) = struct.unpack_from("<H", data, pos)
+    pos += 2
+    strings = []
+    for _ in range(count):
+        length = data[pos]
+        strings.append(data[pos + 1:pos + 1 + length].decode("utf-8"))
+        pos += 1 + length
+    return strings, pos
+
+
+def _pack_indexes(values):
+    values = array("H", values)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return struct.pack("<H", len(values)) + values.tobytes()
+
+
+def _unpack_indexes(data, pos):
+    (count,) = struct.unpack_from("<H", data, pos)
+    values = array("H")
+    values.frombytes(data[pos + 2:pos + 2 + 2 * count])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tolist(), pos + 2 + 2 * count
+
+
+def _check_header(f, path):
+    header = f.read(FILE_HEADER.size)
+    if len(header) < FILE_HEADER.size:
+        raise ValueError(f"{path} is not a version {FORMAT_VERSION} game event log.")
+    magic, version = FILE_HEADER.unpack(header)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a version {FORMAT_VERSION} game event log.")
+
+
+def _scan(f, path, read_bodies=False, torn_tail_ok=False):
+    # (offset, record type, body or body length) of every record from the current position; without
+    # read_bodies the bodies are skipped with seek, so nothing but the record headers is read
+    size = os.fstat(f.fileno()).st_size
+    pos = f.tell()
+    while pos < size:
+        end = pos + RECORD_HEADER.size
+        if end <= size:
+            length, record_type = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+            if length < 1:
+                # every body starts with its type byte, and without a length nothing after this can be found
+                raise ValueError(f"{path} has a corrupt record at offset {pos}.")
+            end += length - 1
+        if end > size:
+            # torn tail from a crash between fsyncs; everything before it is intact
+            if torn_tail_ok:
+                return
+            raise ValueError(f"{path} ends in a truncated record at offset {pos}; "
+                             f"opening it with EventLogWriter cuts it off.")
+        if read_bodies:
+            yield pos, record_type, f.read(length - 1)
+        else:
+            yield pos, record_type, length - 1
+            f.seek(end)
+        pos = end
+
+
+#records events by name; names are turned into indexes using the tables from start_game
+class EventLogWriter:
+    def __init__(self, path, fsync_every=1024, buffer_size=1 << 16):
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            self._file = open(path, "wb", buffering=buffer_size)
+            self._file.write(FILE_HEADER.pack(MAGIC, FORMAT_VERSION))
+        else:
+            # a file too short for its header is not ours to overwrite; _check_header refuses it
+            self._file = open(path, "r+b", buffering=buffer_size)
+            try:
+                _check_header(self._file, path)
+                # appending after a torn record would leave every later record unreadable, so cut it off first
+                end = FILE_HEADER.size
+                for pos, _, length in _scan(self._file, path, torn_tail_ok=True):
+                    end = pos + RECORD_HEADER.size + length
+            except ValueError:
+                self._file.close()
+                raise
+            self._file.seek(end)
+            self._file.truncate()
+        self.fsync_every = fsync_every
+        self._unsynced = 0
+        self._cards = None
+        self._rooms = None
+        self._seats = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write(self, record_type, payload):
+        self._file.write(RECORD_HEADER.pack(len(payload) + 1, record_type))
+        self._file.write(payload)
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        # batched: one fsync per fsync_every records instead of one per event
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def start_game(self, seed, rooms, weapons, characters, players, solution_data, hands,
+                   player_locations, weapons_locations):
+        cards = list(characters) + list(weapons) + list(rooms)
+        if len(cards) >= NONE or len(players) >= NONE:
+            raise ValueError(f"Event logs hold at most {NONE - 1} cards and players per game.")
+        self._cards = {card: i for i, card in enumerate(cards)}
+        self._rooms = {room: i for i, room in enumerate(rooms)}
+        self._seats = {player: i for i, player in enumerate(players)}
+        card_ids = self._cards
+        offset = self._file.tell()
+        parts = [
+            struct.pack("<Q", seed & (2 ** 64 - 1)),
+            pack_strings(rooms), pack_strings(weapons), pack_strings(characters), pack_strings(players),
+            struct.pack("<HHH", card_ids[solution_data["character"]], card_ids[solution_data["weapon"]],
+                        card_ids[solution_data["room"]]),
+        ]
+        for player in players:
+            parts.append(_pack_indexes([card_ids[card] for card in hands[player]]))
+        parts.append(_pack_indexes([self._rooms[player_locations[player]] for player in players]))
+        parts.append(_pack_indexes([self._rooms[weapons_locations[weapon]] for weapon in weapons]))
+        self._write(GAME_START, b"".join(parts))
+        # file offset of the game, for replay_game(..., offset=)
+        return offset
+
+    def turn(self, player):
+        self._write(TURN, PAYLOADS[TURN].pack(self._seats[player]))
+
+    def roll(self, player, value):
+        self._write(ROLL, PAYLOADS[ROLL].pack(self._seats[player], value))
+
+    def move(self, player, room):
+        self._write(MOVE, PAYLOADS[MOVE].pack(self._seats[player], self._rooms[room]))
+
+    def suggestion(self, player, suggestion):
+        suspect, weapon, room = suggestion
+        self._write(SUGGESTION, PAYLOADS[SUGGESTION].pack(
+            self._seats[player], self._cards[suspect], self._cards[weapon], self._cards[room]))
+
+    def refutation(self, refuter, shown_card):
+        self._write(REFUTATION, PAYLOADS[REFUTATION].pack(
+            NONE if refuter is None else self._seats[refuter],
+            NONE if shown_card is None else self._cards[shown_card]))
+
+    def accusation(self, player, accusation, correct):
+        suspect, weapon, room = accusation
+        self._write(ACCUSATION, PAYLOADS[ACCUSATION].pack(
+            self._seats[player], self._cards[suspect], self._cards[weapon], self._cards[room], correct))
+
+    def end_game(self, winner, turns):
+        self._write(GAME_END, PAYLOADS[GAME_END].pack(NONE if winner is None else self._seats[winner], turns))
+
+
+def read_records(path, offset=None):
+    # (offset, record type, body) from offset (default: the first record) to the end of the log
+    with open(path, "rb") as f:
+        _check_header(f, path)
+        if offset is not None:
+            f.seek(offset)
+        yield from _scan(f, path, read_bodies=True)
+
+
+def _decode_start(data, pos):
+    (seed,) = struct.unpack_from("<Q", data, pos)
+    pos += 8
+    rooms, pos = unpack_strings(data, pos)
+    weapons, pos = unpack_strings(data, pos)
+    characters, pos = unpack_strings(data, pos)
+    players, pos = unpack_strings(data, pos)
+    solution = struct.unpack_from("<HHH", data, pos)
+    pos += 6
+    hands = []
+    for _ in players:
+        hand, pos = _unpack_indexes(data, pos)
+        hands.append(hand)
+    locations, pos = _unpack_indexes(data, pos)
+    weapon_rooms, pos = _unpack_indexes(data, pos)
+    return seed, rooms, weapons, characters, players, solution, hands, locations, weapon_rooms
+
+
+class ReplayedGame:
+    def __init__(self, seed, rooms, weapons, characters, players, solution, hands, locations, weapon_rooms):
+        self.seed = seed
+        self.rooms = rooms
+        self.weapons = weapons
+        self.characters = characters
+        self.players = players
+        self.cards = characters + weapons + rooms
+        self.solution_data = {
+            "character": self.cards[solution[0]],
+            "weapon": self.cards[solution[1]],
+            "room": self.cards[solution[2]],
+        }
+        self.player_states = {
+            player: {
+                "location": rooms[locations[seat]],
+                "history": [],
+                "hand": [self.cards[card] for card in hands[seat]],
+                "active": True,
+                "seen_cards": [],
+            }
+            for seat, player in enumerate(players)
+        }
+        self.weapons_locations = {weapon: rooms[room] for weapon, room in zip(weapons, weapon_rooms)}
+        self.turn = 0
+        self.index = 0
+        self.last_suggester = None
+        self.winner = None
+        self.finished = False
+
+    def apply(self, record_type, data, pos):
+        cards = self.cards
+        if record_type == TURN:
+            (seat,) = PAYLOADS[TURN].unpack_from(data, pos)
+            self.turn += 1
+            self.index = seat
+        elif record_type == MOVE:
+            seat, room = PAYLOADS[MOVE].unpack_from(data, pos)
+            state = self.player_states[self.players[seat]]
+            state["location"] = self.rooms[room]
+            state["history"].append(self.rooms[room])
+        elif record_type == SUGGESTION:
+            # same side effects as process_suggestion
+            seat, suspect, weapon, room = PAYLOADS[SUGGESTION].unpack_from(data, pos)
+            suspect, weapon, room = cards[suspect], cards[weapon], cards[room]
+            self.last_suggester = self.players[seat]
+            if suspect in self.player_states and self.player_states[suspect]["location"] != room:
+                self.player_states[suspect]["location"] = room
+                self.player_states[suspect]["history"].append(room)
+            self.weapons_locations[weapon] = room
+        elif record_type == REFUTATION:
+            refuter, shown = PAYLOADS[REFUTATION].unpack_from(data, pos)
+            if shown != NONE:
+                self.player_states[self.last_suggester]["seen_cards"].append(cards[shown])
+        elif record_type == ACCUSATION:
+            seat, _, _, _, correct = PAYLOADS[ACCUSATION].unpack_from(data, pos)
+            if correct:
+                self.winner = self.players[seat]
+            else:
+                self.player_states[self.players[seat]]["active"] = False
+        elif record_type == GAME_END:
+            self.finished = True
+
+
+def game_offsets(path):
+    # file offset of every game, an index to keep for replay_game(..., offset=)
+    with open(path, "rb") as f:
+        _check_header(f, path)
+        return [pos for pos, record_type, _ in _scan(f, path) if record_type == GAME_START]
+
+
+def _game_offset(path, game_index):
+    with open(path, "rb") as f:
+        _check_header(f, path)
+        games_seen = -1
+        for pos, record_type, _ in _scan(f, path):
+            if record_type == GAME_START:
+                games_seen += 1
+                if games_seen == game_index:
+                    return pos
+    raise IndexError(f"{path} holds fewer than {game_index + 1} games.")
+
+
+def replay_game(path, game_index=0, upto_turn=None, offset=None):
+    # rebuilds the state of one game, stopping just before turn upto_turn + 1 starts. With the game's
+    # offset (from start_game or game_offsets) reading starts right there; otherwise only the record
+    # headers of the earlier games are read to find it
+    if offset is None:
+        offset = _game_offset(path, game_index)
+    game = None
+    for _, record_type, body in read_records(path, offset):
+        if record_type == GAME_START:
+            if game is not None:
+                break
+            game = ReplayedGame(*_decode_start(body, 0))
+            continue
+        if game is None:
+            raise ValueError(f"Offset {offset} of {path} is not the start of a game.")
+        if record_type == TURN and upto_turn is not None and game.turn >= upto_turn:
+            break
+        game.apply(record_type, body, 0)
+    if game is None:
+        raise ValueError(f"Offset {offset} of {path} is not the start of a game.")
+    return game
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a game from a binary event log.")
+    parser.add_argument("log", help="Event log file.")
+    parser.add_argument("--game", type=int, default=0, help="Index of the game in the log.")
+    parser.add_argument("--turn", type=int, default=None, help="Stop after this many turns (default: whole game).")
+    parser.add_argument("--offset", type=int, default=None,
+                        help="File offset of the game (from game_offsets); skips the search for --game.")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    game = replay_game(args.log, args.game, args.turn, args.offset)
+    elapsed = time.perf_counter() - started
+    print(f"Replayed game {args.game} to turn {game.turn} in {elapsed * 1e3:.2f} ms")
+    print("Solution:", game.solution_data)
+    for player, state in game.player_states.items():
+        status = "active" if state["active"] else "eliminated"
+        print(f"  {player}: {state['location']} ({status}), seen {', '.join(state['seen_cards']) or 'nothing'}")
+    if game.winner:
+        print("Winner:", game.winner)
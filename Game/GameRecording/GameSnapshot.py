@@ -0,0 +1,325 @@
+import argparse
+import random
+import struct
+import zlib
+from array import array
+
+from Game.GameRecording.EventLog import (
+    pack_strings,
+    unpack_strings
+)
+
+from Game.GameSetup.GameRandom import (
+    GameRandom
+)
+
+#snapshot file: header, then a zlib-compressed body in which every name is an index into one string table
+MAGIC = b"CLSN"
+FORMAT_VERSION = 3
+FILE_HEADER = struct.Struct("<4sH")
+PLAYER_HEADER = struct.Struct("<HB")
+POSITION = struct.Struct("<HI")
+RNG_SECTION = struct.Struct("<BQB")
+RNG_HEADER = struct.Struct("<BH")
+GAUSS = struct.Struct("<Bd")
+
+MASK_CARDS = 1
+
+
+#game position whose forks share player records and weapon positions until one side writes to them
+class GameState:
+    __slots__ = ("selected_players", "solution_data", "index", "turn", "layout", "rng_seed", "rng_states",
+                 "_players", "_owned", "_weapons", "_weapons_owned")
+
+    def __init__(self, selected_players, solution_data, player_states, weapons_locations, index=0, turn=0,
+                 layout=None):
+        self.selected_players = tuple(selected_players)
+        self.solution_data = solution_data
+        self.index = index
+        self.turn = turn
+        # the mansion graph the game is played on, never written, so forks share it
+        self.layout = layout
+        # random state read from a snapshot, kept until restore_random hands it to a generator
+        self.rng_seed = None
+        self.rng_states = None
+        # the caller's dicts are borrowed, never written: every update copies first
+        self._players = dict(player_states)
+        self._owned = set()
+        self._weapons = weapons_locations
+        self._weapons_owned = False
+
+    def fork(self):
+        child = GameState.__new__(GameState)
+        child.selected_players = self.selected_players
+        child.solution_data = self.solution_data
+        child.index = self.index
+        child.turn = self.turn
+        child.layout = self.layout
+        child.rng_seed = self.rng_seed
+        child.rng_states = self.rng_states
+        child._players = dict(self._players)
+        child._owned = set()
+        child._weapons = self._weapons
+        child._weapons_owned = False
+        # after a fork both sides share everything, so the parent has to copy on its next write too
+        self._owned = set()
+        self._weapons_owned = False
+        return child
+
+    def player(self, name):
+        # read-only view; use player_for_update to change a record
+        return self._players[name]
+
+    def player_for_update(self, name):
+        if name not in self._owned:
+            record = dict(self._players[name])
+            record["history"] = list(record["history"])
+            if isinstance(record["seen_cards"], list):
+                record["seen_cards"] = list(record["seen_cards"])
+            self._players[name] = record
+            self._owned.add(name)
+        return self._players[name]
+
+    @property
+    def weapons_locations(self):
+        return self._weapons
+
+    def weapons_for_update(self):
+        if not self._weapons_owned:
+            self._weapons = dict(self._weapons)
+            self._weapons_owned = True
+        return self._weapons
+
+    def restore_random(self, rng):
+        # a GameRandom gets every stream back; a single random.Random gets the snapshot's plain stream
+        if not self.rng_states:
+            return
+        if isinstance(rng, GameRandom):
+            rng.setstate(self.rng_states)
+        elif "" in self.rng_states:
+            rng.setstate(self.rng_states[""])
+
+    @property
+    def current_player(self):
+        return self.selected_players[self.index]
+
+    def advance(self):
+        self.index = (self.index + 1) % len(self.selected_players)
+
+    def move_player(self, name, room):
+        record = self.player_for_update(name)
+        record["location"] = room
+        record["history"].append(room)
+
+    def eliminate(self, name):
+        self.player_for_update(name)["active"] = False
+
+    def record_seen(self, name, card, registry=None):
+        record = self.player_for_update(name)
+        if registry is not None:
+            record["seen_cards"] |= registry.bits[card]
+        else:
+            record["seen_cards"].append(card)
+
+    def suggest(self, current_player, suggestion, rng=random, registry=None):
+        # same side effects and random draws as process_suggestion, without touching unread records
+        suspect, weapon, room = suggestion
+        if suspect in self._players and self._players[suspect]["location"] != room:
+            self.move_player(suspect, room)
+        if self._weapons.get(weapon) != room:
+            self.weapons_for_update()[weapon] = room
+
+        players = self.selected_players
+        start_idx = players.index(current_player)
+        num = len(players)
+        for offset in range(1, num):
+            responder = players[(start_idx + offset) % num]
+            hand = self._players[responder]["hand"]
+            if registry is not None:
+                bits = registry.bits
+                matching = [card for card in (suspect, weapon, room) if hand & bits[card]]
+            else:
+                matching = [card for card in (suspect, weapon, room) if card in hand]
+            if matching:
+                shown_card = rng.choice(matching)
+                self.record_seen(current_player, shown_card, registry)
+                return responder, shown_card
+        return None
+
+    def player_states(self):
+        # independent plain dicts in the shape game.py uses
+        states = {}
+        for name in self.selected_players:
+            record = dict(self._players[name])
+            record["history"] = list(record["history"])
+            if isinstance(record["seen_cards"], list):
+                record["seen_cards"] = list(record["seen_cards"])
+            states[name] = record
+        return states
+
+
+def _pack_ids(values):
+    return struct.pack("<H", len(values)) + array("H", values).tobytes()
+
+
+def _unpack_ids(data, pos):
+    (count,) = struct.unpack_from("<H", data, pos)
+    pos += 2
+    ids = array("H")
+    ids.frombytes(data[pos:pos + 2 * count])
+    return ids.tolist(), pos + 2 * count
+
+
+def snapshot_to_bytes(state, rng=None):
+    names = {}
+
+    def name_id(name):
+        if name not in names:
+            names[name] = len(names)
+        return names[name]
+
+    players = state.selected_players
+    records = [state.player(name) for name in players]
+    mask_cards = bool(records) and isinstance(records[0]["hand"], int)
+    body = [
+        _pack_ids([name_id(name) for name in players]),
+        _pack_ids([name_id(state.solution_data[key]) for key in ("character", "weapon", "room")]),
+        struct.pack("<B", MASK_CARDS if mask_cards else 0),
+    ]
+    for record in records:
+        body.append(PLAYER_HEADER.pack(name_id(record["location"]), record["active"]))
+        if mask_cards:
+            body.append(struct.pack("<QQ", record["hand"], record["seen_cards"]))
+        else:
+            body.append(_pack_ids([name_id(card) for card in record["hand"]]))
+            body.append(_pack_ids([name_id(card) for card in record["seen_cards"]]))
+        body.append(_pack_ids([name_id(room) for room in record["history"]]))
+    weapon_pairs = []
+    for weapon, room in state.weapons_locations.items():
+        weapon_pairs += (name_id(weapon), name_id(room))
+    body.append(_pack_ids(weapon_pairs))
+    body.append(POSITION.pack(state.index, state.turn))
+
+    # the layout as one neighbor list per room, so a resumed game never has to regenerate it
+    layout = state.layout or {}
+    body.append(_pack_ids([name_id(room) for room in layout]))
+    for neighbors in layout.values():
+        body.append(_pack_ids([name_id(room) for room in neighbors]))
+        body.append(array("I", neighbors.values()).tobytes())
+
+    if isinstance(rng, GameRandom):
+        streams = rng.getstate()
+        body.append(RNG_SECTION.pack(True, rng.seed, len(streams)))
+    else:
+        streams = {} if rng is None else {"": rng.getstate()}
+        body.append(RNG_SECTION.pack(False, 0, len(streams)))
+    for stream_name, (version, internal, gauss_next) in streams.items():
+        encoded = stream_name.encode("utf-8")
+        body.append(struct.pack("<B", len(encoded)) + encoded)
+        body.append(RNG_HEADER.pack(version, len(internal)))
+        body.append(array("I", internal).tobytes())
+        body.append(GAUSS.pack(gauss_next is not None, gauss_next or 0.0))
+
+    payload = pack_strings(list(names)) + b"".join(body)
+    return FILE_HEADER.pack(MAGIC, FORMAT_VERSION) + zlib.compress(payload)
+
+
+def snapshot_from_bytes(blob, rng=None):
+    # returns the restored GameState; the rng (a GameRandom or a random.Random), if given,
+    # is put back into the captured state, otherwise the state is kept for restore_random
+    magic, version = FILE_HEADER.unpack_from(blob)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"Not a version {FORMAT_VERSION} game snapshot.")
+    data = zlib.decompress(blob[FILE_HEADER.size:])
+    names, pos = unpack_strings(data, 0)
+    player_ids, pos = _unpack_ids(data, pos)
+    solution_ids, pos = _unpack_ids(data, pos)
+    mask_cards = data[pos] & MASK_CARDS
+    pos += 1
+
+    players = [names[i] for i in player_ids]
+    solution_data = dict(zip(("character", "weapon", "room"), (names[i] for i in solution_ids)))
+    player_states = {}
+    for name in players:
+        location, active = PLAYER_HEADER.unpack_from(data, pos)
+        pos += PLAYER_HEADER.size
+        if mask_cards:
+            hand, seen_cards = struct.unpack_from("<QQ", data, pos)
+            pos += 16
+        else:
+            hand_ids, pos = _unpack_ids(data, pos)
+            seen_ids, pos = _unpack_ids(data, pos)
+            hand = [names[i] for i in hand_ids]
+            seen_cards = [names[i] for i in seen_ids]
+        history_ids, pos = _unpack_ids(data, pos)
+        player_states[name] = {
+            "location": names[location],
+            "history": [names[i] for i in history_ids],
+            "hand": hand,
+            "active": bool(active),
+            "seen_cards": seen_cards,
+        }
+    weapon_pairs, pos = _unpack_ids(data, pos)
+    weapons_locations = {names[weapon_pairs[i]]: names[weapon_pairs[i + 1]] for i in range(0, len(weapon_pairs), 2)}
+    index, turn = POSITION.unpack_from(data, pos)
+    pos += POSITION.size
+
+    room_ids, pos = _unpack_ids(data, pos)
+    layout = {}
+    for room in room_ids:
+        neighbor_ids, pos = _unpack_ids(data, pos)
+        costs = array("I")
+        costs.frombytes(data[pos:pos + 4 * len(neighbor_ids)])
+        pos += 4 * len(neighbor_ids)
+        layout[names[room]] = {names[i]: cost for i, cost in zip(neighbor_ids, costs)}
+
+    has_seed, rng_seed, num_streams = RNG_SECTION.unpack_from(data, pos)
+    pos += RNG_SECTION.size
+    rng_states = {}
+    for _ in range(num_streams):
+        length = data[pos]
+        stream_name = data[pos + 1:pos + 1 + length].decode("utf-8")
+        pos += 1 + length
+        rng_version, state_len = RNG_HEADER.unpack_from(data, pos)
+        pos += RNG_HEADER.size
+        internal = array("I")
+        internal.frombytes(data[pos:pos + 4 * state_len])
+        pos += 4 * state_len
+        has_gauss, gauss_next = GAUSS.unpack_from(data, pos)
+        pos += GAUSS.size
+        rng_states[stream_name] = (rng_version, tuple(internal), gauss_next if has_gauss else None)
+
+    state = GameState(players, solution_data, player_states, weapons_locations, index, turn, layout or None)
+    state.rng_seed = rng_seed if has_seed else None
+    state.rng_states = rng_states
+    if rng is not None:
+        state.restore_random(rng)
+    # freshly decoded records belong to nobody else, so no copy is needed on the first write
+    state._owned = set(players)
+    state._weapons_owned = True
+    return state
+
+
+def save_snapshot(path, state, rng=None):
+    with open(path, "wb") as f:
+        f.write(snapshot_to_bytes(state, rng))
+
+
+def load_snapshot(path, rng=None):
+    with open(path, "rb") as f:
+        return snapshot_from_bytes(f.read(), rng)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the game position stored in a snapshot file.")
+    parser.add_argument("snapshot", help="Snapshot file written by game.py --save.")
+    args = parser.parse_args()
+
+    state = load_snapshot(args.snapshot)
+    print(f"Turn {state.turn}, next player: {state.current_player}, game seed: {state.rng_seed}")
+    for name in state.selected_players:
+        record = state.player(name)
+        status = "active" if record["active"] else "eliminated"
+        print(f"  {name}: {record['location']} ({status})")
+    for weapon, room in state.weapons_locations.items():
+        print(f"  {weapon}: {room}")
@@ -0,0 +1,138 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from Game.GameSetup.CardRegistry import CardRegistry
+
+
+#K deals held as arrays; card and character indexes follow CardRegistry bit order
+class BatchDeal:
+    def __init__(self, registry, solution, seats, hand_masks):
+        self.registry = registry
+        self.solution = solution          # (K, 3) card indexes: character, weapon, room
+        self.seats = seats                # (K, P) character index of the player in each seat
+        self.hand_masks = hand_masks      # (K, P) CardRegistry bitmasks
+
+    def __len__(self):
+        return len(self.solution)
+
+    def hand_matrix(self):
+        bits = np.uint64(1) << np.arange(len(self.registry), dtype=np.uint64)
+        return (self.hand_masks[:, :, None].astype(np.uint64) & bits) != 0
+
+    def hand_sizes(self):
+        masks = self.hand_masks.astype(np.uint64)
+        sizes = np.zeros(masks.shape, dtype=np.int64)
+        for bit in range(len(self.registry)):
+            sizes += ((masks >> np.uint64(bit)) & np.uint64(1)).astype(np.int64)
+        return sizes
+
+    def hand_size_distribution(self):
+        sizes = self.hand_sizes()
+        distribution = {}
+        for seat in range(sizes.shape[1]):
+            counts = np.bincount(sizes[:, seat])
+            distribution[seat] = {int(size): int(count) for size, count in enumerate(counts) if count}
+        return distribution
+
+    def deal_at(self, index):
+        registry = self.registry
+        cards = registry.cards
+        solution_data = {
+            "room": cards[self.solution[index, 2]],
+            "weapon": cards[self.solution[index, 1]],
+            "character": cards[self.solution[index, 0]],
+        }
+        hands = {
+            registry.characters[seat]: sorted(registry.cards_in(int(mask)))
+            for seat, mask in zip(self.seats[index], self.hand_masks[index])
+        }
+        return solution_data, hands
+
+    def write_files(self, index, solution_file=None, hands_file=None):
+        # either file may be skipped
+        solution_data, hands = self.deal_at(index)
+        if solution_file:
+            with open(solution_file, "w", encoding="utf-8") as f:
+                json.dump(solution_data, f, indent=2)
+        if hands_file:
+            with open(hands_file, "w", encoding="utf-8") as f:
+                json.dump(hands, f, indent=2)
+
+
+#same dealing rules as deal_card_lists (uniform solution per category, shuffled remainder dealt
+#round-robin to a random subset of characters), but K deals per call with no per-deal Python work
+class BatchDealer:
+    def __init__(self, rooms, weapons, characters):
+        self.registry = CardRegistry(rooms, weapons, characters)
+        if len(self.registry) > 64:
+            raise ValueError("Batch dealing supports at most 64 cards.")
+
+    @classmethod
+    def from_files(cls, room_file, weapon_file, character_file):
+        registry = CardRegistry.from_files(room_file, weapon_file, character_file)
+        return cls(registry.rooms, registry.weapons, registry.characters)
+
+    def deal(self, num_deals, num_players, rng=None, chunk_size=1 << 18):
+        registry = self.registry
+        num_characters = len(registry.characters)
+        if num_players > num_characters:
+            raise ValueError(f"Requested {num_players} players but only {num_characters} characters available.")
+        if not isinstance(rng, np.random.Generator):
+            rng = np.random.default_rng(rng)
+
+        mask_type = np.uint32 if len(registry) <= 32 else np.uint64
+        solution = np.empty((num_deals, 3), dtype=np.int64)
+        seats = np.empty((num_deals, num_players), dtype=np.int64)
+        hand_masks = np.zeros((num_deals, num_players), dtype=mask_type)
+        for start in range(0, num_deals, chunk_size):
+            stop = min(start + chunk_size, num_deals)
+            self._deal_chunk(rng, num_players, solution[start:stop], seats[start:stop], hand_masks[start:stop])
+        return BatchDeal(registry, solution, seats, hand_masks)
+
+    def _deal_chunk(self, rng, num_players, solution, seats, hand_masks):
+        registry = self.registry
+        count = len(solution)
+        num_characters = len(registry.characters)
+        num_weapons = len(registry.weapons)
+        rows = np.arange(count)[:, None]
+
+        solution[:, 0] = rng.integers(0, num_characters, count)
+        solution[:, 1] = num_characters + rng.integers(0, num_weapons, count)
+        solution[:, 2] = num_characters + num_weapons + rng.integers(0, len(registry.rooms), count)
+
+        # random sort keys give an independent permutation per row; solution cards sort last and are cut off
+        keys = rng.random((count, len(registry)))
+        keys[rows, solution] = 2.0
+        remaining = np.argsort(keys, axis=1)[:, :len(registry) - 3]
+
+        seats[:] = np.argsort(rng.random((count, num_characters)), axis=1)[:, :num_players]
+
+        card_bits = (np.ones(1, dtype=hand_masks.dtype) << np.arange(len(registry), dtype=hand_masks.dtype))
+        dealt_bits = card_bits[remaining]
+        for seat in range(num_players):
+            hand_masks[:, seat] = np.bitwise_or.reduce(dealt_bits[:, seat::num_players], axis=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deal many Cluedo games at once and report hand sizes per seat.")
+    parser.add_argument("--rooms", default="Room.txt", help="Path to rooms list file.")
+    parser.add_argument("--weapons", default="Weapon.txt", help="Path to weapons list file.")
+    parser.add_argument("--characters", default="Character.txt", help="Path to characters list file.")
+    parser.add_argument("--deals", type=int, default=1000000, help="Number of deals to generate.")
+    parser.add_argument("--players", type=int, default=3, help="Number of active players per deal.")
+    parser.add_argument("--seed", type=int, default=None, help="Optional seed for numpy's Generator.")
+    parser.add_argument("--solution-out", default=None, help="Write the first deal's solution to this file.")
+    parser.add_argument("--hands-out", default=None, help="Write the first deal's hands to this file.")
+    args = parser.parse_args()
+
+    dealer = BatchDealer.from_files(args.rooms, args.weapons, args.characters)
+    started = time.perf_counter()
+    batch = dealer.deal(args.deals, args.players, args.seed)
+    elapsed = time.perf_counter() - started
+    print(f"Dealt {len(batch)} games in {elapsed:.2f} s ({len(batch) / elapsed:,.0f} deals/sec).")
+    print("Hand size distribution by seat:", json.dumps(batch.hand_size_distribution()))
+    if args.solution_out or args.hands_out:
+        batch.write_files(0, args.solution_out, args.hands_out)
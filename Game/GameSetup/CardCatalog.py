@@ -0,0 +1,92 @@
+import argparse
+import os
+import sys
+import time
+
+SETUP_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOM_FILE = os.path.join(SETUP_DIR, "Room.txt")
+WEAPON_FILE = os.path.join(SETUP_DIR, "Weapon.txt")
+CHARACTER_FILE = os.path.join(SETUP_DIR, "Character.txt")
+
+
+#each card file is read once and re-read only when its mtime or size changes;
+#every caller gets the same tuple of interned names, so it must be treated as read-only
+class CardCatalog:
+    def __init__(self, check_interval=1.0):
+        # files are stat'ed at most once per check_interval seconds, so hot callers pay a dict lookup
+        self.check_interval = check_interval
+        self._cache = {}
+        self.reads = 0
+
+    def load(self, filename):
+        now = time.monotonic()
+        cached = self._cache.get(filename)
+        if cached is not None and now - cached[2] < self.check_interval:
+            return cached[1]
+
+        path = os.path.abspath(filename)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"{filename} does not exist.") from None
+        version = (stat.st_mtime_ns, stat.st_size)
+        if cached is None:
+            cached = self._cache.get(path)
+        if cached is not None and cached[0] == version:
+            cards = cached[1]
+        else:
+            with open(path, encoding="utf-8") as f:
+                cards = tuple(sys.intern(line.strip()) for line in f if line.strip())
+            self.reads += 1
+        # keyed by both spellings of the name, so relative and absolute callers share one entry
+        self._cache[path] = self._cache[filename] = (version, cards, now)
+        return cards
+
+    def rooms(self, room_file=ROOM_FILE):
+        return self.load(room_file)
+
+    def weapons(self, weapon_file=WEAPON_FILE):
+        return self.load(weapon_file)
+
+    def characters(self, character_file=CHARACTER_FILE):
+        return self.load(character_file)
+
+    def card_lists(self, room_file=ROOM_FILE, weapon_file=WEAPON_FILE, character_file=CHARACTER_FILE):
+        return self.load(room_file), self.load(weapon_file), self.load(character_file)
+
+    def invalidate(self, filename=None):
+        if filename is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(filename, None)
+            self._cache.pop(os.path.abspath(filename), None)
+
+
+_catalog = CardCatalog()
+
+
+def default_catalog():
+    return _catalog
+
+
+def load_card_list(filename):
+    return _catalog.load(filename)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the card lists and the cost of a cached lookup.")
+    parser.add_argument("--lookups", type=int, default=100000, help="Cached lookups to time.")
+    args = parser.parse_args()
+
+    catalog = default_catalog()
+    rooms, weapons, characters = catalog.card_lists()
+    print("Rooms:", ", ".join(rooms))
+    print("Weapons:", ", ".join(weapons))
+    print("Characters:", ", ".join(characters))
+
+    started = time.perf_counter()
+    for _ in range(args.lookups):
+        catalog.card_lists()
+    elapsed = time.perf_counter() - started
+    print(f"{args.lookups} cached lookups of all three lists in {elapsed:.3f} s "
+          f"({elapsed / args.lookups * 1e6:.2f} us each), {catalog.reads} file reads")
@@ -0,0 +1,88 @@
+from array import array
+
+from Game.GameSetup.CardCatalog import load_card_list
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+#every card gets one bit (characters, then weapons, then rooms), so hands, seen cards
+#and suggestions are plain ints and a refutation check is a single AND
+class CardRegistry:
+    def __init__(self, rooms, weapons, characters):
+        self.characters = list(characters)
+        self.weapons = list(weapons)
+        self.rooms = list(rooms)
+        self.cards = self.characters + self.weapons + self.rooms
+        if len(set(self.cards)) != len(self.cards):
+            raise ValueError("Card names must be unique across rooms, weapons and characters.")
+        self.bits = {card: 1 << i for i, card in enumerate(self.cards)}
+        self.character_mask = self.mask(self.characters)
+        self.weapon_mask = self.mask(self.weapons)
+        self.room_mask = self.mask(self.rooms)
+        self.all_mask = (1 << len(self.cards)) - 1
+
+    @classmethod
+    def from_files(cls, room_file, weapon_file, character_file):
+        return cls(load_card_list(room_file), load_card_list(weapon_file), load_card_list(character_file))
+
+    def __len__(self):
+        return len(self.cards)
+
+    def bit(self, card):
+        return self.bits[card]
+
+    def mask(self, cards):
+        bits = self.bits
+        result = 0
+        for card in cards:
+            result |= bits[card]
+        return result
+
+    def cards_in(self, mask):
+        cards = self.cards
+        result = []
+        while mask:
+            low = mask & -mask
+            result.append(cards[low.bit_length() - 1])
+            mask ^= low
+        return result
+
+    def solution_mask(self, solution_data):
+        return self.bits[solution_data["character"]] | self.bits[solution_data["weapon"]] | self.bits[solution_data["room"]]
+
+    def solution_from_mask(self, mask):
+        return {
+            "room": self.cards_in(mask & self.room_mask)[0],
+            "weapon": self.cards_in(mask & self.weapon_mask)[0],
+            "character": self.cards_in(mask & self.character_mask)[0],
+        }
+
+
+#fixed-width rows of (solution mask, hand mask per seat) in one flat array,
+#a few bytes per deal instead of a dict of string lists
+class DealArchive:
+    def __init__(self, registry, num_players):
+        self.registry = registry
+        self.num_players = num_players
+        self.masks = array("I" if len(registry) <= 32 else "Q")
+
+    def __len__(self):
+        return len(self.masks) // (self.num_players + 1)
+
+    def append(self, solution_mask, hand_masks):
+        if len(hand_masks) != self.num_players:
+            raise ValueError(f"Expected {self.num_players} hands, got {len(hand_masks)}.")
+        self.masks.append(solution_mask)
+        self.masks.extend(hand_masks)
+
+    def __getitem__(self, index):
+        row = self.num_players + 1
+        start = index * row
+        if index < 0 or start >= len(self.masks):
+            raise IndexError(index)
+        return self.masks[start], list(self.masks[start + 1:start + row])
+
+    def nbytes(self):
+        return self.masks.itemsize * len(self.masks)
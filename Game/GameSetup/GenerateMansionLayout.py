@@ -1,30 +1,78 @@
 import random
 import json
 
-def load_rooms(filename):
-    with open(filename, 'r') as f:
-        rooms = [line.strip() for line in f if line.strip()]
-    return rooms
+from Game.GameSetup.CardCatalog import (
+    ROOM_FILE,
+    load_card_list
+)
+from Game.GameSetup.MansionGraph import MansionGraph
+
+def generate_random_weighted_graph_with_secrets(rooms, seed=42, max_edges_per_room=5, max_cost=10, secret_chance=0.2,
+                                                rng=None, mode="compatible"):
+    # "compatible" reproduces the historical layouts exactly but is O(R^2);
+    # "scalable" samples neighbours by index in O(R) and returns a MansionGraph
+    if mode == "scalable":
+        return generate_scalable_mansion_graph(rooms, seed, max_edges_per_room, max_cost, secret_chance, rng)
+    if mode != "compatible":
+        raise ValueError(f"Unknown generator mode '{mode}'.")
 
-def generate_random_weighted_graph_with_secrets(rooms, seed=42, max_edges_per_room=5, max_cost=10, secret_chance=0.2):
-    random.seed(seed)
+    # a private generator gives the same layout as seeding the global stream, without touching it
+    if rng is None:
+        rng = random.Random(seed)
     graph = {room: {} for room in rooms}
 
     for room in rooms:
-        num_edges = random.randint(1, max_edges_per_room)
+        num_edges = rng.randint(1, max_edges_per_room)
         possible_targets = [r for r in rooms if r != room and r not in graph[room]]
-        edges = random.sample(possible_targets, min(num_edges, len(possible_targets)))
+        edges = rng.sample(possible_targets, min(num_edges, len(possible_targets)))
 
         for target in edges:
             # Decide if this edge is a secret passage (cost = 0)
-            if random.random() < secret_chance:
+            if rng.random() < secret_chance:
                 cost = 0  # secret passage
             else:
-                cost = random.randint(1, max_cost)
+                cost = rng.randint(1, max_cost)
             graph[room][target] = cost
             graph[target][room] = cost
     return graph
 
+def stream_random_weighted_edges(num_rooms, seed=42, max_edges_per_room=5, max_cost=10, secret_chance=0.2, rng=None):
+    # yields undirected (room index, room index, cost) edges without ever building the candidate list:
+    # targets are drawn by index and only re-drawn when they repeat within the same room.
+    # A pair drawn again from the other side overwrites the earlier cost, as in the dict generator
+    if rng is None:
+        rng = random.Random(seed)
+    for i in range(num_rooms):
+        num_edges = min(rng.randint(1, max_edges_per_room), num_rooms - 1)
+        picked = []
+        while len(picked) < num_edges:
+            j = rng.randrange(num_rooms - 1)
+            if j >= i:
+                j += 1
+            if j not in picked:
+                picked.append(j)
+        for j in picked:
+            if rng.random() < secret_chance:
+                cost = 0  # secret passage
+            else:
+                cost = rng.randint(1, max_cost)
+            yield i, j, cost
+
+def generate_scalable_mansion_graph(rooms, seed=42, max_edges_per_room=5, max_cost=10, secret_chance=0.2, rng=None):
+    edges = stream_random_weighted_edges(len(rooms), seed, max_edges_per_room, max_cost, secret_chance, rng)
+    return MansionGraph.from_edges(rooms, edges)
+
+def save_edges_to_file(edges, filename):
+    with open(filename, 'w') as f:
+        for u, v, cost in edges:
+            f.write(f"{u}\t{v}\t{cost}\n")
+
+def load_edges_from_file(filename):
+    with open(filename, 'r') as f:
+        for line in f:
+            u, v, cost = line.split("\t")
+            yield int(u), int(v), int(cost)
+
 def print_weighted_graph(graph):
     for room, neighbors in graph.items():
         edges_str = ', '.join([f"{nbr} (cost: {cost}{' - Secret Passage' if cost == 0 else ''})"
@@ -32,6 +80,8 @@ def print_weighted_graph(graph):
         print(f"{room}: {edges_str}")
 
 def save_graph_to_json(graph, filename):
+    if hasattr(graph, "to_dict"):
+        graph = graph.to_dict()
     with open(filename, 'w') as f:
         json.dump(graph, f, indent=2)
 
@@ -41,7 +91,7 @@ def load_graph_from_json(filename):
     return graph
 
 if __name__ == "__main__":
-    rooms = load_rooms("Room.txt")
+    rooms = list(load_card_list(ROOM_FILE))
     mansion_graph = generate_random_weighted_graph_with_secrets(rooms, seed=123, secret_chance=0.25)
     save_graph_to_json(mansion_graph, "mansion_layout.json")
     loaded_graph = load_graph_from_json("mansion_layout.json")
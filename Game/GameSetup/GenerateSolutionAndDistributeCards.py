@@ -1,31 +1,19 @@
 import random
 import json
-from pathlib import Path
 import argparse
 
-def read_cards(filename):
-    path = Path(filename)
-    if not path.is_file():
-        raise FileNotFoundError(f"{filename} does not exist.")
-    with open(path, encoding="utf-8") as f:
-        return [line.strip() for line in f if line.strip()]
-
-def deal_cards(room_file, weapon_file, character_file,
-               solution_file, hands_file, seed=None, active_players=None):
-    if seed is not None:
-        random.seed(seed)
-
-    rooms = read_cards(room_file)
-    weapons = read_cards(weapon_file)
-    characters = read_cards(character_file)
+from Game.GameSetup.CardCatalog import (
+    load_card_list
+)
 
+def deal_card_lists(rooms, weapons, characters, active_players=None, rng=random):
     if not rooms or not weapons or not characters:
         raise ValueError("One of the input files is empty.")
 
     # Choose solution cards
-    solution_room = random.choice(rooms)
-    solution_weapon = random.choice(weapons)
-    solution_character = random.choice(characters)
+    solution_room = rng.choice(rooms)
+    solution_weapon = rng.choice(weapons)
+    solution_character = rng.choice(characters)
 
     # Prepare remaining cards (excluding solution)
     remaining = []
@@ -33,7 +21,7 @@ def deal_cards(room_file, weapon_file, character_file,
     remaining += [w for w in weapons if w != solution_weapon]
     remaining += [c for c in characters if c != solution_character]
 
-    random.shuffle(remaining)
+    rng.shuffle(remaining)
 
     # Determine active players
     if active_players is None:
@@ -42,7 +30,7 @@ def deal_cards(room_file, weapon_file, character_file,
         if isinstance(active_players, int):
             if active_players > len(characters):
                 raise ValueError(f"Requested {active_players} players but only {len(characters)} characters available.")
-            players = random.sample(characters, active_players)
+            players = rng.sample(characters, active_players)
         else:
             players = active_players
 
@@ -63,14 +51,34 @@ def deal_cards(room_file, weapon_file, character_file,
         "weapon": solution_weapon,
         "character": solution_character
     }
-    with open(solution_file, "w", encoding="utf-8") as f:
-        json.dump(solution_data, f, indent=2)
+    return solution_data, hands
+
+def deal_cards(room_file, weapon_file, character_file,
+               solution_file, hands_file, seed=None, active_players=None, rng=None, registry=None):
+    # with a CardRegistry the deal comes back as (solution mask, {player: hand mask});
+    # the JSON files, when requested, are still written with card names
+    # a seed gets its own generator (same draws as seeding the global one, without touching it)
+    if rng is None:
+        rng = random.Random(seed) if seed is not None else random
+
+    rooms = load_card_list(room_file)
+    weapons = load_card_list(weapon_file)
+    characters = load_card_list(character_file)
+
+    solution_data, hands = deal_card_lists(rooms, weapons, characters, active_players, rng)
+
+    if solution_file is not None:
+        with open(solution_file, "w", encoding="utf-8") as f:
+            json.dump(solution_data, f, indent=2)
 
     # Save hands
-    with open(hands_file, "w", encoding="utf-8") as f:
-        json.dump(hands, f, indent=2)
+    if hands_file is not None:
+        with open(hands_file, "w", encoding="utf-8") as f:
+            json.dump(hands, f, indent=2)
 
 
+    if registry is not None:
+        return registry.solution_mask(solution_data), {player: registry.mask(hand) for player, hand in hands.items()}
     return solution_data, hands
 
 if __name__ == "__main__":
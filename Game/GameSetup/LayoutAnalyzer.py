@@ -0,0 +1,214 @@
+import argparse
+import csv
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Game.AlgorithmForSelectingPossibleMoves.LimitedUniformCostSearch import (
+    limited_uniform_cost_search,
+    reachable_with_roll
+)
+
+from Game.GameSetup.CardCatalog import (
+    ROOM_FILE,
+    load_card_list
+)
+
+from Game.GameSetup.GenerateMansionLayout import (
+    generate_random_weighted_graph_with_secrets
+)
+
+DIE_FACES = 6
+
+#one column per metric, in output order; "q" columns are integers, "d" columns floats
+COLUMNS = [
+    ("seed", "q"),
+    ("rooms", "q"),
+    ("edges", "q"),
+    ("secret_edges", "q"),
+    ("secret_ratio", "d"),
+    ("min_degree", "q"),
+    ("max_degree", "q"),
+    ("components", "q"),
+    ("largest_component", "q"),
+    ("connected", "q"),
+    ("secret_clusters", "q"),
+    ("largest_secret_cluster", "q"),
+    ("rooms_with_secret", "q"),
+    ("diameter", "d"),
+    ("mean_distance", "d"),
+    ("unreachable_pairs", "q"),
+] + [
+    (f"reach{roll}_{stat}", "q" if stat == "min" else "d")
+    for roll in range(1, DIE_FACES + 1) for stat in ("min", "mean")
+]
+
+
+def _clusters(rooms, edges):
+    # union-find over the given (room, room) edges; returns the size of every cluster
+    parent = {room: room for room in rooms}
+
+    def find(room):
+        while parent[room] != room:
+            parent[room] = parent[parent[room]]
+            room = parent[room]
+        return room
+
+    for a, b in edges:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_a] = root_b
+    sizes = {}
+    for room in rooms:
+        root = find(room)
+        sizes[root] = sizes.get(root, 0) + 1
+    return list(sizes.values())
+
+
+def analyze_layout(graph):
+    # metrics of one layout (dict of dicts or MansionGraph); distances follow LUCS rules, so two
+    # secret passages in a row are not a path, and a room's reach for a roll excludes the room itself
+    rooms = list(graph)
+    num_rooms = len(rooms)
+    pairs = [(room, neighbor, cost) for room in rooms for neighbor, cost in graph[room].items() if room < neighbor]
+    degrees = [len(graph[room]) for room in rooms]
+    components = _clusters(rooms, [(a, b) for a, b, _ in pairs])
+    secret_pairs = [(a, b) for a, b, cost in pairs if cost == 0]
+    secret_clusters = [size for size in _clusters(rooms, secret_pairs) if size > 1]
+    with_secret = {room for pair in secret_pairs for room in pair}
+
+    # one unbounded search per room gives both the distances and, as a prefix, every die roll's reach
+    budget = sum(cost for _, _, cost in pairs)
+    distances = []
+    reach = [[] for _ in range(DIE_FACES + 1)]
+    for room in rooms:
+        reachable = limited_uniform_cost_search(graph, room, budget)
+        distances.extend(cost for _, cost in reachable)
+        for roll in range(1, DIE_FACES + 1):
+            reach[roll].append(len(reachable_with_roll(reachable, roll)))
+
+    metrics = {
+        "rooms": num_rooms,
+        "edges": len(pairs),
+        "secret_edges": len(secret_pairs),
+        "secret_ratio": len(secret_pairs) / len(pairs) if pairs else 0.0,
+        "min_degree": min(degrees, default=0),
+        "max_degree": max(degrees, default=0),
+        "components": len(components),
+        "largest_component": max(components, default=0),
+        "connected": int(len(components) == 1),
+        "secret_clusters": len(secret_clusters),
+        "largest_secret_cluster": max(secret_clusters, default=0),
+        "rooms_with_secret": len(with_secret),
+        "diameter": float(max(distances)) if distances else float("nan"),
+        "mean_distance": sum(distances) / len(distances) if distances else float("nan"),
+        "unreachable_pairs": num_rooms * (num_rooms - 1) - len(distances),
+    }
+    for roll in range(1, DIE_FACES + 1):
+        metrics[f"reach{roll}_min"] = min(reach[roll], default=0)
+        metrics[f"reach{roll}_mean"] = sum(reach[roll]) / num_rooms if num_rooms else 0.0
+    return metrics
+
+
+#loaded once per worker process by the pool initializer
+_worker_rooms = None
+
+
+def _init_worker(room_file):
+    global _worker_rooms
+    _worker_rooms = list(load_card_list(room_file))
+
+
+def analyze_seed_range(first_seed, count, rooms=None, generator_options=None):
+    # columnar results for seeds first_seed .. first_seed + count - 1, as {column: array}
+    rooms = rooms if rooms is not None else _worker_rooms
+    options = generator_options or {}
+    columns = {name: array(code) for name, code in COLUMNS}
+    for seed in range(first_seed, first_seed + count):
+        graph = generate_random_weighted_graph_with_secrets(rooms, seed=seed, **options)
+        metrics = analyze_layout(graph)
+        metrics["seed"] = seed
+        for name, _ in COLUMNS:
+            columns[name].append(metrics[name])
+    return columns
+
+
+def seed_chunks(first_seed, num_seeds, chunk_size):
+    for start in range(first_seed, first_seed + num_seeds, chunk_size):
+        yield start, min(chunk_size, first_seed + num_seeds - start)
+
+
+def analyze_layouts(num_seeds, first_seed=0, workers=None, chunk_size=1000, room_file=ROOM_FILE,
+                    generator_options=None):
+    # chunks come back in seed order whatever the worker count, so the output is reproducible
+    columns = {name: array(code) for name, code in COLUMNS}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(room_file,)) as executor:
+        futures = [
+            executor.submit(analyze_seed_range, start, count, None, generator_options)
+            for start, count in seed_chunks(first_seed, num_seeds, chunk_size)
+        ]
+        for future in futures:
+            for name, values in future.result().items():
+                columns[name].extend(values)
+    return {name: np.frombuffer(values, dtype=np.int64 if code == "q" else np.float64)
+            for (name, code), values in zip(COLUMNS, columns.values())}
+
+
+def write_csv(columns, path):
+    names = [name for name, _ in COLUMNS]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        writer.writerows(zip(*(columns[name].tolist() for name in names)))
+
+
+def write_npz(columns, path):
+    np.savez_compressed(path, **columns)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate mansion layouts for a seed range and measure their quality.")
+    parser.add_argument("--seeds", type=int, default=10000, help="Number of layout seeds to analyze.")
+    parser.add_argument("--first-seed", type=int, default=0, help="First layout seed.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Seeds per work unit sent to a worker.")
+    parser.add_argument("--rooms", default=ROOM_FILE, help="Room list to build the layouts from.")
+    parser.add_argument("--max-edges", type=int, default=5, help="Generator: most new edges drawn per room.")
+    parser.add_argument("--max-cost", type=int, default=10, help="Generator: highest hallway cost.")
+    parser.add_argument("--secret-chance", type=float, default=0.25, help="Generator: chance an edge is secret.")
+    parser.add_argument("--output", default=None,
+                        help="Write the columns to this .csv file, or to numpy arrays when it ends in .npz.")
+    parser.add_argument("--sort-by", default="reach2_min", help="Column that ranks the printed seeds (highest first).")
+    parser.add_argument("--top", type=int, default=10, help="How many of the best connected seeds to print.")
+    args = parser.parse_args()
+
+    options = {"max_edges_per_room": args.max_edges, "max_cost": args.max_cost, "secret_chance": args.secret_chance}
+    started = time.perf_counter()
+    columns = analyze_layouts(args.seeds, args.first_seed, args.workers, args.chunk_size, args.rooms, options)
+    elapsed = time.perf_counter() - started
+    print(f"Analyzed {args.seeds} layouts in {elapsed:.1f} s ({args.seeds / elapsed:.0f} layouts/s)")
+
+    if args.output:
+        if os.path.splitext(args.output)[1] == ".npz":
+            write_npz(columns, args.output)
+        else:
+            write_csv(columns, args.output)
+        print(f"Wrote {args.output}")
+
+    connected = columns["connected"].astype(bool)
+    print(f"Connected: {connected.mean():.1%}, mean diameter {np.nanmean(columns['diameter']):.2f}, "
+          f"mean secret ratio {columns['secret_ratio'].mean():.2f}")
+    for roll in range(1, DIE_FACES + 1):
+        worst = columns[f"reach{roll}_min"]
+        print(f"  roll {roll}: rooms reachable from the worst start room, mean {worst.mean():.2f}, "
+              f"layouts where some room reaches nothing {(worst == 0).mean():.1%}")
+
+    seeds = np.flatnonzero(connected)
+    ranked = seeds[np.argsort(-columns[args.sort_by][seeds], kind="stable")][:args.top]
+    print(f"Best connected seeds by {args.sort_by}:")
+    for i in ranked:
+        print(f"  seed {columns['seed'][i]}: {args.sort_by}={columns[args.sort_by][i]:g}, "
+              f"diameter={columns['diameter'][i]:g}, secret_edges={columns['secret_edges'][i]}")
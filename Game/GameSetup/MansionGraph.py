@@ -0,0 +1,145 @@
+from array import array
+from collections.abc import Mapping
+
+
+class NeighborView(Mapping):
+    __slots__ = ("_graph", "_start", "_end")
+
+    def __init__(self, graph, room_id):
+        self._graph = graph
+        self._start = graph.offsets[room_id]
+        self._end = graph.offsets[room_id + 1]
+
+    def __getitem__(self, room):
+        target = self._graph.room_ids.get(room)
+        targets = self._graph.targets
+        for pos in range(self._start, self._end):
+            if targets[pos] == target:
+                return self._graph.costs[pos]
+        raise KeyError(room)
+
+    def __iter__(self):
+        names = self._graph.names
+        targets = self._graph.targets
+        for pos in range(self._start, self._end):
+            yield names[targets[pos]]
+
+    def __len__(self):
+        return self._end - self._start
+
+    def items(self):
+        names = self._graph.names
+        graph = self._graph
+        return [(names[graph.targets[pos]], graph.costs[pos]) for pos in range(self._start, self._end)]
+
+
+#read-only mansion layout: room names interned to ids, hallways stored as CSR arrays
+#(offsets[i]:offsets[i + 1] is the slice of targets/costs leaving room i).
+#ids follow room-name order so searches break ties exactly like the dict-based LUCS;
+#order keeps the original room order for iteration and export
+class MansionGraph(Mapping):
+    # layouts are immutable, so move tables built on one never go stale
+    version = 0
+
+    def __init__(self, names, offsets, targets, costs, order=None):
+        self.names = list(names)
+        self.room_ids = {name: i for i, name in enumerate(self.names)}
+        self.offsets = offsets
+        self.targets = targets
+        self.costs = costs
+        self.order = order if order is not None else array("I", range(len(self.names)))
+
+    @staticmethod
+    def _intern(names):
+        names = sorted(names)
+        return names, {name: i for i, name in enumerate(names)}
+
+    @classmethod
+    def from_dict(cls, graph):
+        rooms = list(graph)
+        seen = set(rooms)
+        for neighbors in graph.values():
+            for room in neighbors:
+                if room not in seen:
+                    seen.add(room)
+                    rooms.append(room)
+        names, room_ids = cls._intern(rooms)
+        offsets = array("q", [0])
+        targets = array("I")
+        costs = array("i")
+        for name in names:
+            neighbors = graph.get(name, {})
+            targets.extend(room_ids[room] for room in neighbors)
+            costs.extend(neighbors.values())
+            offsets.append(len(targets))
+        return cls(names, offsets, targets, costs, array("I", (room_ids[room] for room in rooms)))
+
+    @classmethod
+    def from_edges(cls, rooms, edges):
+        # edges are undirected (u, v, cost) triples of indexes into rooms; a repeated pair keeps
+        # its first position and last cost, the same as assigning into a dict of dicts
+        names, room_ids = cls._intern(rooms)
+        order = array("I", (room_ids[room] for room in rooms))
+        num_rooms = len(names)
+        sources = array("I")
+        dests = array("I")
+        weights = array("i")
+        for u, v, cost in edges:
+            u = order[u]
+            v = order[v]
+            sources.append(u)
+            dests.append(v)
+            weights.append(cost)
+            sources.append(v)
+            dests.append(u)
+            weights.append(cost)
+
+        degree = array("q", bytes(8 * (num_rooms + 1)))
+        for u in sources:
+            degree[u + 1] += 1
+        for i in range(num_rooms):
+            degree[i + 1] += degree[i]
+        fill = array("q", degree)
+        slot_targets = array("I", bytes(4 * len(sources)))
+        slot_costs = array("i", bytes(4 * len(sources)))
+        for u, v, cost in zip(sources, dests, weights):
+            pos = fill[u]
+            slot_targets[pos] = v
+            slot_costs[pos] = cost
+            fill[u] = pos + 1
+        del sources, dests, weights, fill
+
+        offsets = array("q", [0])
+        targets = array("I")
+        costs = array("i")
+        for i in range(num_rooms):
+            row = dict(zip(slot_targets[degree[i]:degree[i + 1]], slot_costs[degree[i]:degree[i + 1]]))
+            targets.extend(row.keys())
+            costs.extend(row.values())
+            offsets.append(len(targets))
+        return cls(names, offsets, targets, costs, order)
+
+    def to_dict(self):
+        return {name: dict(self[name].items()) for name in self}
+
+    def __getitem__(self, room):
+        room_id = self.room_ids.get(room)
+        if room_id is None:
+            raise KeyError(room)
+        return NeighborView(self, room_id)
+
+    def __iter__(self):
+        names = self.names
+        return (names[room_id] for room_id in self.order)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, room):
+        return room in self.room_ids
+
+    def num_edges(self):
+        return len(self.targets)
+
+    def nbytes(self):
+        return sum(a.itemsize * len(a) for a in (self.offsets, self.targets, self.costs, self.order))
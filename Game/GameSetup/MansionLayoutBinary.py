@@ -0,0 +1,254 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from Game.GameSetup.GenerateMansionLayout import (
+    load_graph_from_json
+)
+from Game.GameSetup.MansionGraph import MansionGraph
+
+#file layout (little endian, every section 8-byte aligned):
+#  header        magic, version, room count, directed edge count, string table size
+#  name_offsets  int64[rooms + 1]   slices of the string table, rooms in id (= name) order
+#  order         uint32[rooms]      ids in the original room order
+#  offsets       int64[rooms + 1]   CSR row starts
+#  targets       uint32[edges]
+#  costs         int32[edges]
+#  strings       utf-8 room names
+MAGIC = b"CLML"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHIQQ")
+
+
+def _aligned(size):
+    return (size + 7) & ~7
+
+
+def _section_sizes(num_rooms, num_edges):
+    return [
+        ("name_offsets", "q", num_rooms + 1),
+        ("order", "I", num_rooms),
+        ("offsets", "q", num_rooms + 1),
+        ("targets", "I", num_edges),
+        ("costs", "i", num_edges),
+    ]
+
+
+def _is_layout(data):
+    # header, magic and version, and a file long enough for every section the header announces
+    if len(data) < HEADER.size:
+        return False
+    magic, version, _, num_rooms, num_edges, strings_size = HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return False
+    size = _aligned(HEADER.size) + sum(_aligned(count * struct.calcsize(typecode))
+                                       for _, typecode, count in _section_sizes(num_rooms, num_edges))
+    return len(data) >= size + strings_size
+
+
+def _non_decreasing(values):
+    return all(a <= b for a, b in zip(values, values[1:]))
+
+
+def _valid_sections(num_rooms, num_edges, strings_size, sections):
+    # the header only promises the file is long enough; the arrays still have to describe a graph
+    # before anything indexes with them
+    name_offsets = sections["name_offsets"]
+    offsets = sections["offsets"]
+    if name_offsets[0] != 0 or name_offsets[num_rooms] != strings_size or not _non_decreasing(name_offsets):
+        return False
+    if offsets[0] != 0 or offsets[num_rooms] != num_edges or not _non_decreasing(offsets):
+        return False
+    if num_edges and max(sections["targets"]) >= num_rooms:
+        return False
+    return sorted(sections["order"]) == list(range(num_rooms))
+
+
+def save_graph_to_binary(graph, filename):
+    if not isinstance(graph, MansionGraph):
+        graph = MansionGraph.from_dict(graph)
+
+    encoded = [name.encode("utf-8") for name in graph.names]
+    name_offsets = array("q", [0])
+    for name in encoded:
+        name_offsets.append(name_offsets[-1] + len(name))
+    sections = {
+        "name_offsets": name_offsets,
+        "order": array("I", graph.order),
+        "offsets": array("q", graph.offsets),
+        "targets": array("I", graph.targets),
+        "costs": array("i", graph.costs),
+    }
+
+    with open(filename, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(graph.names), len(graph.targets), name_offsets[-1]))
+        f.write(bytes(_aligned(HEADER.size) - HEADER.size))
+        for name, typecode, _ in _section_sizes(len(graph.names), len(graph.targets)):
+            data = sections[name]
+            if sys.byteorder == "big":
+                data = array(typecode, data)
+                data.byteswap()
+            raw = data.tobytes()
+            f.write(raw)
+            f.write(bytes(_aligned(len(raw)) - len(raw)))
+        for name in encoded:
+            f.write(name)
+
+
+#read-only view over a binary layout file; nothing is parsed up front, the arrays are
+#memoryviews straight into the mapped file, so it can also be handed to
+#limited_uniform_cost_search_ids like a MansionGraph
+class MappedMansionLayout:
+    version = 0
+
+    def __init__(self, filename):
+        if sys.byteorder == "big":
+            raise ValueError("Memory-mapped layouts are little endian; use load_graph_from_binary instead.")
+        self._file = open(filename, "rb")
+        self._map = None
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file cannot be mapped
+            self.close()
+            raise ValueError(f"{filename} is not a mansion layout file.") from None
+        if not _is_layout(self._map):
+            self.close()
+            raise ValueError(f"{filename} is not a version {FORMAT_VERSION} mansion layout file.")
+        _, _, _, num_rooms, num_edges, strings_size = HEADER.unpack_from(self._map)
+        self.num_rooms = num_rooms
+        view = memoryview(self._map)
+        pos = _aligned(HEADER.size)
+        for name, typecode, count in _section_sizes(num_rooms, num_edges):
+            size = count * struct.calcsize(typecode)
+            setattr(self, name, view[pos:pos + size].cast(typecode))
+            pos += _aligned(size)
+        view.release()
+        self._strings_start = pos
+        if not _valid_sections(num_rooms, num_edges, strings_size, self.__dict__):
+            self.close()
+            raise ValueError(f"{filename} has corrupt adjacency or name tables.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for name in ("name_offsets", "order", "offsets", "targets", "costs"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __len__(self):
+        return self.num_rooms
+
+    def _name_bytes(self, room_id):
+        start = self._strings_start
+        return self._map[start + self.name_offsets[room_id]:start + self.name_offsets[room_id + 1]]
+
+    def room_name(self, room_id):
+        return self._name_bytes(room_id).decode("utf-8")
+
+    def room_id(self, room):
+        # ids are assigned in name order and UTF-8 keeps code point order,
+        # so the raw string table is sorted and can be bisected without decoding
+        key = room.encode("utf-8")
+        lo, hi = 0, self.num_rooms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name_bytes(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.num_rooms and self._name_bytes(lo) == key:
+            return lo
+        raise KeyError(room)
+
+    def rooms(self):
+        return [self.room_name(room_id) for room_id in self.order]
+
+    def neighbors(self, room):
+        room_id = self.room_id(room)
+        lo = self.offsets[room_id]
+        hi = self.offsets[room_id + 1]
+        return [(self.room_name(target), cost) for target, cost in zip(self.targets[lo:hi], self.costs[lo:hi])]
+
+    def to_mansion_graph(self):
+        start = self._strings_start
+        strings = self._map[start:start + self.name_offsets[self.num_rooms]]
+        offsets = self.name_offsets.tolist()
+        names = [strings[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(self.num_rooms)]
+        return MansionGraph(names, array("q", self.offsets), array("I", self.targets), array("i", self.costs),
+                            array("I", self.order))
+
+
+#a file that fails validation is read from its JSON twin instead (same path, .json extension, or json_file)
+def load_graph_from_binary(filename, json_file=None):
+    if json_file is None:
+        json_file = os.path.splitext(filename)[0] + ".json"
+    try:
+        return _read_binary(filename)
+    except ValueError:
+        if not os.path.exists(json_file):
+            raise
+    return MansionGraph.from_dict(load_graph_from_json(json_file))
+
+
+def _read_binary(filename):
+    if sys.byteorder == "big":
+        with open(filename, "rb") as f:
+            data = f.read()
+        if not _is_layout(data):
+            raise ValueError(f"{filename} is not a version {FORMAT_VERSION} mansion layout file.")
+        _, _, _, num_rooms, num_edges, strings_size = HEADER.unpack_from(data)
+        pos = _aligned(HEADER.size)
+        sections = {}
+        for name, typecode, count in _section_sizes(num_rooms, num_edges):
+            values = array(typecode)
+            values.frombytes(data[pos:pos + count * values.itemsize])
+            values.byteswap()
+            sections[name] = values
+            pos += _aligned(count * values.itemsize)
+        if not _valid_sections(num_rooms, num_edges, strings_size, sections):
+            raise ValueError(f"{filename} has corrupt adjacency or name tables.")
+        strings = data[pos:pos + strings_size]
+        offsets = sections["name_offsets"]
+        names = [strings[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(num_rooms)]
+        return MansionGraph(names, sections["offsets"], sections["targets"], sections["costs"], sections["order"])
+
+    with MappedMansionLayout(filename) as layout:
+        return layout.to_mansion_graph()
+
+
+def json_to_binary(json_file, binary_file):
+    with open(json_file, "r") as f:
+        graph = json.load(f)
+    save_graph_to_binary(graph, binary_file)
+
+
+def binary_to_json(binary_file, json_file):
+    graph = load_graph_from_binary(binary_file)
+    with open(json_file, "w") as f:
+        json.dump(graph.to_dict(), f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert mansion layouts between JSON and the binary format.")
+    parser.add_argument("source", help="Input layout file (.json or binary).")
+    parser.add_argument("target", help="Output layout file.")
+    args = parser.parse_args()
+
+    if args.source.endswith(".json"):
+        json_to_binary(args.source, args.target)
+    else:
+        binary_to_json(args.source, args.target)
@@ -0,0 +1,211 @@
+import json
+import math
+import os
+import time
+from array import array
+from collections import Counter
+
+ENV_VAR = "CLUEDO_PROFILE"
+
+clock = time.perf_counter
+
+#run totals are log-spaced histograms: 10 ns .. ~3 h in buckets 2% wide, so memory and the
+#report stay the same size however many games are played
+HISTOGRAM_MIN = 1e-8
+HISTOGRAM_GROWTH = 1.02
+HISTOGRAM_BUCKETS = 1400
+_LOG_GROWTH = math.log(HISTOGRAM_GROWTH)
+
+
+def percentile(sorted_samples, fraction):
+    if not sorted_samples:
+        return None
+    index = min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))
+    return sorted_samples[index]
+
+
+class PhaseStats:
+    __slots__ = ("samples",)
+
+    def __init__(self):
+        self.samples = array("d")
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        return {
+            "count": len(ordered),
+            "total_ms": sum(ordered) * 1e3,
+            "p50_us": percentile(ordered, 0.50) * 1e6,
+            "p95_us": percentile(ordered, 0.95) * 1e6,
+            "p99_us": percentile(ordered, 0.99) * 1e6,
+            "max_us": ordered[-1] * 1e6,
+        }
+
+
+class PhaseHistogram:
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets = array("Q", bytes(8 * HISTOGRAM_BUCKETS))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def extend(self, samples):
+        buckets = self.buckets
+        last = HISTOGRAM_BUCKETS - 1
+        for seconds in samples:
+            if seconds > HISTOGRAM_MIN:
+                buckets[min(last, int(math.log(seconds / HISTOGRAM_MIN) / _LOG_GROWTH))] += 1
+            else:
+                buckets[0] += 1
+            if seconds > self.max:
+                self.max = seconds
+        self.count += len(samples)
+        self.total += sum(samples)
+
+    def percentile(self, fraction):
+        # geometric middle of the bucket holding the sample percentile() would pick
+        rank = min(self.count - 1, int(fraction * self.count))
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen > rank:
+                return min(self.max, HISTOGRAM_MIN * HISTOGRAM_GROWTH ** (index + 0.5))
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1e3,
+            "p50_us": self.percentile(0.50) * 1e6,
+            "p95_us": self.percentile(0.95) * 1e6,
+            "p99_us": self.percentile(0.99) * 1e6,
+            "max_us": self.max * 1e6,
+        }
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "started")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.started = clock()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, clock() - self.started)
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+
+_NULL_PHASE = _NullPhase()
+
+
+#timers and counters for the current game, folded into the run totals by end_game. keep_games also
+#keeps every game's own summary in the report: right for one interactive game, not for batch runs
+class PhaseProfiler:
+    def __init__(self, keep_games=True):
+        self.keep_games = keep_games
+        self.phases = {}
+        self.counters = Counter()
+        self.total_phases = {}
+        self.total_counters = Counter()
+        self.games = []
+
+    def add(self, name, seconds):
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats()
+        stats.samples.append(seconds)
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def end_game(self, label=None):
+        if self.keep_games:
+            game = {"game": label, "phases": {name: stats.summary() for name, stats in self.phases.items()},
+                    "counters": dict(self.counters)}
+            self.games.append(game)
+        for name, stats in self.phases.items():
+            total = self.total_phases.get(name)
+            if total is None:
+                total = self.total_phases[name] = PhaseHistogram()
+            total.extend(stats.samples)
+        self.total_counters.update(self.counters)
+        self.phases = {}
+        self.counters = Counter()
+
+    def report(self):
+        if self.phases or self.counters:
+            self.end_game()
+        return {
+            "aggregate": {
+                "phases": {name: stats.summary() for name, stats in sorted(self.total_phases.items())},
+                "counters": dict(sorted(self.total_counters.items())),
+            },
+            "games": self.games,
+        }
+
+    def write_report(self, path=None):
+        text = json.dumps(self.report(), indent=2)
+        if path is None or path == "-":
+            print(text)
+        else:
+            with open(path, "w") as f:
+                f.write(text)
+
+
+_active = None
+
+
+def enable(keep_games=None):
+    # keep_games defaults to True; passing it also changes a profiler already enabled by the environment
+    global _active
+    if _active is None:
+        _active = PhaseProfiler(True if keep_games is None else keep_games)
+    elif keep_games is not None:
+        _active.keep_games = keep_games
+    return _active
+
+
+def disable():
+    global _active
+    profiler = _active
+    _active = None
+    return profiler
+
+
+def active_profiler():
+    # hot loops read this once and guard their timers with "if profiler is not None"
+    return _active
+
+
+def phase(name):
+    # cheap enough for per-turn code; disabled, it hands back one shared no-op context
+    if _active is None:
+        return _NULL_PHASE
+    return _Phase(_active, name)
+
+
+def count(name, amount=1):
+    if _active is not None:
+        _active.counters[name] += amount
+
+
+if os.environ.get(ENV_VAR, "").strip() not in ("", "0"):
+    enable()
@@ -0,0 +1,309 @@
+import argparse
+import asyncio
+import json
+
+from Game.AlgorithmForSelectingPossibleMoves.MoveTable import (
+    MoveTable
+)
+
+from Game.GameSetup.GameRandom import (
+    GameRandom,
+    new_game_seed
+)
+
+from Game.GameSetup.GenerateSolutionAndDistributeCards import (
+    deal_card_lists
+)
+
+from Game.Simulation.HeadlessSimulation import (
+    load_default_setup
+)
+
+from Game.game import (
+    check_accusation,
+    init_player_locations,
+    process_suggestion
+)
+
+#turn phases, in order
+WAITING = "waiting"
+ACCUSE_OR_ROLL = "accuse_or_roll"
+MOVE = "move"
+SUGGEST = "suggest"
+ACCUSE_OR_END = "accuse_or_end"
+FINISHED = "finished"
+
+
+class RequestError(Exception):
+    pass
+
+
+#one game: the same turn rules as the game.py loop, driven by client requests instead of input()
+class Table:
+    __slots__ = ("table_id", "setup", "num_players", "random", "clients", "players", "player_states",
+                 "weapons_locations", "solution", "index", "phase", "roll", "options")
+
+    def __init__(self, table_id, setup, num_players, game_random):
+        self.table_id = table_id
+        self.setup = setup
+        self.num_players = num_players
+        self.random = game_random
+        self.clients = []
+        self.players = None
+        self.player_states = None
+        self.weapons_locations = None
+        self.solution = None
+        self.index = 0
+        self.phase = WAITING
+        self.roll = None
+        self.options = None
+
+    def is_open(self):
+        return self.phase == WAITING and len(self.clients) < self.num_players
+
+    def seat_of(self, client):
+        return self.clients.index(client)
+
+    def current_player(self):
+        return self.players[self.index]
+
+    def add_client(self, client):
+        self.clients.append(client)
+        client.send({"event": "joined", "table": self.table_id, "seat": len(self.clients) - 1,
+                     "players": self.num_players})
+        if len(self.clients) == self.num_players:
+            self.start()
+
+    def broadcast(self, message):
+        for client in self.clients:
+            client.send(message)
+
+    def start(self):
+        _, rooms, weapons, characters, _ = self.setup
+        self.solution, hands = deal_card_lists(rooms, weapons, characters, self.num_players, self.random.deal)
+        self.players = list(hands.keys())
+        locations = init_player_locations(self.players, rooms, rng=self.random.start, verbose=False)
+        self.player_states = {
+            name: {
+                "location": locations[name]["location"],
+                "history": locations[name]["history"],
+                "hand": hands[name],
+                "active": True,
+                "seen_cards": [],
+            }
+            for name in self.players
+        }
+        self.weapons_locations = {w: self.random.start.choice(rooms) for w in weapons}
+        for client, name in zip(self.clients, self.players):
+            client.player = name
+            # hands only ever go to their owner
+            client.send({"event": "game_started", "player": name, "players": self.players,
+                         "hand": self.player_states[name]["hand"], "location": self.player_states[name]["location"],
+                         "rooms": rooms, "weapons": weapons, "characters": characters})
+        self.index = 0
+        self.begin_turn()
+
+    def begin_turn(self):
+        for _ in range(len(self.players)):
+            if self.player_states[self.current_player()]["active"]:
+                self.phase = ACCUSE_OR_ROLL
+                self.broadcast({"event": "turn", "player": self.current_player(), "phase": self.phase})
+                return
+            self.index = (self.index + 1) % len(self.players)
+        self.finish(None)
+
+    def end_turn(self):
+        self.index = (self.index + 1) % len(self.players)
+        self.begin_turn()
+
+    def finish(self, winner):
+        self.phase = FINISHED
+        self.broadcast({"event": "game_over", "winner": winner, "solution": self.solution})
+
+    def handle(self, client, request):
+        op = request.get("op")
+        if self.phase in (WAITING, FINISHED):
+            raise RequestError(f"Table {self.table_id} is not in play.")
+        player = client.player
+        if player != self.current_player():
+            raise RequestError("It is not your turn.")
+        state = self.player_states[player]
+        mansion_graph, rooms, weapons, characters, move_table = self.setup
+
+        if op == "accuse" and self.phase in (ACCUSE_OR_ROLL, ACCUSE_OR_END):
+            accusation = (request.get("suspect"), request.get("weapon"), request.get("room"))
+            if accusation[0] not in characters or accusation[1] not in weapons or accusation[2] not in rooms:
+                raise RequestError("Invalid suspect, weapon or room.")
+            correct = check_accusation(accusation, self.solution)
+            self.broadcast({"event": "accusation", "player": player, "accusation": accusation, "correct": correct})
+            if correct:
+                self.finish(player)
+            else:
+                state["active"] = False
+                self.end_turn()
+            return {"correct": correct}
+
+        if op == "roll" and self.phase == ACCUSE_OR_ROLL:
+            self.roll = self.random.dice.randint(1, 6)
+            self.options = move_table.reachable(state["location"], self.roll)
+            self.broadcast({"event": "rolled", "player": player, "roll": self.roll})
+            if self.options:
+                self.phase = MOVE
+            else:
+                self.phase = SUGGEST
+            return {"roll": self.roll, "options": self.options, "phase": self.phase}
+
+        if op == "move" and self.phase == MOVE:
+            room = request.get("room")
+            if room not in {r for r, _ in self.options}:
+                raise RequestError("Invalid move. Please choose a room from the options.")
+            state["location"] = room
+            state["history"].append(room)
+            self.phase = SUGGEST
+            self.broadcast({"event": "moved", "player": player, "room": room})
+            return {"phase": self.phase}
+
+        if op == "suggest" and self.phase == SUGGEST:
+            suspect = request.get("suspect")
+            weapon = request.get("weapon")
+            if suspect not in characters or weapon not in weapons:
+                raise RequestError("Invalid suspect or weapon.")
+            suggestion = (suspect, weapon, state["location"])
+            refutation = process_suggestion(player, suggestion, self.player_states, self.players,
+                                            self.weapons_locations, verbose=False, rng=self.random.refute)
+            refuter = refutation[0] if refutation else None
+            self.broadcast({"event": "suggestion", "player": player, "suggestion": suggestion, "refuter": refuter})
+            self.phase = ACCUSE_OR_END
+            # the shown card is private to the suggester
+            return {"refuter": refuter, "shown_card": refutation[1] if refutation else None, "phase": self.phase}
+
+        if op == "end_turn" and self.phase == ACCUSE_OR_END:
+            self.end_turn()
+            return {}
+
+        raise RequestError(f"'{op}' is not allowed during {self.phase}.")
+
+
+class ClientConnection:
+    __slots__ = ("writer", "table", "player")
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.table = None
+        self.player = None
+
+    def send(self, message):
+        if not self.writer.is_closing():
+            self.writer.write(json.dumps(message).encode() + b"\n")
+
+
+class GameServer:
+    def __init__(self, setup, seed=None):
+        self.setup = setup
+        # table i plays GameRandom.for_game(seed, i)
+        self.seed = new_game_seed() if seed is None else seed
+        self.tables = {}
+        self.open_tables = {}
+        self.next_table_id = 0
+
+    def find_table(self, num_players):
+        table = self.open_tables.get(num_players)
+        if table is None or not table.is_open():
+            table = Table(self.next_table_id, self.setup, num_players,
+                          GameRandom.for_game(self.seed, self.next_table_id))
+            self.tables[table.table_id] = table
+            self.open_tables[num_players] = table
+            self.next_table_id += 1
+        return table
+
+    def dispatch(self, client, request):
+        op = request.get("op")
+        if op == "join":
+            if client.table is not None and client.table.phase != FINISHED:
+                raise RequestError("Already seated at a table.")
+            num_players = int(request.get("players", 3))
+            if not 3 <= num_players <= len(self.setup[3]):
+                raise RequestError(f"Number of players must be between 3 and {len(self.setup[3])}.")
+            self.leave(client)
+            table = self.find_table(num_players)
+            client.table = table
+            table.add_client(client)
+            return {"table": table.table_id}
+        if op == "stats":
+            return {"tables": len(self.tables)}
+        if client.table is None:
+            raise RequestError("Join a table first.")
+        return client.table.handle(client, request)
+
+    def leave(self, client):
+        table = client.table
+        client.table = None
+        client.player = None
+        if table is None:
+            return
+        if client in table.clients and table.phase == WAITING:
+            table.clients.remove(client)
+        if table.phase == FINISHED or not table.clients:
+            self.tables.pop(table.table_id, None)
+            # an emptied waiting table must not take new players either
+            if self.open_tables.get(table.num_players) is table:
+                del self.open_tables[table.num_players]
+
+    async def handle_connection(self, reader, writer):
+        client = ClientConnection(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise RequestError("Requests must be JSON objects.")
+                    reply = {"reply": request.get("id"), "ok": True}
+                    reply.update(self.dispatch(client, request))
+                except (RequestError, ValueError, TypeError) as error:
+                    reply = {"reply": request.get("id") if isinstance(request, dict) else None,
+                             "ok": False, "error": str(error)}
+                client.send(reply)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            table = client.table
+            if table is not None and table.phase not in (WAITING, FINISHED):
+                table.broadcast({"event": "game_over", "winner": None, "solution": table.solution,
+                                 "reason": f"{client.player} disconnected"})
+                table.phase = FINISHED
+            self.leave(client)
+            writer.close()
+
+
+def load_server_setup():
+    mansion_graph, rooms, weapons, characters = load_default_setup()
+    return mansion_graph, rooms, weapons, characters, MoveTable(mansion_graph)
+
+
+async def serve(host="127.0.0.1", port=8765, unix_path=None, seed=None):
+    server = GameServer(load_server_setup(), seed)
+    if unix_path:
+        listener = await asyncio.start_unix_server(server.handle_connection, path=unix_path)
+        print(f"Cluedo server listening on {unix_path}")
+    else:
+        listener = await asyncio.start_server(server.handle_connection, host, port)
+        print(f"Cluedo server listening on {host}:{port}")
+    async with listener:
+        await listener.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Host many Cluedo tables over a line-delimited JSON socket protocol.")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP host to bind.")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port to bind.")
+    parser.add_argument("--unix", default=None, help="Listen on this Unix socket path instead of TCP.")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Root seed; table i draws from GameRandom.for_game(seed, i) (random if omitted).")
+    args = parser.parse_args()
+
+    asyncio.run(serve(args.host, args.port, args.unix, args.seed))
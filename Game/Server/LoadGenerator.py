@@ -0,0 +1,179 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+
+from Game.Server.GameServer import (
+    GameServer,
+    load_server_setup
+)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+#a scripted player: rolls, moves and suggests at random, accuses once it has seen all but three cards
+class SimulatedClient:
+    def __init__(self, reader, writer, num_players, rng, latencies):
+        self.reader = reader
+        self.writer = writer
+        self.num_players = num_players
+        self.rng = rng
+        self.latencies = latencies
+        self.ids = itertools.count()
+        self.pending = {}
+        self.events = asyncio.Queue()
+        self.player = None
+        self.known = set()
+        self.cards = None
+        self.games = 0
+        self.turns = 0
+
+    async def read_loop(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            if "reply" in message:
+                future = self.pending.pop(message["reply"], None)
+                if future is not None:
+                    future.set_result(message)
+            else:
+                self.events.put_nowait(message)
+        await self.events.put({"event": "closed"})
+
+    async def request(self, **request):
+        request_id = next(self.ids)
+        request["id"] = request_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        started = time.perf_counter()
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        reply = await future
+        self.latencies.append(time.perf_counter() - started)
+        return reply
+
+    def accusation(self):
+        unknown = [[card for card in cards if card not in self.known] for cards in self.cards]
+        if all(len(cards) == 1 for cards in unknown):
+            return {"suspect": unknown[0][0], "weapon": unknown[1][0], "room": unknown[2][0]}
+        return None
+
+    async def play_turn(self):
+        self.turns += 1
+        reply = await self.request(op="roll")
+        if reply["options"]:
+            await self.request(op="move", room=self.rng.choice(reply["options"])[0])
+        characters, weapons, _ = self.cards
+        suspects = [c for c in characters if c not in self.known] or characters
+        arms = [w for w in weapons if w not in self.known] or weapons
+        reply = await self.request(op="suggest", suspect=self.rng.choice(suspects), weapon=self.rng.choice(arms))
+        if reply["shown_card"]:
+            self.known.add(reply["shown_card"])
+        accusation = self.accusation()
+        if accusation:
+            await self.request(op="accuse", **accusation)
+        else:
+            await self.request(op="end_turn")
+
+    async def run(self, deadline):
+        reader_task = asyncio.create_task(self.read_loop())
+        try:
+            while time.perf_counter() < deadline:
+                self.player = None
+                await self.request(op="join", players=self.num_players)
+                while True:
+                    if self.player is None:
+                        # past the deadline nobody else may come to fill the table
+                        try:
+                            event = await asyncio.wait_for(self.events.get(), max(deadline - time.perf_counter(), 1.0))
+                        except asyncio.TimeoutError:
+                            kind = "closed"
+                            break
+                    else:
+                        event = await self.events.get()
+                    kind = event["event"]
+                    if kind == "game_started":
+                        self.player = event["player"]
+                        self.known = set(event["hand"])
+                        self.cards = (event["characters"], event["weapons"], event["rooms"])
+                    elif kind == "turn" and event["player"] == self.player:
+                        await self.play_turn()
+                    elif kind in ("game_over", "closed"):
+                        self.games += 1
+                        break
+                if kind == "closed":
+                    break
+        finally:
+            reader_task.cancel()
+            self.writer.close()
+
+
+async def run_load(clients, duration, num_players, unix_path=None, host="127.0.0.1", port=0, seed=0,
+                   external=False):
+    # without an external server, one is hosted in this process (clients and server then share a core)
+    listener = None
+    if not external:
+        server = GameServer(load_server_setup(), seed)
+        if unix_path:
+            listener = await asyncio.start_unix_server(server.handle_connection, path=unix_path, backlog=clients)
+        else:
+            listener = await asyncio.start_server(server.handle_connection, host, port, backlog=clients)
+            port = listener.sockets[0].getsockname()[1]
+    if unix_path:
+        connect = lambda: asyncio.open_unix_connection(unix_path)
+    else:
+        connect = lambda: asyncio.open_connection(host, port)
+
+    latencies = []
+    rng = random.Random(seed)
+    simulated = []
+    for _ in range(clients):
+        reader, writer = await connect()
+        simulated.append(SimulatedClient(reader, writer, num_players, random.Random(rng.getrandbits(64)), latencies))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client.run(started + duration) for client in simulated))
+    elapsed = time.perf_counter() - started
+    if listener is not None:
+        listener.close()
+        await listener.wait_closed()
+
+    latencies.sort()
+    turns = sum(client.turns for client in simulated)
+    return {
+        "clients": clients,
+        "seconds": elapsed,
+        "games": sum(client.games for client in simulated) // num_players,
+        "turns_per_sec": turns / elapsed,
+        "requests": len(latencies),
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50) * 1e3,
+            "p95": percentile(latencies, 0.95) * 1e3,
+            "p99": percentile(latencies, 0.99) * 1e3,
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure Cluedo server turn latency with many simulated clients.")
+    parser.add_argument("--clients", type=int, default=1000, help="Concurrent simulated clients.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to keep starting new games.")
+    parser.add_argument("--players", type=int, default=3, help="Players per table.")
+    parser.add_argument("--unix", default=None, help="Use a Unix socket at this path instead of TCP.")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP host of the server.")
+    parser.add_argument("--port", type=int, default=0, help="TCP port of the server.")
+    parser.add_argument("--external", action="store_true",
+                        help="Connect to an already running GameServer instead of hosting one in-process.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the server and the simulated clients.")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_load(args.clients, args.duration, args.players, args.unix, args.host, args.port,
+                                  seed=args.seed, external=args.external))
+    print(json.dumps(result, indent=2))
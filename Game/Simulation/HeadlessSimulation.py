@@ -0,0 +1,523 @@
+import argparse
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from Game.AI.MctsPlayer import (
+    MctsPlayer,
+    search_pool
+)
+
+from Game.AlgorithmForSelectingPossibleMoves.MoveTable import (
+    MoveTable
+)
+
+from Game.GameSetup.GenerateMansionLayout import (
+    generate_random_weighted_graph_with_secrets
+)
+
+from Game.GameSetup.CardCatalog import (
+    default_catalog
+)
+
+from Game.Deduction.DetectiveNotebook import (
+    DetectiveNotebook
+)
+
+from Game.Deduction.SolutionEstimator import (
+    SolutionEstimator
+)
+
+from Game.Deduction.SuggestionOptimizer import (
+    SuggestionOptimizer
+)
+
+from Game.GameSetup.CardRegistry import (
+    CardRegistry
+)
+
+from Game.GameSetup.GameRandom import (
+    GameRandom
+)
+
+from Game.GameSetup.GenerateSolutionAndDistributeCards import (
+    deal_card_lists
+)
+
+from Game.GameRecording.EventLog import (
+    EventLogWriter
+)
+
+from Game.Instrumentation.PhaseTimers import (
+    active_profiler,
+    clock,
+    enable
+)
+
+from Game.game import (
+    init_player_locations,
+    process_suggestion,
+    check_accusation
+)
+
+
+#policies get the player's state dict (location, and "hand"/"seen_cards" as CardRegistry bitmasks),
+#the game's CardRegistry and their own stream of the game's GameRandom; start_game hooks get the
+#GameRandom itself, to seed whatever the policy samples with
+class RandomMovePolicy:
+    def choose_move(self, player, state, reachable_rooms, rng):
+        return rng.choice(reachable_rooms)[0]
+
+
+class UnseenCardSuggestionPolicy:
+    def choose_suggestion(self, player, state, registry, room, rng):
+        unknown = ~(state["hand"] | state["seen_cards"])
+        suspects = registry.cards_in(registry.character_mask & unknown) or registry.characters
+        arms = registry.cards_in(registry.weapon_mask & unknown) or registry.weapons
+        return rng.choice(suspects), rng.choice(arms), room
+
+
+class DeductionAccusationPolicy:
+    def choose_accusation(self, player, state, registry):
+        unknown = ~(state["hand"] | state["seen_cards"])
+        for category in (registry.character_mask, registry.weapon_mask, registry.room_mask):
+            remaining = category & unknown
+            # exactly one unseen card left in every category
+            if not remaining or remaining & (remaining - 1):
+                return None
+        solution = registry.solution_from_mask(unknown & registry.all_mask)
+        return solution["character"], solution["weapon"], solution["room"]
+
+
+#keeps a DetectiveNotebook per seat, so it also uses who failed to refute and unresolved refutations
+class NotebookAccusationPolicy:
+    def start_game(self, registry, selected_players, player_states, game_random):
+        self.notebooks = {}
+        for player in selected_players:
+            notebook = DetectiveNotebook(registry, selected_players, me=player)
+            notebook.observe_own_hand(player_states[player]["hand"])
+            self.notebooks[player] = notebook
+
+    def observe_suggestion(self, suggester, suggestion, refuter, shown_card):
+        for player, notebook in self.notebooks.items():
+            notebook.record_suggestion(suggester, suggestion, refuter, shown_card if player == suggester else None)
+
+    def observe_accusation(self, accuser, accusation, correct):
+        if not correct:
+            for notebook in self.notebooks.values():
+                notebook.record_failed_accusation(accusation)
+
+    def choose_accusation(self, player, state, registry):
+        return self.notebooks[player].solved()
+
+
+#also accuses on a strong enough posterior, before the notebook has fully pinned the solution down
+class PosteriorAccusationPolicy(NotebookAccusationPolicy):
+    def __init__(self, threshold=0.95, samples=500):
+        self.threshold = threshold
+        self.samples = samples
+
+    def start_game(self, registry, selected_players, player_states, game_random):
+        super().start_game(registry, selected_players, player_states, game_random)
+        self.estimators = {
+            player: SolutionEstimator(notebook, samples=self.samples, rng=game_random.stream("posterior." + player))
+            for player, notebook in self.notebooks.items()
+        }
+
+    def choose_accusation(self, player, state, registry):
+        solved = self.notebooks[player].solved()
+        if solved is not None:
+            return solved
+        return self.estimators[player].best_accusation(self.threshold)
+
+
+#MctsPlayer for the given seats, the usual policies for everybody else; pass it as all three policies
+class MctsPolicy:
+    def __init__(self, mansion_graph, seats=(0,), accusation_policy=None, time_budget=None, max_rollouts=500,
+                 workers=0, move_policy=None, suggestion_policy=None):
+        self.mansion_graph = mansion_graph
+        self.seats = set(seats)
+        # the seats the AI does not play keep the configured policies
+        self.move_policy = move_policy or RandomMovePolicy()
+        self.suggestion_policy = suggestion_policy or UnseenCardSuggestionPolicy()
+        self.accusation_policy = accusation_policy or DeductionAccusationPolicy()
+        self.fallbacks = list({id(p): p for p in (self.move_policy, self.suggestion_policy,
+                                                  self.accusation_policy)}.values())
+        self.time_budget = time_budget
+        self.max_rollouts = max_rollouts
+        self.workers = workers
+        # one process pool for every AI seat of every game, started with the first game
+        self.pool = None
+        self.ai = {}
+
+    def start_game(self, registry, selected_players, player_states, game_random):
+        for ai in self.ai.values():
+            ai.close()
+        if self.workers and self.pool is None:
+            self.pool = search_pool(registry, self.mansion_graph, self.workers)
+        self.player_states = player_states
+        self.ai = {}
+        for seat, player in enumerate(selected_players):
+            if seat in self.seats:
+                ai = MctsPlayer(player, registry, selected_players, self.mansion_graph, time_budget=self.time_budget,
+                                max_rollouts=self.max_rollouts, workers=self.workers,
+                                seed=game_random.stream("ai." + player).getrandbits(64), pool=self.pool)
+                ai.observe_own_hand(player_states[player]["hand"])
+                self.ai[player] = ai
+        for policy in self.fallbacks:
+            if hasattr(policy, "start_game"):
+                policy.start_game(registry, selected_players, player_states, game_random)
+
+    def observe_suggestion(self, suggester, suggestion, refuter, shown_card):
+        for player, ai in self.ai.items():
+            ai.observe_suggestion(suggester, suggestion, refuter, shown_card if player in (suggester, refuter) else None)
+        for policy in self.fallbacks:
+            if hasattr(policy, "observe_suggestion"):
+                policy.observe_suggestion(suggester, suggestion, refuter, shown_card)
+
+    def observe_accusation(self, accuser, accusation, correct):
+        for ai in self.ai.values():
+            ai.observe_accusation(accuser, accusation, correct)
+        for policy in self.fallbacks:
+            if hasattr(policy, "observe_accusation"):
+                policy.observe_accusation(accuser, accusation, correct)
+
+    def choose_accusation(self, player, state, registry):
+        if player in self.ai:
+            return self.ai[player].choose_accusation()
+        return self.accusation_policy.choose_accusation(player, state, registry)
+
+    def choose_move(self, player, state, reachable_rooms, rng):
+        if player in self.ai:
+            return self.ai[player].choose_move(reachable_rooms, self.player_states)
+        return self.move_policy.choose_move(player, state, reachable_rooms, rng)
+
+    def choose_suggestion(self, player, state, registry, room, rng):
+        if player in self.ai:
+            return self.ai[player].choose_suggestion(room, self.player_states)
+        return self.suggestion_policy.choose_suggestion(player, state, registry, room, rng)
+
+    def close(self):
+        for ai in self.ai.values():
+            ai.close()
+        self.ai = {}
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+#moves to the reachable room holding the suggestion with the highest expected information gain, then makes it
+class InformationGainPolicy(NotebookAccusationPolicy):
+    def __init__(self, samples=500):
+        self.samples = samples
+
+    def start_game(self, registry, selected_players, player_states, game_random):
+        super().start_game(registry, selected_players, player_states, game_random)
+        self.optimizers = {
+            player: SuggestionOptimizer(
+                SolutionEstimator(notebook, rng=game_random.stream("information-gain." + player)), samples=self.samples
+            )
+            for player, notebook in self.notebooks.items()
+        }
+
+    def choose_move(self, player, state, reachable_rooms, rng):
+        best = self.optimizers[player].best([room for room, _ in reachable_rooms])
+        return best[2] if best is not None else rng.choice(reachable_rooms)[0]
+
+    def choose_suggestion(self, player, state, registry, room, rng):
+        return self.optimizers[player].best([room])
+
+
+SUGGESTION_POLICIES = {
+    "unseen-cards": UnseenCardSuggestionPolicy,
+    "information-gain": InformationGainPolicy,
+}
+
+
+ACCUSATION_POLICIES = {
+    "seen-cards": DeductionAccusationPolicy,
+    "notebook": NotebookAccusationPolicy,
+    "posterior": PosteriorAccusationPolicy,
+}
+
+
+@dataclass
+class GameResult:
+    seed: int
+    winner: Optional[str]
+    winner_seat: Optional[int]
+    turns: int
+    num_players: int
+
+
+@dataclass
+class SimulationSummary:
+    games: int = 0
+    total_turns: int = 0
+    no_winner: int = 0
+    wins_by_seat: Dict[int, int] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    def add(self, result):
+        self.games += 1
+        self.total_turns += result.turns
+        if result.winner_seat is None:
+            self.no_winner += 1
+        else:
+            self.wins_by_seat[result.winner_seat] = self.wins_by_seat.get(result.winner_seat, 0) + 1
+
+    def merge(self, other):
+        self.games += other.games
+        self.total_turns += other.total_turns
+        self.no_winner += other.no_winner
+        for seat, wins in other.wins_by_seat.items():
+            self.wins_by_seat[seat] = self.wins_by_seat.get(seat, 0) + wins
+
+    def as_dict(self):
+        games = self.games or 1
+        return {
+            "games": self.games,
+            "games_per_sec": self.games / self.elapsed if self.elapsed else None,
+            "average_turns": self.total_turns / games,
+            "no_winner_rate": self.no_winner / games,
+            "win_rate_by_seat": {seat: self.wins_by_seat[seat] / games for seat in sorted(self.wins_by_seat)},
+        }
+
+
+def play_headless_game(mansion_graph, registry, num_players, game_random,
+                       move_policy, suggestion_policy, accusation_policy, max_turns=1000, move_table=None,
+                       recorder=None):
+    # game_random is the game's GameRandom, or its 64-bit seed
+    if not isinstance(game_random, GameRandom):
+        game_random = GameRandom(game_random)
+    seed = game_random.seed
+    if move_table is None:
+        move_table = MoveTable(mansion_graph)
+    # read once per game; with profiling off every timer below is skipped by one "is not None" test
+    profiler = active_profiler()
+    if profiler is not None:
+        started = clock()
+    rooms = registry.rooms
+    solution_data, hands = deal_card_lists(rooms, registry.weapons, registry.characters, num_players,
+                                           game_random.deal)
+    selected_players = list(hands.keys())
+
+    player_locations = init_player_locations(selected_players, rooms, rng=game_random.start, verbose=False)
+    player_states = {
+        name: {
+            "location": player_locations[name]["location"],
+            "history": player_locations[name]["history"],
+            "hand": registry.mask(hands[name]),
+            "active": True,
+            "seen_cards": 0,
+        }
+        for name in selected_players
+    }
+    weapons_locations = {w: game_random.start.choice(rooms) for w in registry.weapons}
+    dice = game_random.dice
+    refute_rng = game_random.refute
+    move_rng = game_random.stream("moves")
+    suggestion_rng = game_random.stream("suggestions")
+    if recorder is not None:
+        recorder.start_game(seed, rooms, registry.weapons, registry.characters, selected_players, solution_data,
+                            hands, {name: player_locations[name]["location"] for name in selected_players},
+                            weapons_locations)
+    if profiler is not None:
+        profiler.add("setup", clock() - started)
+
+    # policies may follow the public game events (and their own private ones)
+    observers = list({id(p): p for p in (move_policy, suggestion_policy, accusation_policy)}.values())
+    for policy in observers:
+        if hasattr(policy, "start_game"):
+            policy.start_game(registry, selected_players, player_states, game_random)
+
+    def accuse(player, accusation):
+        correct = check_accusation(accusation, solution_data)
+        if recorder is not None:
+            recorder.accusation(player, accusation, correct)
+        for policy in observers:
+            if hasattr(policy, "observe_accusation"):
+                policy.observe_accusation(player, accusation, correct)
+        return correct
+
+    def result(winner, turns):
+        seat = selected_players.index(winner) if winner is not None else None
+        if recorder is not None:
+            recorder.end_game(winner, turns)
+        if profiler is not None:
+            profiler.count("turns", turns)
+            profiler.end_game(seed)
+        return GameResult(seed, winner, seat, turns, len(selected_players))
+
+    index = 0
+    turns = 0
+    num = len(selected_players)
+    while turns < max_turns:
+        if not any(s["active"] for s in player_states.values()):
+            return result(None, turns)
+
+        current_player = selected_players[index]
+        state = player_states[current_player]
+        index = (index + 1) % num
+        if not state["active"]:
+            continue
+        turns += 1
+        if recorder is not None:
+            recorder.turn(current_player)
+
+        if profiler is not None:
+            started = clock()
+        accusation = accusation_policy.choose_accusation(current_player, state, registry)
+        if profiler is not None:
+            profiler.add("accusation", clock() - started)
+        if accusation is not None:
+            if accuse(current_player, accusation):
+                return result(current_player, turns)
+            state["active"] = False
+            continue
+
+        if profiler is not None:
+            started = clock()
+        die_roll = dice.randint(1, 6)
+        reachable_rooms = move_table.reachable(state["location"], die_roll)
+        if recorder is not None:
+            recorder.roll(current_player, die_roll)
+        if reachable_rooms:
+            move_choice = move_policy.choose_move(current_player, state, reachable_rooms, move_rng)
+            state["location"] = move_choice
+            state["history"].append(move_choice)
+            if recorder is not None:
+                recorder.move(current_player, move_choice)
+        if profiler is not None:
+            profiler.add("movement", clock() - started)
+            started = clock()
+
+        suggestion = suggestion_policy.choose_suggestion(current_player, state, registry, state["location"],
+                                                         suggestion_rng)
+        refutation = process_suggestion(current_player, suggestion, player_states, selected_players,
+                                        weapons_locations, verbose=False, rng=refute_rng, registry=registry)
+        refuter, shown_card = refutation if refutation is not None else (None, None)
+        if recorder is not None:
+            recorder.suggestion(current_player, suggestion)
+            recorder.refutation(refuter, shown_card)
+        for policy in observers:
+            if hasattr(policy, "observe_suggestion"):
+                policy.observe_suggestion(current_player, suggestion, refuter, shown_card)
+        if profiler is not None:
+            profiler.add("suggestion", clock() - started)
+            profiler.count("refutations" if refuter is not None else "unrefuted_suggestions")
+            started = clock()
+
+        accusation = accusation_policy.choose_accusation(current_player, state, registry)
+        if profiler is not None:
+            profiler.add("accusation", clock() - started)
+        if accusation is not None:
+            if accuse(current_player, accusation):
+                return result(current_player, turns)
+            state["active"] = False
+
+    return result(None, turns)
+
+
+def run_simulations(num_games, mansion_graph, rooms, weapons, characters, num_players=3, first_seed=0,
+                    move_policy=None, suggestion_policy=None, accusation_policy=None, max_turns=1000,
+                    recorder=None, first_index=0):
+    # game i of the batch plays GameRandom.for_game(first_seed, i): a shard starting at first_index
+    # plays exactly the games the whole batch would have played there
+    move_policy = move_policy or RandomMovePolicy()
+    suggestion_policy = suggestion_policy or UnseenCardSuggestionPolicy()
+    accusation_policy = accusation_policy or DeductionAccusationPolicy()
+
+    summary = SimulationSummary()
+    # the layout never changes during a run, so one move table serves every game
+    move_table = MoveTable(mansion_graph)
+    registry = CardRegistry(rooms, weapons, characters)
+    started = time.perf_counter()
+    for index in range(first_index, first_index + num_games):
+        summary.add(play_headless_game(
+            mansion_graph, registry, num_players, GameRandom.for_game(first_seed, index),
+            move_policy, suggestion_policy, accusation_policy, max_turns, move_table, recorder
+        ))
+    summary.elapsed = time.perf_counter() - started
+    return summary
+
+
+def load_default_setup(layout_seed=123, secret_chance=0.25):
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    setup_dir = os.path.join(base_dir, "GameSetup")
+    rooms, weapons, characters = default_catalog().card_lists(
+        os.path.join(setup_dir, "Room.txt"), os.path.join(setup_dir, "Weapon.txt"),
+        os.path.join(setup_dir, "Character.txt")
+    )
+    mansion_graph = generate_random_weighted_graph_with_secrets(rooms, seed=layout_seed, secret_chance=secret_chance)
+    return mansion_graph, rooms, weapons, characters
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play Cluedo games back to back without console input.")
+    parser.add_argument("--games", type=int, default=10000, help="Number of games to simulate.")
+    parser.add_argument("--players", type=int, default=3, help="Players per game (3-6).")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Root seed of the batch; game i draws from GameRandom.for_game(seed, i).")
+    parser.add_argument("--max-turns", type=int, default=1000, help="Turn cap after which a game has no winner.")
+    parser.add_argument("--accusation-policy", choices=sorted(ACCUSATION_POLICIES), default="seen-cards",
+                        help="When seats accuse: once only one unseen card per category remains, "
+                             "or once their deduction notebook pins down the solution.")
+    parser.add_argument("--suggestion-policy", choices=sorted(SUGGESTION_POLICIES), default="unseen-cards",
+                        help="How seats move and suggest: randomly among cards they have not seen, or to the room "
+                             "and suggestion with the highest expected information gain (pair that with a "
+                             "notebook or posterior accusation policy: it rarely gets shown every last card).")
+    parser.add_argument("--mcts-seats", type=int, nargs="*", default=None,
+                        help="Seats (0-based) played by the Monte Carlo tree search AI.")
+    parser.add_argument("--mcts-rollouts", type=int, default=500,
+                        help="Rollouts per AI decision (0 for no cap, then --mcts-time bounds the search).")
+    parser.add_argument("--mcts-time", type=float, default=None, help="Seconds of search per AI decision.")
+    parser.add_argument("--mcts-workers", type=int, default=0, help="Processes the AI spreads its rollouts over.")
+    parser.add_argument("--event-log", default=None, help="Append every game's events to this binary log.")
+    parser.add_argument("--profile", nargs="?", const="-", default=None,
+                        help="Time each turn phase and write the JSON report to this file (stdout if no file). "
+                             "Setting CLUEDO_PROFILE=1 turns timing on as well.")
+    parser.add_argument("--cprofile", default=None, help="Run under cProfile and dump the stats to this file.")
+    args = parser.parse_args()
+
+    # aggregate histograms only: per-game summaries would grow with the game count
+    if args.profile or active_profiler() is not None:
+        enable(keep_games=False)
+    if args.cprofile:
+        import cProfile
+        cprofiler = cProfile.Profile()
+        cprofiler.enable()
+
+    mansion_graph, rooms, weapons, characters = load_default_setup()
+    recorder = EventLogWriter(args.event_log) if args.event_log else None
+    accusation_policy = ACCUSATION_POLICIES[args.accusation_policy]()
+    suggestion_policy = SUGGESTION_POLICIES[args.suggestion_policy]()
+    policies = {"accusation_policy": accusation_policy, "suggestion_policy": suggestion_policy}
+    if isinstance(suggestion_policy, InformationGainPolicy):
+        policies["move_policy"] = suggestion_policy
+    if args.mcts_seats:
+        mcts = MctsPolicy(mansion_graph, args.mcts_seats, accusation_policy, time_budget=args.mcts_time,
+                          max_rollouts=args.mcts_rollouts or None, workers=args.mcts_workers,
+                          move_policy=policies.get("move_policy"), suggestion_policy=suggestion_policy)
+        policies = {"move_policy": mcts, "suggestion_policy": mcts, "accusation_policy": mcts}
+    try:
+        summary = run_simulations(args.games, mansion_graph, rooms, weapons, characters,
+                                  num_players=args.players, first_seed=args.seed, max_turns=args.max_turns,
+                                  recorder=recorder, **policies)
+    finally:
+        if recorder is not None:
+            recorder.close()
+        if args.mcts_seats:
+            mcts.close()
+    print(json.dumps(summary.as_dict(), indent=2))
+
+    if args.cprofile:
+        import pstats
+        cprofiler.disable()
+        cprofiler.dump_stats(args.cprofile)
+        pstats.Stats(cprofiler).sort_stats("cumulative").print_stats(20)
+    profiler = active_profiler()
+    if profiler is not None:
+        profiler.write_report(args.profile)
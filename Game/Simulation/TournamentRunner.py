@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Game.GameSetup.GenerateMansionLayout import (
+    load_graph_from_json
+)
+
+from Game.GameSetup.CardCatalog import (
+    default_catalog
+)
+
+from Game.Simulation.HeadlessSimulation import (
+    SimulationSummary,
+    run_simulations
+)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#loaded once per worker process by the pool initializer, not once per game
+_worker_setup = None
+
+
+def load_tournament_setup(layout_file=None, setup_dir=None):
+    layout_file = layout_file or os.path.join(BASE_DIR, "mansion_layout.json")
+    setup_dir = setup_dir or os.path.join(BASE_DIR, "GameSetup")
+    mansion_graph = load_graph_from_json(layout_file)
+    rooms, weapons, characters = default_catalog().card_lists(
+        os.path.join(setup_dir, "Room.txt"), os.path.join(setup_dir, "Weapon.txt"),
+        os.path.join(setup_dir, "Character.txt")
+    )
+    return mansion_graph, rooms, weapons, characters
+
+
+def _init_worker(layout_file, setup_dir):
+    global _worker_setup
+    _worker_setup = load_tournament_setup(layout_file, setup_dir)
+
+
+def _run_chunk(root_seed, first_index, num_games, num_players, max_turns):
+    mansion_graph, rooms, weapons, characters = _worker_setup
+    summary = run_simulations(num_games, mansion_graph, rooms, weapons, characters, num_players=num_players,
+                              first_seed=root_seed, max_turns=max_turns, first_index=first_index)
+    # elapsed is wall time of the whole tournament, not the sum over workers
+    summary.elapsed = 0.0
+    return summary
+
+
+def index_chunks(num_games, chunk_size):
+    for start in range(0, num_games, chunk_size):
+        yield start, min(chunk_size, num_games - start)
+
+
+def run_tournament(num_games, num_players=3, first_seed=0, workers=None, chunk_size=500,
+                   max_turns=1000, layout_file=None, setup_dir=None, on_chunk=None):
+    # game i is seeded by GameRandom.for_game(first_seed, i) whichever worker plays it, and merging only
+    # sums counters, so the summary is identical whatever the worker count or completion order
+    summary = SimulationSummary()
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(layout_file, setup_dir)) as executor:
+        futures = [
+            executor.submit(_run_chunk, first_seed, start, count, num_players, max_turns)
+            for start, count in index_chunks(num_games, chunk_size)
+        ]
+        for future in as_completed(futures):
+            chunk_summary = future.result()
+            summary.merge(chunk_summary)
+            if on_chunk is not None:
+                on_chunk(summary)
+    summary.elapsed = time.perf_counter() - started
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run simulated Cluedo games across all CPU cores.")
+    parser.add_argument("--games", type=int, default=100000, help="Number of games to simulate.")
+    parser.add_argument("--players", type=int, default=3, help="Players per game (3-6).")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Root seed of the run; game i draws from GameRandom.for_game(seed, i).")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Games per work unit sent to a worker.")
+    parser.add_argument("--max-turns", type=int, default=1000, help="Turn cap after which a game has no winner.")
+    parser.add_argument("--layout", default=None, help="Mansion layout JSON (default: Game/mansion_layout.json).")
+    parser.add_argument("--progress", action="store_true", help="Print the running game count as chunks finish.")
+    args = parser.parse_args()
+
+    def report(partial):
+        print(f"{partial.games}/{args.games} games done")
+
+    summary = run_tournament(args.games, num_players=args.players, first_seed=args.seed, workers=args.workers,
+                             chunk_size=args.chunk_size, max_turns=args.max_turns, layout_file=args.layout,
+                             on_chunk=report if args.progress else None)
+    print(json.dumps(summary.as_dict(), indent=2))
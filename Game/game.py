@@ -1,17 +1,44 @@
+import argparse
 import json
 import os
 import random
 
 
+from Game.AI.MctsPlayer import (
+    MctsPlayer
+)
+
+from Game.Deduction.DetectiveNotebook import (
+    DetectiveNotebook
+)
+
+from Game.Deduction.SolutionEstimator import (
+    SolutionEstimator
+)
+
+from Game.Deduction.SuggestionOptimizer import (
+    SuggestionOptimizer
+)
+
 from Game.AlgorithmForSelectingPossibleMoves.LimitedUniformCostSearch import (
     limited_uniform_cost_search
 )
 
+from Game.GameSetup.CardCatalog import (
+    load_card_list
+)
+
+from Game.GameSetup.CardRegistry import (
+    CardRegistry
+)
+
+from Game.GameSetup.GameRandom import (
+    GameRandom
+)
+
 from Game.GameSetup.GenerateMansionLayout import (
-    load_rooms,
     generate_random_weighted_graph_with_secrets,
     save_graph_to_json,
-    load_graph_from_json,
     print_weighted_graph
 )
 
@@ -19,22 +46,41 @@ from Game.GameSetup.GenerateSolutionAndDistributeCards import (
     deal_cards
 )
 
+from Game.GameRecording.GameSnapshot import (
+    GameState,
+    save_snapshot,
+    load_snapshot
+)
+
+from Game.Instrumentation.PhaseTimers import (
+    active_profiler,
+    count,
+    enable,
+    phase
+)
+
 
-def generate_mansion():
+def generate_mansion(rng=None, layout=None):
     base_dir = os.path.dirname(os.path.abspath(__file__))
     room_file_path = os.path.join(base_dir, "GameSetup", "Room.txt")
 
-    rooms = load_rooms(room_file_path)
-    mansion_graph = generate_random_weighted_graph_with_secrets(
-        rooms, seed=123, secret_chance=0.25
-    )
+    # without a generator this is the classic mansion (layout seed 123); a resumed game brings its own layout
+    rooms = load_card_list(room_file_path)
+    if layout is not None:
+        mansion_graph = layout
+    else:
+        mansion_graph = generate_random_weighted_graph_with_secrets(
+            rooms, seed=123, secret_chance=0.25, rng=rng
+        )
 
-    mansion_file_path = os.path.join(base_dir, "mansion_layout.json")
-    save_graph_to_json(mansion_graph, mansion_file_path)
+    # the file is an export of the classic mansion, and other tools read it as the default layout, so a random
+    # or resumed layout (kept in the snapshot) must not replace it
+    if layout is None and rng is None:
+        mansion_file_path = os.path.join(base_dir, "mansion_layout.json")
+        save_graph_to_json(mansion_graph, mansion_file_path)
 
-    loaded_graph = load_graph_from_json(mansion_file_path)
-    print_weighted_graph(loaded_graph)
-    return rooms, loaded_graph
+    print_weighted_graph(mansion_graph)
+    return rooms, mansion_graph
 
 
 def get_number_of_players():
@@ -51,7 +97,7 @@ def get_number_of_players():
             print("Error: Number of players must be between 3 and 6.")
 
 
-def generate_solution_and_deal_cards(num_players):
+def generate_solution_and_deal_cards(num_players, rng=None):
     base_dir = os.path.dirname(os.path.abspath(__file__))
 
     room_file = os.path.join(base_dir, "GameSetup", "Room.txt")
@@ -67,7 +113,8 @@ def generate_solution_and_deal_cards(num_players):
         solution_file=solution_file,
         hands_file=hands_file,
         seed=123,
-        active_players=num_players
+        active_players=num_players,
+        rng=rng
     )
 
     selected_players = list(hands.keys())
@@ -76,10 +123,12 @@ def generate_solution_and_deal_cards(num_players):
     return solution_data, hands, selected_players
 
 
-def init_player_locations(player_names, rooms, seed=123):
-    random.seed(seed)
-    start_room = random.choice(rooms)
-    print(f"All players starting in: {start_room}")
+def init_player_locations(player_names, rooms, seed=123, rng=None, verbose=True):
+    if rng is None:
+        rng = random.Random(seed)
+    start_room = rng.choice(rooms)
+    if verbose:
+        print(f"All players starting in: {start_room}")
 
     players = {
         name: {"location": start_room, "history": []}
@@ -88,12 +137,6 @@ def init_player_locations(player_names, rooms, seed=123):
     return players
 
 
-def load_list_from_file(path):
-    with open(path, "r") as f:
-
-        return [line.strip() for line in f if line.strip()]
-
-
 def prompt_suggestion(current_player, characters, weapons, current_room):
     print(f"\n{current_player} is making a suggestion in room '{current_room}'.")
     print(f"Available characters: {', '.join(characters)}")
@@ -112,21 +155,30 @@ def prompt_suggestion(current_player, characters, weapons, current_room):
     return suspect, weapon, current_room
 
 
-def process_suggestion(current_player, suggestion, player_states, selected_players, weapons_locations):
+def process_suggestion(current_player, suggestion, player_states, selected_players, weapons_locations,
+                       verbose=True, rng=random, registry=None):
+    # with a CardRegistry, "hand" and "seen_cards" are bitmasks and each responder is checked with one AND
     suspect, weapon, room = suggestion
-    print(f"\n{current_player} suggests it was {suspect} with the {weapon} in the {room}.")
+    if verbose:
+        print(f"\n{current_player} suggests it was {suspect} with the {weapon} in the {room}.")
 
 
     if suspect in player_states:
         if player_states[suspect]["location"] != room:
-            print(f"Moving suggested character '{suspect}' into {room}.")
+            if verbose:
+                print(f"Moving suggested character '{suspect}' into {room}.")
             player_states[suspect]["location"] = room
             player_states[suspect]["history"].append(room)
 
 
     weapons_locations[weapon] = room
-    print(f"The weapon '{weapon}' is now in {room}.")
+    if verbose:
+        print(f"The weapon '{weapon}' is now in {room}.")
+
 
+    if registry is not None:
+        bits = registry.bits
+        suggestion_mask = bits[suspect] | bits[weapon] | bits[room]
 
     start_idx = selected_players.index(current_player)
     num = len(selected_players)
@@ -134,15 +186,26 @@ def process_suggestion(current_player, suggestion, player_states, selected_playe
         responder = selected_players[(start_idx + offset) % num]
 
         hand = player_states[responder]["hand"]
-        matching = [card for card in (suspect, weapon, room) if card in hand]
+        if registry is not None:
+            if not hand & suggestion_mask:
+                continue
+            matching = [card for card in (suspect, weapon, room) if hand & bits[card]]
+        else:
+            matching = [card for card in (suspect, weapon, room) if card in hand]
         if matching:
-            shown_card = random.choice(matching)
-            print(f"{responder} can disprove the suggestion and shows a card to {current_player} (private).")
+            shown_card = rng.choice(matching)
+            if verbose:
+                print(f"{responder} can disprove the suggestion and shows a card to {current_player} (private).")
 
-            print(f"[PRIVATE to {current_player}]: {shown_card}")
-            player_states[current_player]["seen_cards"].append(shown_card)
-            return
-    print("No one could disprove the suggestion.")
+                print(f"[PRIVATE to {current_player}]: {shown_card}")
+            if registry is not None:
+                player_states[current_player]["seen_cards"] |= bits[shown_card]
+            else:
+                player_states[current_player]["seen_cards"].append(shown_card)
+            return responder, shown_card
+    if verbose:
+        print("No one could disprove the suggestion.")
+    return None
 
 
 def prompt_accusation(current_player, characters, weapons, rooms):
@@ -183,48 +246,130 @@ def check_accusation(accusation, solution_data):
 
 
 if __name__ == "__main__":
-    rooms, mansion_graph = generate_mansion()
+    parser = argparse.ArgumentParser(description="Play Cluedo in the console.")
+    parser.add_argument("--save", default=None, help="Snapshot the game to this file at the start of every turn.")
+    parser.add_argument("--resume", default=None, help="Continue the game stored in this snapshot file.")
+    parser.add_argument("--profile", nargs="?", const="-", default=None,
+                        help="Time each game phase and write the JSON report to this file (stdout if no file). "
+                             "Setting CLUEDO_PROFILE=1 turns timing on as well.")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="64-bit game seed; the same seed replays the same deal, start room, dice and refutations.")
+    parser.add_argument("--random-layout", action="store_true",
+                        help="Generate the mansion from the game seed instead of the classic layout.")
+    parser.add_argument("--computer-players", type=int, default=0,
+                        help="How many of the seats (counted from the last one) the computer plays.")
+    parser.add_argument("--ai-time", type=float, default=1.0, help="Seconds the computer thinks per decision.")
+    parser.add_argument("--ai-workers", type=int, default=0, help="Processes the computer spreads its search over.")
+    parser.add_argument("--hints", action="store_true",
+                        help="After each roll, show human players the suggestions that narrow the solution down most.")
+    args = parser.parse_args()
+    if not 0 <= args.computer_players <= 6:
+        parser.error("--computer-players must be between 0 and 6.")
+    if args.profile:
+        enable()
+
+    if args.resume:
+        saved = load_snapshot(args.resume)
+        game_random = GameRandom(saved.rng_seed)
+    else:
+        game_random = GameRandom(args.seed)
+    print(f"Game seed: {game_random.seed}")
+
+    with phase("setup.generate_mansion"):
+        if args.resume and saved.layout is not None:
+            rooms, mansion_graph = generate_mansion(layout=saved.layout)
+        else:
+            rooms, mansion_graph = generate_mansion(game_random.layout if args.random_layout else None)
     print("--------------- Mansion Generated ---------------")
-    num_players = get_number_of_players()
-    print(f"Number of players selected: {num_players}")
-
-    solution_data, hands, selected_players = generate_solution_and_deal_cards(num_players)
-
 
     base_dir = os.path.dirname(os.path.abspath(__file__))
     character_file = os.path.join(base_dir, "GameSetup", "Character.txt")
     weapon_file = os.path.join(base_dir, "GameSetup", "Weapon.txt")
-    characters = load_list_from_file(character_file)
-    weapons = load_list_from_file(weapon_file)
-
+    with phase("setup.read_cards"):
+        # the same cached lists deal_cards used, no second read of either file
+        characters = load_card_list(character_file)
+        weapons = load_card_list(weapon_file)
+
+    if args.resume:
+        # every random stream is restored as well, so the game continues exactly where it stopped
+        saved.restore_random(game_random)
+        selected_players = list(saved.selected_players)
+        solution_data = saved.solution_data
+        player_states = saved.player_states()
+        weapons_locations = dict(saved.weapons_locations)
+        index = saved.index
+        turn = saved.turn
+        print(f"Resumed game from {args.resume} at turn {turn}.")
+    else:
+        num_players = get_number_of_players()
+        print(f"Number of players selected: {num_players}")
+
+        with phase("setup.deal_cards"):
+            solution_data, hands, selected_players = generate_solution_and_deal_cards(num_players, game_random.deal)
+
+
+        player_locations = init_player_locations(selected_players, rooms, rng=game_random.start)
+        player_states = {}
+        for name in selected_players:
+            player_states[name] = {
+                "location": player_locations[name]["location"],
+                "history": player_locations[name]["history"],
+                "hand": hands.get(name, []),
+                "active": True,
+                "seen_cards": [],
+            }
+
+
+        weapons_locations = {w: game_random.start.choice(rooms) for w in weapons}
+
+        print("Initial player locations:")
+        for p, info in player_states.items():
+            print(f"  {p}: {info['location']}")
+
+        print("Initial weapon locations:")
+        for w, loc in weapons_locations.items():
+            print(f"  {w}: {loc}")
+
+        print("--------------- Players Setup and Solution Generated ---------------")
+        index = 0
+        turn = 0
+    # computer seats only know their own hand (and, after a resume, nothing of the turns before it)
+    registry = CardRegistry(rooms, weapons, characters)
+    computer_players = {}
+    if args.computer_players > len(selected_players):
+        parser.error(f"--computer-players {args.computer_players} is more than the {len(selected_players)} players.")
+    for name in selected_players[len(selected_players) - args.computer_players:] if args.computer_players else []:
+        computer_players[name] = MctsPlayer(name, registry, selected_players, mansion_graph, time_budget=args.ai_time,
+                                            workers=args.ai_workers, seed=game_random.stream("ai." + name).getrandbits(64))
+        computer_players[name].observe_own_hand(player_states[name]["hand"])
+        print(f"{name} is played by the computer.")
+
+    # hint mode keeps a notebook for every human seat, fed with what that player has seen so far
+    hint_notebooks = {}
+    hint_optimizers = {}
+    if args.hints:
+        for name in selected_players:
+            if name not in computer_players:
+                notebook = DetectiveNotebook(registry, selected_players, me=name)
+                notebook.observe_own_hand(registry.mask(player_states[name]["hand"]))
+                hint_notebooks[name] = notebook
+                hint_optimizers[name] = SuggestionOptimizer(
+                    SolutionEstimator(notebook, rng=game_random.stream("hints." + name)))
+
+    def observe_accusation(accuser, accusation, correct):
+        for ai in computer_players.values():
+            ai.observe_accusation(accuser, accusation, correct)
+        if not correct:
+            for notebook in hint_notebooks.values():
+                notebook.record_failed_accusation(accusation)
 
-    player_locations = init_player_locations(selected_players, rooms)
-    player_states = {}
-    for name in selected_players:
-        player_states[name] = {
-            "location": player_locations[name]["location"],
-            "history": player_locations[name]["history"],
-            "hand": hands.get(name, []),
-            "active": True,
-            "seen_cards": [],
-        }
-
-
-    weapons_locations = {w: random.choice(rooms) for w in weapons}
-
-    print("Initial player locations:")
-    for p, info in player_states.items():
-        print(f"  {p}: {info['location']}")
-
-    print("Initial weapon locations:")
-    for w, loc in weapons_locations.items():
-        print(f"  {w}: {loc}")
-
-    print("--------------- Players Setup and Solution Generated ---------------")
-    index = 0
     game_over = False
 
     while not game_over:
+        if args.save:
+            save_snapshot(args.save, GameState(selected_players, solution_data, player_states,
+                                               weapons_locations, index, turn, mansion_graph), rng=game_random)
+
         # Check if any active players remain
         active_players = [p for p, s in player_states.items() if s["active"]]
         if not active_players:
@@ -240,18 +385,29 @@ if __name__ == "__main__":
             index = (index + 1) % len(selected_players)
             continue
 
+        turn += 1
+        count("turns")
         print("\n------------------------------")
         print("Current player:", current_player)
 
-        print(f"{current_player}'s cards: {', '.join(state['hand'])}")
+        ai = computer_players.get(current_player)
+        if ai is None:
+            print(f"{current_player}'s cards: {', '.join(state['hand'])}")
 
-        if state["seen_cards"]:
-            print(f"{current_player} has previously seen: {', '.join(state['seen_cards'])}")
+            if state["seen_cards"]:
+                print(f"{current_player} has previously seen: {', '.join(state['seen_cards'])}")
 
-        acc_choice = input(f"{current_player}, do you want to make an accusation now? (y/N): ").strip().lower()
-        if acc_choice == "y":
-            accusation = prompt_accusation(current_player, characters, weapons, rooms)
-            if check_accusation(accusation, solution_data):
+            acc_choice = input(f"{current_player}, do you want to make an accusation now? (y/N): ").strip().lower()
+            accusation = prompt_accusation(current_player, characters, weapons, rooms) if acc_choice == "y" else None
+        else:
+            with phase("ai.accusation"):
+                accusation = ai.choose_accusation()
+            if accusation is not None:
+                print(f"{current_player} accuses {accusation[0]} with the {accusation[1]} in the {accusation[2]}.")
+        if accusation is not None:
+            correct = check_accusation(accusation, solution_data)
+            observe_accusation(current_player, accusation, correct)
+            if correct:
                 print(f"\nAccusation correct! {current_player} wins the game! 🎉")
                 game_over = True
                 break
@@ -269,19 +425,33 @@ if __name__ == "__main__":
                 index = (index + 1) % len(selected_players)
                 continue
 
-        input(f"{current_player}, press Enter to roll the die.")
-        die_roll = random.randint(1, 6)
+        if ai is None:
+            input(f"{current_player}, press Enter to roll the die.")
+        die_roll = game_random.dice.randint(1, 6)
         print(f"You rolled: {die_roll}")
 
         current_location = state["location"]
-        reachable_rooms = limited_uniform_cost_search(mansion_graph, current_location, die_roll)
+        with phase("movement"):
+            reachable_rooms = limited_uniform_cost_search(mansion_graph, current_location, die_roll)
 
         print(f"From '{current_location}', you can move to these rooms (cost ≤ {die_roll}):")
         for room, cost in reachable_rooms:
             print(f"  - {room} (cost {cost})")
 
         valid_moves = {room for room, cost in reachable_rooms}
-        while True:
+        if current_player in hint_optimizers:
+            # a player has to move whenever the roll reaches a room, so the current room only counts without one
+            with phase("hints"):
+                hints = hint_optimizers[current_player].rank(sorted(valid_moves) or [current_location], top=3)
+            for gain, (suspect, weapon, room) in hints:
+                print(f"  Hint: {suspect} with the {weapon} in the {room} ({gain:.2f} bits expected)")
+        if ai is not None and reachable_rooms:
+            with phase("ai.move"):
+                move_choice = ai.choose_move(reachable_rooms, player_states)
+            state["location"] = move_choice
+            state["history"].append(move_choice)
+            print(f"{current_player} moved to {move_choice} ({ai.last_rollouts} rollouts)")
+        while ai is None:
             move_choice = input(f"{current_player}, enter the room you want to move to: ").strip()
             if move_choice in valid_moves:
                 state["location"] = move_choice
@@ -292,13 +462,37 @@ if __name__ == "__main__":
                 print("Invalid move. Please choose a room from the list above.")
 
         current_room = state["location"]
-        suggestion = prompt_suggestion(current_player, characters, weapons, current_room)
-        process_suggestion(current_player, suggestion, player_states, selected_players, weapons_locations)
-
-        acc_after = input(f"{current_player}, do you want to make an accusation now? (y/N): ").strip().lower()
-        if acc_after == "y":
-            accusation = prompt_accusation(current_player, characters, weapons, rooms)
-            if check_accusation(accusation, solution_data):
+        if ai is None:
+            suggestion = prompt_suggestion(current_player, characters, weapons, current_room)
+        else:
+            with phase("ai.suggestion"):
+                suggestion = ai.choose_suggestion(current_room, player_states)
+        with phase("suggestion"):
+            refutation = process_suggestion(current_player, suggestion, player_states, selected_players,
+                                            weapons_locations, verbose=ai is None, rng=game_random.refute)
+        if ai is not None:
+            print(f"{current_player} suggests it was {suggestion[0]} with the {suggestion[1]} in the {suggestion[2]}.")
+            print(f"{refutation[0]} disproves it." if refutation is not None else "No one could disprove the suggestion.")
+        refuter, shown_card = refutation if refutation is not None else (None, None)
+        for name, computer in computer_players.items():
+            computer.observe_suggestion(current_player, suggestion, refuter,
+                                        shown_card if name in (current_player, refuter) else None)
+        for name, notebook in hint_notebooks.items():
+            notebook.record_suggestion(current_player, suggestion, refuter,
+                                       shown_card if name == current_player else None)
+
+        if ai is None:
+            acc_after = input(f"{current_player}, do you want to make an accusation now? (y/N): ").strip().lower()
+            accusation = prompt_accusation(current_player, characters, weapons, rooms) if acc_after == "y" else None
+        else:
+            with phase("ai.accusation"):
+                accusation = ai.choose_accusation()
+            if accusation is not None:
+                print(f"{current_player} accuses {accusation[0]} with the {accusation[1]} in the {accusation[2]}.")
+        if accusation is not None:
+            correct = check_accusation(accusation, solution_data)
+            observe_accusation(current_player, accusation, correct)
+            if correct:
                 print(f"\nAccusation correct! {current_player} wins the game! 🎉")
                 game_over = True
                 break
@@ -315,3 +509,8 @@ if __name__ == "__main__":
 
         index = (index + 1) % len(selected_players)
 
+    for ai in computer_players.values():
+        ai.close()
+    profiler = active_profiler()
+    if profiler is not None:
+        profiler.write_report(args.profile)
@@ -0,0 +1,259 @@
+import math
+import random
+import time
+from collections import defaultdict
+from itertools import combinations, product
+
+import numpy as np
+import pytest
+
+from Game.Deduction.DetectiveNotebook import (
+    DetectiveNotebook
+)
+
+from Game.Deduction.SolutionEstimator import (
+    SolutionEstimator
+)
+
+from Game.Deduction.SuggestionOptimizer import (
+    SuggestionOptimizer
+)
+
+from Game.GameSetup.CardRegistry import (
+    CardRegistry
+)
+
+from Game.GameSetup.GenerateSolutionAndDistributeCards import (
+    deal_card_lists
+)
+
+from Game.Simulation.HeadlessSimulation import (
+    PosteriorAccusationPolicy,
+    load_default_setup,
+    run_simulations
+)
+
+from Game.game import (
+    process_suggestion
+)
+
+#small enough to enumerate every deal: 10 cards, 7 of them dealt to 3 players
+ROOMS = ["Hall", "Study", "Lounge", "Kitchen"]
+WEAPONS = ["Rope", "Knife", "Pipe"]
+CHARACTERS = ["Scarlett", "Plum", "Green"]
+
+
+def play_position(seed, turns, num_players=3, rooms=ROOMS, weapons=WEAPONS, characters=CHARACTERS):
+    # a dealt game and the notebook of seat 0 after some random suggestions; events are kept for the brute force
+    rng = random.Random(seed)
+    registry = CardRegistry(rooms, weapons, characters)
+    solution_data, hands = deal_card_lists(rooms, weapons, characters, num_players, rng)
+    players = list(hands)
+    me = players[0]
+    states = {p: {"location": rooms[0], "history": [], "hand": registry.mask(hands[p]), "active": True,
+                  "seen_cards": 0} for p in players}
+    notebook = DetectiveNotebook(registry, players, me=me)
+    notebook.observe_own_hand(states[me]["hand"])
+    events = []
+    for turn in range(turns):
+        suggester = players[turn % len(players)]
+        suggestion = (rng.choice(characters), rng.choice(weapons), rng.choice(rooms))
+        refutation = process_suggestion(suggester, suggestion, states, players, {}, verbose=False, rng=rng,
+                                        registry=registry)
+        refuter, shown_card = refutation if refutation is not None else (None, None)
+        shown_card = shown_card if suggester == me else None
+        notebook.record_suggestion(suggester, suggestion, refuter, shown_card)
+        events.append((suggester, suggestion, refuter, shown_card))
+    return registry, notebook, events, states
+
+
+def consistent_deals(registry, notebook, events):
+    # every deal (envelope triple, hand per seat) that explains what seat 0 saw, by enumeration
+    players = notebook.players
+    me = notebook.owner_index[notebook.me]
+    sizes = notebook.sizes[:len(players)]
+    for triple in product(registry.characters, registry.weapons, registry.rooms):
+        if triple in notebook.excluded_triples:
+            continue
+        rest = [card for card in registry.cards if card not in triple]
+        for hands in _hands(rest, sizes):
+            if registry.mask(hands[me]) != notebook.has[me]:
+                continue
+            if all(_explains(players, hands, event) for event in events):
+                yield triple, tuple(registry.mask(hand) for hand in hands)
+
+
+def _hands(cards, sizes):
+    if not sizes:
+        yield ()
+        return
+    for hand in combinations(cards, sizes[0]):
+        rest = [card for card in cards if card not in hand]
+        for others in _hands(rest, sizes[1:]):
+            yield (hand,) + others
+
+
+def _explains(players, hands, event):
+    suggester, suggestion, refuter, shown_card = event
+    start = players.index(suggester)
+    for offset in range(1, len(players)):
+        seat = (start + offset) % len(players)
+        if set(suggestion) & set(hands[seat]):
+            return players[seat] == refuter and (shown_card is None or shown_card in hands[seat])
+    return refuter is None
+
+
+def brute_force_posterior(registry, notebook, events):
+    counts = defaultdict(int)
+    for triple, _ in consistent_deals(registry, notebook, events):
+        counts[triple] += 1
+    total = sum(counts.values())
+    return {triple: count / total for triple, count in counts.items()}
+
+
+@pytest.mark.parametrize("seed,turns", [(0, 3), (2, 5), (4, 6), (5, 4), (10, 3), (12, 6)])
+def test_exact_posterior_matches_enumeration(seed, turns):
+    registry, notebook, events, _ = play_position(seed, turns)
+    estimator = SolutionEstimator(notebook)
+    probabilities = estimator.triple_probabilities()
+    assert estimator.exact
+    expected = brute_force_posterior(registry, notebook, events)
+    assert set(probabilities) == set(expected)
+    for triple, p in expected.items():
+        assert probabilities[triple] == pytest.approx(p)
+
+
+def test_exact_posterior_after_each_event():
+    # the same estimator follows the notebook through refutations and a failed accusation
+    registry, notebook, events, _ = play_position(4, turns=0)
+    estimator = SolutionEstimator(notebook)
+    replayed = []
+    _, _, later, _ = play_position(4, turns=6)
+    for event in later:
+        notebook.record_suggestion(*event)
+        replayed.append(event)
+        expected = brute_force_posterior(registry, notebook, replayed)
+        assert estimator.triple_probabilities() == pytest.approx(expected)
+    triple = max(expected, key=expected.get)
+    notebook.record_failed_accusation(triple)
+    expected = brute_force_posterior(registry, notebook, replayed)
+    assert estimator.triple_probabilities() == pytest.approx(expected)
+    assert estimator.most_likely()[0] == max(expected, key=expected.get)
+
+
+@pytest.mark.parametrize("seed", [0, 2, 4])
+def test_sampled_posterior_is_close(seed):
+    registry, notebook, events, _ = play_position(seed, turns=3)
+    expected = brute_force_posterior(registry, notebook, events)
+    # exact counting off, so the posterior comes from rejection samples
+    estimator = SolutionEstimator(notebook, samples=4000, exact_free_cards=0, max_draws_per_update=400000,
+                                  rng=random.Random(seed))
+    probabilities = estimator.triple_probabilities()
+    assert not estimator.exact and estimator.reliable()
+    for triple, p in expected.items():
+        assert probabilities.get(triple, 0.0) == pytest.approx(p, abs=0.04)
+
+
+def test_sampled_deals_agree_with_the_notebook():
+    registry, notebook, events, _ = play_position(3, turns=6)
+    consistent = set(consistent_deals(registry, notebook, events))
+    deals = SolutionEstimator(notebook, rng=random.Random(1)).sample_deals(300)
+    assert len(deals) == 300
+    assert all(deal in consistent for deal in deals)
+
+
+class TimedPosteriorPolicy(PosteriorAccusationPolicy):
+    def __init__(self):
+        super().__init__()
+        self.latencies = []
+
+    def choose_accusation(self, player, state, registry):
+        started = time.perf_counter()
+        accusation = super().choose_accusation(player, state, registry)
+        self.latencies.append(time.perf_counter() - started)
+        return accusation
+
+
+def test_six_player_accusation_latency():
+    # every posterior accusation decision of a 6-player game, after the events since the seat's last turn
+    mansion_graph, rooms, weapons, characters = load_default_setup()
+    policy = TimedPosteriorPolicy()
+    run_simulations(20, mansion_graph, rooms, weapons, characters, num_players=6, accusation_policy=policy)
+    assert len(policy.latencies) > 500
+    assert np.percentile(policy.latencies, 99) < 1e-3
+
+
+def naive_gain(deals, suggestion, suggester, registry):
+    # I(T; O) = H(T) + H(O) - H(T, O), outcomes worked out deal by deal the way process_suggestion plays them
+    num = len(deals[0][1])
+    joint = defaultdict(float)
+    for triple, hands in deals:
+        outcome_weights = {None: 1.0}
+        for offset in range(1, num):
+            seat = (suggester + offset) % num
+            matching = [card for card in suggestion if hands[seat] & registry.bits[card]]
+            if matching:
+                outcome_weights = {(seat, card): 1.0 / len(matching) for card in matching}
+                break
+        for outcome, weight in outcome_weights.items():
+            joint[triple, outcome] += weight
+    triples = defaultdict(float)
+    outcomes = defaultdict(float)
+    for (triple, outcome), weight in joint.items():
+        triples[triple] += weight
+        outcomes[outcome] += weight
+
+    def entropy(weights):
+        return -sum(w / len(deals) * math.log2(w / len(deals)) for w in weights.values())
+
+    return entropy(triples) + entropy(outcomes) - entropy(joint)
+
+
+class FixedDeals(SolutionEstimator):
+    # hands the optimizer a given pool instead of drawing one
+    def __init__(self, notebook, deals):
+        super().__init__(notebook)
+        self.deals = deals
+
+    def sample_deals(self, count, max_draws=None):
+        return self.deals[:count]
+
+
+@pytest.mark.parametrize("num_players,seed", [(3, 0), (4, 1), (6, 2)])
+def test_optimizer_matches_naive_information_gain(num_players, seed):
+    _, rooms, weapons, characters = load_default_setup()
+    registry, notebook, _, _ = play_position(seed, 4, num_players, rooms, weapons, characters)
+    deals = SolutionEstimator(notebook, rng=random.Random(seed)).sample_deals(200)
+    optimizer = SuggestionOptimizer(FixedDeals(notebook, deals), samples=200)
+    for suggester in notebook.players[:2]:
+        gains, suggestions = optimizer.expected_gains(rooms[:3], suggester)
+        seat = notebook.players.index(suggester)
+        expected = [naive_gain(deals, suggestion, seat, registry) for suggestion in suggestions]
+        assert np.allclose(gains, expected)
+    ranked = optimizer.rank(rooms[:3], top=5)
+    assert [gain for gain, _ in ranked] == sorted((gain for gain, _ in ranked), reverse=True)
+    assert optimizer.best(rooms[:3]) == ranked[0][1]
+
+
+def test_optimizer_without_deals():
+    # a seat of three cards refuting four suggestions that share no card: no deal agrees with the notebook,
+    # which the notebook's propagation does not notice, so sampling comes back empty
+    _, rooms, weapons, characters = load_default_setup()
+    registry = CardRegistry(rooms, weapons, characters)
+    players = characters[:6]
+    notebook = DetectiveNotebook(registry, players, me=players[0])
+    notebook.observe_own_hand(registry.mask([characters[0], weapons[0], rooms[0]]))
+    for i in range(1, 5):
+        notebook.record_suggestion(players[2], (characters[i], weapons[i], rooms[i]), players[1])
+    estimator = SolutionEstimator(notebook, rng=random.Random(0))
+    assert notebook.solution_candidates() and estimator.sample_deals(50) == []
+
+    optimizer = SuggestionOptimizer(estimator, samples=100, max_draws=2000)
+    gains, suggestions = optimizer.expected_gains(rooms[:2])
+    assert len(suggestions) == 2 * len(characters) * len(weapons) and not gains.any()
+    ranked = optimizer.rank(rooms[:2], top=3)
+    possible = notebook.possible_envelope_mask()
+    assert len(ranked) == 3 and all(registry.mask(suggestion) & possible == registry.mask(suggestion)
+                                    for _, suggestion in ranked)
+    character, weapon, room = optimizer.best([rooms[0]])
+    assert room == rooms[0] and character != characters[0] and weapon != weapons[0]
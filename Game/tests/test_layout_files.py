@@ -0,0 +1,118 @@
+import os
+import shutil
+import struct
+
+import pytest
+
+from Game.GameSetup.GenerateMansionLayout import (
+    generate_random_weighted_graph_with_secrets,
+    load_graph_from_json,
+    save_graph_to_json
+)
+
+from Game.GameSetup.MansionGraph import (
+    MansionGraph
+)
+
+from Game.GameSetup.MansionLayoutBinary import (
+    HEADER,
+    MappedMansionLayout,
+    load_graph_from_binary,
+    save_graph_to_binary
+)
+
+from Game.Benchmarks.SyntheticGraphs import (
+    synthetic_room_names
+)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHIPPED_LAYOUT = os.path.join(BASE_DIR, "mansion_layout.json")
+
+
+def build_layout(name):
+    if name == "shipped":
+        return load_graph_from_json(SHIPPED_LAYOUT)
+    if name == "synthetic":
+        return generate_random_weighted_graph_with_secrets(synthetic_room_names(300), seed=3)
+    # names that are not ASCII, and a room without hallways
+    return {"Salón": {"Ωmega": 0, "Hall": 3}, "Ωmega": {"Salón": 0}, "Hall": {"Salón": 3}, "Empty": {}}
+
+
+@pytest.mark.parametrize("name", ["shipped", "synthetic", "unicode"])
+def test_binary_round_trip(tmp_path, name):
+    graph = build_layout(name)
+    path = str(tmp_path / "layout.bin")
+    save_graph_to_binary(graph, path)
+    loaded = load_graph_from_binary(path)
+    assert isinstance(loaded, MansionGraph)
+    assert loaded.to_dict() == graph
+    # room order survives as well as the neighbor order inside each room
+    assert list(loaded.to_dict()) == list(graph)
+    assert [list(neighbors) for neighbors in loaded.to_dict().values()] == [list(n) for n in graph.values()]
+
+    with MappedMansionLayout(path) as mapped:
+        assert len(mapped) == len(graph)
+        assert mapped.rooms() == list(graph)
+        for room, neighbors in graph.items():
+            assert mapped.neighbors(room) == list(neighbors.items())
+        with pytest.raises(KeyError):
+            mapped.room_id("no such room")
+
+
+def test_json_round_trip(tmp_path):
+    graph = load_graph_from_json(SHIPPED_LAYOUT)
+    path = str(tmp_path / "layout.json")
+    save_graph_to_json(MansionGraph.from_dict(graph), path)
+    assert load_graph_from_json(path) == graph
+
+
+def corrupt_target(path):
+    # first adjacency target -> a room id past the end of the table
+    with open(path, "r+b") as f:
+        data = f.read()
+        _, _, _, num_rooms, _, _ = HEADER.unpack_from(data)
+        pos = (HEADER.size + 7) & ~7
+        for size in ((num_rooms + 1) * 8, num_rooms * 4, (num_rooms + 1) * 8):
+            pos += (size + 7) & ~7
+        f.seek(pos)
+        f.write(struct.pack("<I", num_rooms + 5))
+
+
+def corrupt_offsets(path):
+    # last CSR row start claims more edges than the file holds
+    with open(path, "r+b") as f:
+        data = f.read()
+        _, _, _, num_rooms, num_edges, _ = HEADER.unpack_from(data)
+        pos = ((HEADER.size + 7) & ~7) + (((num_rooms + 1) * 8 + 7) & ~7) + ((num_rooms * 4 + 7) & ~7)
+        f.seek(pos + num_rooms * 8)
+        f.write(struct.pack("<q", num_edges + 1))
+
+
+def truncate(path):
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) // 2)
+
+
+@pytest.mark.parametrize("damage", [corrupt_target, corrupt_offsets, truncate])
+def test_damaged_binary_layout(tmp_path, damage):
+    graph = load_graph_from_json(SHIPPED_LAYOUT)
+    path = str(tmp_path / "layout.bin")
+    save_graph_to_binary(graph, path)
+    damage(path)
+    with pytest.raises(ValueError):
+        MappedMansionLayout(path)
+    with pytest.raises(ValueError):
+        load_graph_from_binary(path)
+    # with the JSON layout next to it the loader falls back to that
+    shutil.copy(SHIPPED_LAYOUT, str(tmp_path / "layout.json"))
+    assert load_graph_from_binary(path).to_dict() == graph
+
+
+def test_not_a_layout(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        MappedMansionLayout(str(path))
+    path.write_bytes(b"CLEV" + bytes(64))
+    with pytest.raises(ValueError):
+        load_graph_from_binary(str(path))
@@ -0,0 +1,200 @@
+import random
+
+import pytest
+
+from Game.AlgorithmForSelectingPossibleMoves.LimitedUniformCostSearch import (
+    limited_uniform_cost_search,
+    limited_uniform_cost_search_with_routes,
+    reachable_for_players
+)
+
+from Game.AlgorithmForSelectingPossibleMoves.MoveTable import (
+    MoveTable,
+    VersionedGraph,
+    build_move_table
+)
+
+from Game.AlgorithmForSelectingPossibleMoves.DynamicMoveTable import (
+    DynamicMoveTable
+)
+
+from Game.GameSetup.GenerateMansionLayout import (
+    generate_random_weighted_graph_with_secrets
+)
+
+from Game.GameSetup.MansionGraph import (
+    MansionGraph
+)
+
+from Game.Benchmarks.SyntheticGraphs import (
+    synthetic_room_names
+)
+
+from Game.Benchmarks.BenchmarkDynamicMoveTable import (
+    apply_operation,
+    churn_operations
+)
+
+#(rooms, max edges per room, secret chance, seed); lots of secret passages so the passage rule matters
+LAYOUTS = [
+    (9, 5, 0.25, 123),
+    (9, 5, 0.6, 7),
+    (40, 4, 0.4, 1),
+    (120, 3, 0.5, 2),
+]
+
+
+def build_layout(shape):
+    num_rooms, edges, secrets, seed = shape
+    return generate_random_weighted_graph_with_secrets(synthetic_room_names(num_rooms), seed=seed,
+                                                       max_edges_per_room=edges, secret_chance=secrets)
+
+
+def reference_search(graph, start, max_cost):
+    # Bellman-Ford over (room, arrived by secret passage) states: nothing shared with the heap search
+    best = {(start, False): 0}
+    changed = True
+    while changed:
+        changed = False
+        for (room, used_secret), cost in list(best.items()):
+            for neighbor, step in graph[room].items():
+                if step == 0 and used_secret:
+                    continue
+                state = (neighbor, step == 0)
+                if cost + step <= max_cost and cost + step < best.get(state, max_cost + 1):
+                    best[state] = cost + step
+                    changed = True
+    reached = {}
+    for (room, _), cost in best.items():
+        if room != start:
+            reached[room] = min(cost, reached.get(room, cost))
+    return reached
+
+
+@pytest.mark.parametrize("shape", LAYOUTS, ids=lambda shape: "-".join(map(str, shape)))
+def test_lucs_matches_reference(shape):
+    graph = build_layout(shape)
+    mansion = MansionGraph.from_dict(graph)
+    for start in graph:
+        for budget in (1, 3, 6, 9):
+            reachable = limited_uniform_cost_search(graph, start, budget)
+            assert dict(reachable) == reference_search(graph, start, budget)
+            # sorted by cost (ties in the order the search settles them), so smaller rolls are prefixes
+            assert [cost for _, cost in reachable] == sorted(cost for _, cost in reachable)
+            assert limited_uniform_cost_search(mansion, start, budget) == reachable
+            assert limited_uniform_cost_search_with_routes(graph, start, budget).reachable == reachable
+
+
+def test_no_two_secret_passages_in_a_row():
+    # A =0= B =0= C: C is only reached over the hallways through E; G is a hallway and then a passage away
+    graph = {
+        "A": {"B": 0, "E": 2},
+        "B": {"A": 0, "C": 0, "D": 4},
+        "C": {"B": 0, "F": 4},
+        "D": {"B": 4, "G": 0},
+        "E": {"A": 2, "C": 3},
+        "F": {"C": 4},
+        "G": {"D": 0},
+    }
+    reachable = dict(limited_uniform_cost_search(graph, "A", 6))
+    assert reachable == {"B": 0, "E": 2, "D": 4, "G": 4, "C": 5}
+    assert dict(limited_uniform_cost_search(MansionGraph.from_dict(graph), "A", 6)) == reachable
+
+
+@pytest.mark.parametrize("shape", LAYOUTS, ids=lambda shape: "-".join(map(str, shape)))
+def test_routes_follow_the_passage_rule(shape):
+    graph = build_layout(shape)
+    for start in list(graph)[:10]:
+        routes = limited_uniform_cost_search_with_routes(graph, start, 6)
+        for room, cost in routes.reachable:
+            steps = routes.route_steps(room)
+            assert steps[0][0] == start and steps[-1][1] == room
+            assert sum(graph[a][b] for a, b, _ in steps) == cost
+            assert all(secret == (graph[a][b] == 0) for a, b, secret in steps)
+            assert not any(first[2] and second[2] for first, second in zip(steps, steps[1:]))
+
+
+@pytest.mark.parametrize("shape", LAYOUTS, ids=lambda shape: "-".join(map(str, shape)))
+def test_move_table_matches_lucs(shape):
+    graph = build_layout(shape)
+    for layout in (graph, MansionGraph.from_dict(graph)):
+        table = MoveTable(layout)
+        for start in graph:
+            for roll in range(1, 9):
+                assert table.reachable(start, roll) == limited_uniform_cost_search(graph, start, roll)
+            assert table.reachable(start, 0) == []
+    assert MoveTable(graph).reachable("no such room", 3) == []
+
+
+def test_reachable_for_players_uses_one_search_per_room():
+    graph = build_layout(LAYOUTS[0])
+    players = {"a": {"location": "Room 0"}, "b": {"location": "Room 0"}, "c": {"location": "Room 4"}}
+    by_player = reachable_for_players(graph, players)
+    for player, state in players.items():
+        for roll, rooms in by_player[player].items():
+            assert rooms == limited_uniform_cost_search(graph, state["location"], roll)
+
+
+def test_move_table_sees_edits_to_its_graph():
+    graph = build_layout(LAYOUTS[0])
+    table = MoveTable(graph)
+    # a plain dict is copied, the table's own graph is the one to edit
+    assert isinstance(table.graph, VersionedGraph)
+    a, b = "Room 0", next(room for room in graph if room != "Room 0" and room not in graph["Room 0"])
+    table.graph[a][b] = 1
+    table.graph[b][a] = 1
+    assert table.is_stale()
+    edited = {room: dict(neighbors) for room, neighbors in table.graph.items()}
+    for start in edited:
+        assert table.reachable(start, 6) == limited_uniform_cost_search(edited, start, 6)
+    del table.graph[a][b]
+    table.graph[b].pop(a)
+    assert table.reachable(a, 6) == limited_uniform_cost_search(graph, a, 6)
+
+
+@pytest.mark.parametrize("shape", LAYOUTS, ids=lambda shape: "-".join(map(str, shape)))
+def test_dynamic_move_table_matches_a_rebuild(shape):
+    graph = build_layout(shape)
+    table = DynamicMoveTable(graph)
+    # a listener that only keeps the rows it is told about has to end up with the full table
+    mirror = {start: list(rows) for start, rows in build_move_table(graph).items()}
+    table.subscribe(lambda change: mirror.update(change.changed))
+    for number, operation in enumerate(churn_operations(graph, 60, seed=shape[3])):
+        change = apply_operation(table, operation)
+        assert change.version == table.graph.version
+        rebuilt = build_move_table(table.graph)
+        assert {start: list(rows) for start, rows in mirror.items() if start in rebuilt} == rebuilt
+        if number % 10 == 0:
+            for start in rebuilt:
+                for roll in range(1, 7):
+                    assert table.reachable(start, roll) == list(rebuilt[start][roll])
+
+
+def test_dynamic_move_table_rejects_bad_edits():
+    table = DynamicMoveTable({"A": {"B": 1}, "B": {"A": 1}, "C": {}})
+    with pytest.raises(ValueError):
+        table.add_edge("A", "B", 2)
+    with pytest.raises(KeyError):
+        table.remove_edge("A", "C")
+    with pytest.raises(ValueError):
+        table.add_edge("A", "A", 1)
+    with pytest.raises(ValueError):
+        table.add_edge("A", "C", -1)
+
+
+def test_dynamic_move_table_on_random_edits_of_the_mansion():
+    rng = random.Random(5)
+    graph = build_layout(LAYOUTS[0])
+    table = DynamicMoveTable(MansionGraph.from_dict(graph))
+    rooms = list(graph)
+    for _ in range(40):
+        a, b = rng.sample(rooms, 2)
+        if b in table.graph[a]:
+            if rng.random() < 0.5:
+                table.remove_edge(a, b)
+            else:
+                table.set_cost(a, b, rng.randint(0, 6))
+        else:
+            table.add_edge(a, b, rng.randint(0, 6))
+        for start in rooms:
+            assert table.reachable(start, 6) == limited_uniform_cost_search(table.graph, start, 6)
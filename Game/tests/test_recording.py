@@ -0,0 +1,222 @@
+import os
+import random
+
+import pytest
+
+from Game.GameRecording.EventLog import (
+    FILE_HEADER,
+    EventLogWriter,
+    game_offsets,
+    read_records,
+    replay_game
+)
+
+from Game.GameRecording.GameSnapshot import (
+    GameState,
+    load_snapshot,
+    save_snapshot,
+    snapshot_from_bytes,
+    snapshot_to_bytes
+)
+
+from Game.GameSetup.CardRegistry import (
+    CardRegistry
+)
+
+from Game.GameSetup.GameRandom import (
+    GameRandom
+)
+
+from Game.GameSetup.GenerateMansionLayout import (
+    generate_random_weighted_graph_with_secrets
+)
+
+from Game.GameSetup.GenerateSolutionAndDistributeCards import (
+    deal_card_lists
+)
+
+from Game.Simulation.HeadlessSimulation import (
+    DeductionAccusationPolicy,
+    RandomMovePolicy,
+    UnseenCardSuggestionPolicy,
+    load_default_setup,
+    play_headless_game,
+    run_simulations
+)
+
+from Game.game import (
+    process_suggestion
+)
+
+GAMES = 12
+
+
+@pytest.fixture(scope="module")
+def setup():
+    return load_default_setup()
+
+
+@pytest.fixture
+def recorded(tmp_path, setup):
+    # a batch of headless games in one log, and the summary of the same batch
+    mansion_graph, rooms, weapons, characters = setup
+    path = str(tmp_path / "games.bin")
+    with EventLogWriter(path) as recorder:
+        summary = run_simulations(GAMES, mansion_graph, rooms, weapons, characters, num_players=4, first_seed=9,
+                                  recorder=recorder)
+    return path, summary
+
+
+def test_event_log_replays_every_game(recorded):
+    path, summary = recorded
+    offsets = game_offsets(path)
+    assert len(offsets) == GAMES
+    wins_by_seat = {}
+    for index, offset in enumerate(offsets):
+        game = replay_game(path, index)
+        assert game.finished
+        assert game.seed == GameRandom.for_game(9, index).seed
+        # the same game, found by scanning or by its offset
+        at_offset = replay_game(path, offset=offset)
+        assert (at_offset.turn, at_offset.winner, at_offset.player_states) == \
+               (game.turn, game.winner, game.player_states)
+        if game.winner is not None:
+            seat = game.players.index(game.winner)
+            wins_by_seat[seat] = wins_by_seat.get(seat, 0) + 1
+        assert sorted(card for state in game.player_states.values() for card in state["hand"]) == \
+               sorted(set(game.cards) - set(game.solution_data.values()))
+    assert wins_by_seat == summary.wins_by_seat
+
+
+def test_event_log_matches_the_game(tmp_path, setup):
+    # the replayed end position is the one play_headless_game finished on
+    mansion_graph, rooms, weapons, characters = setup
+    registry = CardRegistry(rooms, weapons, characters)
+    path = str(tmp_path / "game.bin")
+    with EventLogWriter(path) as recorder:
+        result = play_headless_game(mansion_graph, registry, 3, GameRandom(77), RandomMovePolicy(),
+                                    UnseenCardSuggestionPolicy(), DeductionAccusationPolicy(), recorder=recorder)
+    game = replay_game(path)
+    assert game.turn == result.turns
+    assert game.winner == result.winner
+
+
+def test_replay_stops_at_a_turn(recorded):
+    path, _ = recorded
+    full = replay_game(path, 3)
+    for turn in range(0, full.turn + 1, 5):
+        assert replay_game(path, 3, upto_turn=turn).turn == turn
+    with pytest.raises(IndexError):
+        replay_game(path, GAMES)
+
+
+def test_event_log_torn_tail(recorded):
+    path, _ = recorded
+    records = list(read_records(path))
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        f.truncate(size - 3)
+    with pytest.raises(ValueError):
+        list(read_records(path))
+    with pytest.raises(ValueError):
+        game_offsets(path)
+    # the writer cuts the torn record off, so appending after a crash leaves a readable log
+    EventLogWriter(path).close()
+    assert list(read_records(path)) == records[:-1]
+
+
+def test_event_log_corrupt_record(recorded):
+    path, _ = recorded
+    with open(path, "ab") as f:
+        f.write(bytes(5))
+    with pytest.raises(ValueError):
+        list(read_records(path))
+    with pytest.raises(ValueError):
+        EventLogWriter(path)
+
+
+def test_event_log_refuses_a_short_file(tmp_path):
+    path = tmp_path / "short.bin"
+    path.write_bytes(b"CL")
+    with pytest.raises(ValueError):
+        EventLogWriter(str(path))
+    assert path.read_bytes() == b"CL"
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    EventLogWriter(str(empty)).close()
+    assert empty.stat().st_size == FILE_HEADER.size
+
+
+def play_turns(state, rooms, characters, weapons, game_random, turns, registry=None):
+    # random moves and suggestions on the state, drawing from the game's streams like game.py does
+    for _ in range(turns):
+        player = state.current_player
+        room = game_random.dice.choice(rooms)
+        state.move_player(player, room)
+        suggestion = (game_random.stream("moves").choice(characters), game_random.stream("moves").choice(weapons),
+                      room)
+        state.suggest(player, suggestion, game_random.refute, registry)
+        state.advance()
+        state.turn += 1
+
+
+@pytest.mark.parametrize("masks", [False, True])
+def test_snapshot_resume(tmp_path, setup, masks):
+    _, rooms, weapons, characters = setup
+    registry = CardRegistry(rooms, weapons, characters) if masks else None
+    game_random = GameRandom(1234)
+    layout = generate_random_weighted_graph_with_secrets(rooms, secret_chance=0.25, rng=game_random.layout)
+    solution_data, hands = deal_card_lists(rooms, weapons, characters, 4, game_random.deal)
+    players = list(hands)
+    player_states = {
+        player: {"location": game_random.start.choice(rooms), "history": [],
+                 "hand": registry.mask(hands[player]) if masks else list(hands[player]), "active": True,
+                 "seen_cards": 0 if masks else []}
+        for player in players
+    }
+    state = GameState(players, solution_data, player_states, {weapon: rooms[0] for weapon in weapons},
+                      layout=layout)
+    play_turns(state, rooms, characters, weapons, game_random, 7, registry)
+    state.eliminate(players[1])
+
+    path = str(tmp_path / "game.snap")
+    save_snapshot(path, state, rng=game_random)
+    # as game.py --resume does it: the seed first, then every stream's state
+    resumed = load_snapshot(path)
+    resumed_random = GameRandom(resumed.rng_seed)
+    resumed.restore_random(resumed_random)
+
+    assert resumed.selected_players == state.selected_players
+    assert resumed.solution_data == state.solution_data
+    assert (resumed.index, resumed.turn) == (state.index, state.turn)
+    assert resumed.player_states() == state.player_states()
+    assert resumed.weapons_locations == state.weapons_locations
+    assert resumed.layout == layout
+
+    # both games carry on with the same rolls and refutations, including streams first used after the save
+    play_turns(state, rooms, characters, weapons, game_random, 10, registry)
+    play_turns(resumed, rooms, characters, weapons, resumed_random, 10, registry)
+    assert resumed.player_states() == state.player_states()
+    assert resumed_random.stream("ai.later").random() == game_random.stream("ai.later").random()
+    assert resumed.weapons_locations == state.weapons_locations
+
+
+def test_snapshot_forks_do_not_share_writes(setup):
+    _, rooms, weapons, characters = setup
+    rng = random.Random(4)
+    solution_data, hands = deal_card_lists(rooms, weapons, characters, 3, rng)
+    player_states = {player: {"location": rooms[0], "history": [], "hand": list(hand), "active": True,
+                              "seen_cards": []} for player, hand in hands.items()}
+    weapons_locations = {weapon: rooms[0] for weapon in weapons}
+    parent = GameState(list(hands), solution_data, player_states, weapons_locations)
+    before = snapshot_to_bytes(parent)
+    child = parent.fork()
+    player = parent.current_player
+    suggestion = (characters[0], weapons[0], rooms[1])
+    expected = process_suggestion(player, suggestion, parent.player_states(), list(hands), dict(weapons_locations),
+                                  verbose=False, rng=random.Random(8))
+    assert child.suggest(player, suggestion, random.Random(8)) == expected
+    child.move_player(player, rooms[2])
+    assert snapshot_to_bytes(parent) == before
+    assert player_states[player]["history"] == [] and weapons_locations[weapons[0]] == rooms[0]
+    assert snapshot_from_bytes(snapshot_to_bytes(child)).player_states() == child.player_states()